@@ -0,0 +1,142 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+# Conversation context compaction for the customer agent.
+# The API forwards the client's full history on every turn; instead of sending all
+# of it to the LLM we keep the last K turns verbatim and fold everything older into
+# one summary note. Summaries are cached per conversation and extended
+# incrementally, so older turns are summarized once rather than on every request.
+
+Summarizer = Callable[[str | None, list[dict]], Awaitable[str]]
+
+SUMMARY_PROMPT = '''
+Summarize the earlier part of a shopping conversation between a user and the Fiducia assistant.
+Keep only facts needed to continue: the user's needs and preferences, merchants and items
+discussed with prices, merchant_id values, and any decisions or confirmations.
+Reply with a few short bullet points and nothing else.
+'''
+
+
+def _hash_turns(turns: list[dict]) -> str:
+    raw = json.dumps([[t.get('role'), t.get('content')] for t in turns], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _clip(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return text[: max(0, limit - 3)] + '...'
+
+
+def fallback_summary(previous: str | None, turns: list[dict], limit: int = 1200) -> str:
+    """Deterministic summary used when the LLM summarizer is unavailable."""
+    lines = [previous] if previous else []
+    for t in turns:
+        lines.append(f"- {t.get('role')}: {_clip(str(t.get('content') or ''), 160)}")
+    # Keep the most recent lines when over budget
+    text = '\n'.join(lines)
+    return text if len(text) <= limit else '...' + text[-(limit - 3):]
+
+
+class ConversationCompactor:
+    """Bound the prompt to the system prompt + one summary note + the last K turns.
+
+    - keep_last_turns: turns always sent verbatim
+    - summarize_every: older turns are folded into the summary in batches of this
+      size, so the summarizer runs at most once per batch rather than every turn
+    - max_summarize_calls: summarizer calls one compact() may make; an older backlog
+      (after a restart or eviction) is folded with fallback_summary instead
+    - max_turn_chars / max_summary_chars: per-message and summary size caps
+    - max_conversations: LRU capacity of the per-conversation summary cache
+    """
+
+    def __init__(self,
+                 keep_last_turns: int = 8,
+                 summarize_every: int = 4,
+                 max_summarize_calls: int = 1,
+                 max_turn_chars: int = 2000,
+                 max_summary_chars: int = 1200,
+                 max_conversations: int = 1024):
+        self.keep_last_turns = keep_last_turns
+        self.summarize_every = max(1, summarize_every)
+        self.max_summarize_calls = max(1, max_summarize_calls)
+        self.max_turn_chars = max_turn_chars
+        self.max_summary_chars = max_summary_chars
+        self.max_conversations = max_conversations
+        # conversation_id -> (covered_count, covered_hash, summary)
+        self._summaries: OrderedDict[str, tuple[int, str, str]] = OrderedDict()
+        self.summaries_built = 0
+        self.summaries_reused = 0
+        self.turns_folded_locally = 0
+
+    @staticmethod
+    def conversation_id(owner: str, turns: list[dict]) -> str:
+        """Identify a conversation by its owner (wallet) and opening turn."""
+        first = turns[0].get('content') if turns else ''
+        raw = f"{owner}\n{first}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+    async def compact(self,
+                      conversation_id: str,
+                      turns: list[dict],
+                      summarize: Summarizer) -> tuple[str | None, list[dict]]:
+        """Return (summary note or None, recent turns) for this conversation."""
+        recent_start = max(0, len(turns) - self.keep_last_turns)
+        cached = self._summaries.get(conversation_id)
+        covered, covered_hash, summary = 0, '', None
+        if cached and cached[0] <= recent_start and _hash_turns(turns[: cached[0]]) == cached[1]:
+            covered, covered_hash, summary = cached
+            self._summaries.move_to_end(conversation_id)
+
+        # Fold older turns into the summary one full batch at a time, every summarizer
+        # prompt within summarize_every clipped turns plus the previous summary. After a
+        # cache miss (restart, eviction, edited history) only the newest batches get a
+        # summarizer call; the backlog before them is folded locally so the reply isn't
+        # held up by a chain of LLM calls.
+        if recent_start - covered < self.summarize_every and summary is not None:
+            self.summaries_reused += 1
+        backlog = (recent_start - covered) // self.summarize_every - self.max_summarize_calls
+        if backlog > 0:
+            end = covered + backlog * self.summarize_every
+            old_turns = [self._clip_turn(t) for t in turns[covered:end]]
+            summary = fallback_summary(summary, old_turns, self.max_summary_chars)
+            self.turns_folded_locally += end - covered
+            covered = end
+            self._remember(conversation_id, covered, _hash_turns(turns[:covered]), summary)
+        while recent_start - covered >= self.summarize_every:
+            end = covered + self.summarize_every
+            new_turns = [self._clip_turn(t) for t in turns[covered:end]]
+            try:
+                summary = await summarize(summary, new_turns)
+            except Exception:
+                summary = fallback_summary(summary, new_turns, self.max_summary_chars)
+            summary = _clip(summary or '', self.max_summary_chars)
+            covered = end
+            self._remember(conversation_id, covered, _hash_turns(turns[:covered]), summary)
+            self.summaries_built += 1
+
+        # Turns not yet folded into the summary stay verbatim (at most summarize_every - 1 extra)
+        recent = [self._clip_turn(t) for t in turns[covered:]]
+        return summary, recent
+
+    def _clip_turn(self, turn: dict) -> dict:
+        content = turn.get('content')
+        if not isinstance(content, str):
+            content = str(content)
+        return {'role': turn.get('role'), 'content': _clip(content, self.max_turn_chars)}
+
+    def _remember(self, conversation_id: str, covered: int, covered_hash: str, summary: str) -> None:
+        self._summaries[conversation_id] = (covered, covered_hash, summary)
+        self._summaries.move_to_end(conversation_id)
+        while len(self._summaries) > self.max_conversations:
+            self._summaries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            'conversations': len(self._summaries),
+            'summaries_built': self.summaries_built,
+            'summaries_reused': self.summaries_reused,
+            'turns_folded_locally': self.turns_folded_locally,
+        }
@@ -1,7 +1,6 @@
 from datetime import datetime
 from uuid import uuid4
  
-from openai import OpenAI
 from uagents.query import send_sync_message,query
 
 from uagents import Context, Protocol, Agent
@@ -15,12 +14,17 @@ from uagents_core.contrib.protocols.chat import (
 from decimal import Decimal
 
 from agent.protocol.a3acontext import *
+import asyncio
 import json,os
 from dotenv import load_dotenv
 from blockchain.order_contract import OrderContractManager
 from storage.lighthouse import upload_order_desc,CID2Digest,CIDRebuild
 from agent.contract import get_erc20_abi,get_contract_abi
 from blockchain.utils import is_valid_ethereum_address, to_checksum_address
+from agent.llm import create_llm_client_from_env
+from agent.tracing import Tracer
+from agent.compaction import ConversationCompactor, SUMMARY_PROMPT
+from agent.intent_router import IntentRouter, match_menu_item, SHOW_MENU, ORDER_STATUS, ITEM_PRICE
 # Load environment variables from .env
 load_dotenv()
 from hyperon import MeTTa
@@ -32,6 +36,8 @@ from metta.utils import (
 )
 from metta.knowledge import initialize_knowledge_graph, seed_merchant_example
 from metta.indexer import search_merchants
+from metta.storage import storage_backend
+from metta.query_cache import query_cache_stats
 
 order_contract = OrderContractManager(
     provider_url=os.environ['CONTRACT_URL'],
@@ -53,14 +59,17 @@ MERCHANT_AGENT_ADDRESS = os.getenv(
 # This should match the merchant_id used during admin updates (if any).
 DEFAULT_MERCHANT_ID = os.getenv('DEFAULT_MERCHANT_ID', '1')
 
+# Deadline for the on-chain reads behind the order-status fast path (seconds)
+ORDER_STATUS_TIMEOUT_S = float(os.getenv('ORDER_STATUS_TIMEOUT_S', '5'))
 
-def _select_merchant_id_from_context(messages: list[dict]) -> str:
+
+def _select_merchant_id_from_context(messages: list[dict], default: str | None = DEFAULT_MERCHANT_ID) -> str | None:
     """Choose a merchant_id to scope queries.
 
     Priority:
     1) Explicit hint in messages: role in {agent, system} and content startswith 'merchant_id:'
     2) Keyword search over MeTTa storage based on the last user message
-    3) Fallback to DEFAULT_MERCHANT_ID
+    3) Fallback to `default` (DEFAULT_MERCHANT_ID; None when the caller needs to know)
     """
     # 1) Check for explicit hint
     try:
@@ -93,7 +102,7 @@ def _select_merchant_id_from_context(messages: list[dict]) -> str:
             pass
 
     # 3) Fallback
-    return DEFAULT_MERCHANT_ID
+    return default
 
 order_contract.user_account
 system_prompt = '''
@@ -104,7 +113,7 @@ A normal process of your job is listed as follow:
 1. (optional) introduce yourself
 2. ask user their needs
 3. help user make their needs more in detail
-4. chat with a merchant agent using consult_merchant function to fetch the menu of all products the merchant provide.
+4. chat with a merchant agent using consult_merchant function (pass what the user wants as the query) to fetch the menus of the most relevant merchants; request the next page if nothing fits.
 4.1 When you return your result from merchant to user, you need to include the price of the product, the name of the merchant
 5. Finally, You should have:
 - detailed description of user's needs
@@ -136,17 +145,24 @@ consult_merchant = {
 "type": "function",
 "function": {
   "name": "consult_merchant",
-  "description": "chat with the merchant agent ai bot",
+  "description": "Fetch the menus of the merchants most relevant to what the user wants. Results are paginated; ask for the next page if nothing fits.",
 "parameters": {
       "type": "object",
-      "properties": {}
+      "properties": {
+        "query": {"type": "string", "description": "what the user is looking for, e.g. 'cheese pizza in brooklyn'"},
+        "page": {"type": "integer", "description": "result page, starting at 0"}
+      }
     }
   }
 }
 
 a3acustomer_protocol = create_a3a_protocol()
+# Span recorder for this agent; trace context is forwarded to the merchant agent
+tracer = Tracer('customer')
 async def try_send_to_merchant(ctx:A3AContext)->A3AResponse:
-    resp = await send_sync_message(MERCHANT_AGENT_ADDRESS,ctx,response_type=A3AResponse)
+    with tracer.span('customer.try_send_to_merchant') as span:
+        ctx.trace = span.context()
+        resp = await send_sync_message(MERCHANT_AGENT_ADDRESS,ctx,response_type=A3AResponse)
     return resp
 def real_upload_order(wallet,desc,price):
     cid = upload_order_desc({
@@ -166,15 +182,30 @@ def real_create_propose(hash,wallet):
 def real_answer_propose(orderid,price,seller_address):
    return order_contract.propose_order_answer(orderid,'answer from merchant',price,seller_address=seller_address)
 
-_asi_api_key = os.getenv('API_ASI_KEY')
-if not _asi_api_key:
-    raise RuntimeError("Missing API_ASI_KEY in environment; set it in your .env file.")
+# Pooled async client for the ASI:One LLM endpoint; bounded by LLM_MAX_CONCURRENCY
+# create_propose writes on-chain state, so its turns never go through the response cache
+llm = create_llm_client_from_env(side_effect_tools=('create_propose',), tracer=tracer)
 
-client = OpenAI(
-    # By default, we are using the ASI:One LLM endpoint and model
-    base_url='https://api.asi1.ai/v1',
-    api_key=_asi_api_key,
+compactor = ConversationCompactor(
+    keep_last_turns=int(os.getenv('CONTEXT_KEEP_TURNS', '8')),
+    summarize_every=int(os.getenv('CONTEXT_SUMMARIZE_EVERY', '4')),
 )
+
+
+async def _summarize_turns(previous: str | None, turns: list[dict]) -> str:
+    """Fold older conversation turns (plus the previous summary) into one short note."""
+    transcript = "\n".join(f"{t['role']}: {t['content']}" for t in turns)
+    if previous:
+        transcript = f"Summary so far:\n{previous}\n\nNew turns:\n{transcript}"
+    r = await llm.chat(
+        model="asi1-mini",
+        messages=[
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": transcript},
+        ],
+        max_tokens=256,
+    )
+    return str(r.choices[0].message.content or '')
  
 # Helper to safely extract content from merchant agent replies
 def _safe_content(resp) -> str:
@@ -193,6 +224,85 @@ def _safe_content(resp) -> str:
 # MeTTa integration (customer-side)
 # ------------------------------
 
+intent_router = IntentRouter()
+
+# Merchant facts, read through the configured storage backend
+STORE = storage_backend()
+
+# merchant_id -> (storage version, [(item, price), ...]) for fast-path menu reads
+_LOCAL_MENUS: dict[str, tuple[str, list]] = {}
+
+
+def _local_menu(merchant_id: str) -> list:
+    """Read a merchant's menu from storage, re-reading only when its version changed."""
+    version = STORE.version(merchant_id)
+    cached = _LOCAL_MENUS.get(merchant_id)
+    if cached and cached[0] == version:
+        return cached[1]
+    menu = STORE.profile(merchant_id).menu()
+    _LOCAL_MENUS[merchant_id] = (version, menu)
+    return menu
+
+
+def _order_status_reply(wallet: str, is_merchant: bool, limit: int = 5) -> str:
+    if is_merchant:
+        order_ids = order_contract.get_merchant_order_ids(wallet)
+    else:
+        order_ids = order_contract.get_user_order_ids(wallet)
+    if not order_ids:
+        return "You don't have any orders yet."
+    lines = []
+    for oid in order_ids[-limit:]:
+        if is_merchant:
+            d = order_contract.get_merchant_order_details(wallet, oid)
+        else:
+            d = order_contract.get_user_order_details(wallet, oid)
+        lines.append(f"- Order {d.order_id}: {d.status_name}, {d.price} pyUSD")
+    header = f"Your latest {len(lines)} of {len(order_ids)} orders:" if len(order_ids) > limit else "Your orders:"
+    return header + "\n" + "\n".join(lines)
+
+
+async def _fast_path_reply(text: str, merchant_id: str | None, wallet: str, is_merchant: bool) -> str | None:
+    """Answer deterministic intents locally; None means fall through to the LLM.
+
+    merchant_id is None when neither a hint nor a search hit named a merchant: menu and
+    price questions then go to the LLM, which picks one, rather than DEFAULT_MERCHANT_ID's menu.
+
+    Order status reads the chain with blocking web3 calls: they run in a worker thread under
+    ORDER_STATUS_TIMEOUT_S so a slow RPC node never stalls the agent's event loop; past the
+    deadline the query falls through like any other fast-path failure.
+    """
+    intent = intent_router.classify(text)
+    if intent is None:
+        intent_router.record_miss()
+        return None
+    if merchant_id is None and intent.name in (SHOW_MENU, ITEM_PRICE):
+        intent_router.record_miss()
+        return None
+    try:
+        if intent.name == SHOW_MENU:
+            menu = _local_menu(merchant_id)
+            items = "\n".join(f"- {i}: ${p}" for i, p in menu) if menu else "(no items yet)"
+            reply = f"Here's the menu of merchant_id {merchant_id}:\n{items}"
+        elif intent.name == ORDER_STATUS:
+            reply = await asyncio.wait_for(asyncio.to_thread(_order_status_reply, wallet, is_merchant),
+                                           ORDER_STATUS_TIMEOUT_S)
+        elif intent.name == ITEM_PRICE:
+            match = match_menu_item(intent.arg, _local_menu(merchant_id))
+            if match is None:
+                # Unknown item: let the LLM search other merchants / suggest alternatives
+                intent_router.record_miss()
+                return None
+            reply = f"{match[0]} costs ${match[1]} at merchant_id {merchant_id}."
+        else:
+            intent_router.record_miss()
+            return None
+    except Exception:
+        intent_router.record_miss()
+        return None
+    intent_router.record_hit(intent)
+    return reply
+
 # Local MeTTa instance for querying merchant data.
 # METTA_INSTANCE: MeTTa | None = create_metta()
 # if METTA_INSTANCE is not None:
@@ -249,8 +359,19 @@ async def agent_details(ctx: Context):
     ctx.logger.info(f"Search Agent Address is {A3ACustomerAgent.address}")
 
 
+@A3ACustomerAgent.on_rest_get("/stats", A3AStatsResponse)
+async def agent_stats(ctx: Context) -> A3AStatsResponse:
+    return A3AStatsResponse(stats={
+        'llm': llm.stats(),
+        'compaction': compactor.stats(),
+        'intent_router': intent_router.stats(),
+        'query_cache': query_cache_stats(),
+    })
+
+
 # On_query handler for news_url request
 @a3acustomer_protocol.on_query(model=A3AContext, replies={A3AResponse})
+@tracer.handler('customer.query_handler')
 async def query_handler2(ctx: Context, sender: str, msg: A3AContext):
     ctx.logger.info(msg)
     wallet_address=''
@@ -259,25 +380,12 @@ async def query_handler2(ctx: Context, sender: str, msg: A3AContext):
                 
             ]
     # Determine merchant_id to scope this conversation
-    chosen_merchant_id = _select_merchant_id_from_context(msg.messages)
+    scoped_merchant_id = _select_merchant_id_from_context(msg.messages, default=None)
+    chosen_merchant_id = scoped_merchant_id or DEFAULT_MERCHANT_ID
     ctx.logger.info(f"[A2A Customer] chosen_merchant_id={chosen_merchant_id}")
 
-    # Always fetch the merchant's current menu from merchant agent to ground the model
-    try:
-        # Scope the menu query to a specific merchant_id so it reflects admin updates
-        menu_resp = await try_send_to_merchant(A3AMerchantMenuQuery(chosen_merchant_id))
-        menu_text = _safe_content(menu_resp)
-    except Exception:
-        menu_text = None
-
-    # Build a single system message as the FIRST message (ASI requires system first)
-    system_content = system_prompt
-    if menu_text:
-        system_content += f"\n\nMerchant menu (live):\n{menu_text}"
-    msgs = [
-                {"role": "system", "content": system_content},
-            ]
     is_merchant = False
+    turns = []
     for item in msg.messages:
         try:
             role = item.get('role') if isinstance(item, dict) else None
@@ -292,7 +400,7 @@ async def query_handler2(ctx: Context, sender: str, msg: A3AContext):
         elif role in ('user', 'assistant'):
             # Only pass valid OpenAI roles through to the LLM. Custom roles like 'agent'
             # are used for internal routing/scoping and must NOT be forwarded to the model.
-            msgs.append({
+            turns.append({
                 'role': role,
                 'content': content if isinstance(content, str) else str(content)
             })
@@ -303,8 +411,8 @@ async def query_handler2(ctx: Context, sender: str, msg: A3AContext):
     if wallet_address == '':
         await ctx.send(sender,A3AErrorPacket('Cannot find wallet address in this context!'))
         return
-    if is_merchant:
-        content = msgs[-1]['content']
+    if is_merchant and turns:
+        content = turns[-1]['content']
         if content.startswith('/'):
             content = content.removeprefix('/')
             resp:A3AResponse = await try_send_to_merchant(
@@ -317,12 +425,44 @@ async def query_handler2(ctx: Context, sender: str, msg: A3AContext):
             print(resp)
             await ctx.send(sender,A3AResponse(type='chat',content= resp.content))
             return
+    # Deterministic intents (menu, order status, item price) are answered locally without the LLM
+    if turns and turns[-1]['role'] == 'user':
+        fast_reply = await _fast_path_reply(turns[-1]['content'], scoped_merchant_id, wallet_address, is_merchant)
+        if fast_reply is not None:
+            await ctx.send(sender, A3AResponse(type='chat', content=fast_reply))
+            return
+
+    # Always fetch the merchant's current menu from merchant agent to ground the model
+    try:
+        # Scope the menu query to a specific merchant_id so it reflects admin updates
+        menu_resp = await try_send_to_merchant(A3AMerchantMenuQuery(chosen_merchant_id))
+        menu_text = _safe_content(menu_resp)
+    except Exception:
+        menu_text = None
+
+    # Build a single system message as the FIRST message (ASI requires system first)
+    system_content = system_prompt
+    if menu_text:
+        system_content += f"\n\nMerchant menu (live):\n{menu_text}"
+    msgs = [
+                {"role": "system", "content": system_content},
+            ]
+    # Keep the prompt bounded: older turns are folded into a cached summary note,
+    # only the last CONTEXT_KEEP_TURNS turns are forwarded verbatim
+    conversation_id = compactor.conversation_id(wallet_address, turns)
+    summary, recent_turns = await compactor.compact(conversation_id, turns, _summarize_turns)
+    if summary:
+        msgs[0]['content'] += f"\n\nEarlier conversation (summary):\n{summary}"
+    msgs.extend(recent_turns)
     # Do NOT append another system message; keep only the first system message per ASI API rules
     
     # msgs.extend(msg.messages)
+    # Menu version scopes cached LLM answers to the merchant state they were grounded on
+    menu_version = STORE.version(chosen_merchant_id)
     try:
       while True:
-        r = client.chat.completions.create(
+        r = await llm.chat(
+            menu_version=menu_version,
             model="asi1-mini",
             messages=msgs,
             max_tokens=2048,
@@ -339,7 +479,7 @@ async def query_handler2(ctx: Context, sender: str, msg: A3AContext):
             for tool in tool_calls:
                  
                  function_name = tool.function.name
-                 arguments = json.loads(tool.function.arguments)
+                 arguments = json.loads(tool.function.arguments or '{}')
                  if function_name == 'create_propose':
                     desc = arguments['desc']
                     chosen_merchant_id = arguments['merchant_id']
@@ -356,9 +496,11 @@ async def query_handler2(ctx: Context, sender: str, msg: A3AContext):
                     #         price = str(Decimal('0').quantize(Decimal('0.01')))
 
                     try:
-                        digest = real_upload_order(wallet_address,desc,price)
-                        # Create order (agent signs and emits OrderProposed)
-                        orderid, txhash = real_create_propose(digest, wallet_address)
+                        with tracer.span('lighthouse.upload_order_desc'):
+                            digest = real_upload_order(wallet_address,desc,price)
+                        # Create order (agent signs and emits OrderProposed); includes wait_for_transaction_receipt
+                        with tracer.span('chain.propose_order'):
+                            orderid, txhash = real_create_propose(digest, wallet_address)
                         # Get merchant payout wallet
                         mw_resp = await try_send_to_merchant(A3AMerchantWalletQuery(chosen_merchant_id))
                         merchant_wallet = _safe_content(mw_resp).strip()
@@ -372,8 +514,10 @@ async def query_handler2(ctx: Context, sender: str, msg: A3AContext):
                         # Ensure numeric price for propose_answer
                         price_float = float(str(price))
                         ctx.logger.info(f"Proposing answer: merchant_id={chosen_merchant_id}, seller_wallet={merchant_wallet}")
-                        _txhash_ans = real_answer_propose(orderid, price_float, merchant_wallet)
-                        transaction = real_confirm_order(orderid, wallet_address)
+                        with tracer.span('chain.propose_order_answer'):
+                            _txhash_ans = real_answer_propose(orderid, price_float, merchant_wallet)
+                        with tracer.span('chain.build_confirm_order'):
+                            transaction = real_confirm_order(orderid, wallet_address)
                     except Exception as e:
                         ctx.logger.exception('Order creation failed')
                         await ctx.send(sender, A3AErrorPacket(f"Order creation failed: {e}"))
@@ -391,12 +535,14 @@ async def query_handler2(ctx: Context, sender: str, msg: A3AContext):
                  else:
                     # message = arguments['message']
                     
-                    # Include merchant_id hint so the merchant LLM path is scoped correctly
+                    # Only the top-ranked merchants' menus for this query, one page at a time
+                    query_text = arguments.get('query') or (turns[-1]['content'] if turns else '')
+                    try:
+                        page = int(arguments.get('page') or 0)
+                    except (TypeError, ValueError):
+                        page = 0
                     resp:A3AResponse = await try_send_to_merchant(
-                        A3AContext(messages=[
-                            # {'role':'agent','content': f'merchant_id:{chosen_merchant_id}'},
-                            {'role':'list_menu','content':''}
-                        ])
+                        A3AMerchantListMenuQuery(query_text, page)
                     )
                     ctx.logger.info(f'From merchant agent:\n{resp}')
                     # ctx.logger.info("The agent tries to consult a merchant agent:")
@@ -0,0 +1,117 @@
+import re
+from collections import Counter
+from typing import NamedTuple
+
+# Rule-based fast path for deterministic customer intents.
+# "show menu", "what's my order status" and "price of X" can be answered straight
+# from the MeTTa menu or the on-chain order read path; everything else (and any
+# message too long to be a simple command) falls through to the LLM.
+
+
+class Intent(NamedTuple):
+    name: str
+    arg: str | None = None
+
+
+SHOW_MENU = 'show_menu'
+ORDER_STATUS = 'order_status'
+ITEM_PRICE = 'item_price'
+
+# Longer messages are treated as open-ended requests for the LLM
+MAX_ROUTED_WORDS = 10
+
+_PRICE_PATTERNS = [
+    re.compile(r"^(?:what(?:'s| is) the )?(?:price|cost) (?:of|for) (?:the |a |an )?(?P<item>.+?)\??$"),
+    re.compile(r"^how much (?:is|are|does|do|for) (?:the |a |an )?(?P<item>.+?)(?: cost)?\??$"),
+]
+_ORDER_STATUS_PATTERNS = [
+    re.compile(r"\b(?:status|track|tracking)\b.*\borders?\b"),
+    re.compile(r"\borders?\b.*\b(?:status|track|tracking)\b"),
+    re.compile(r"^(?:show |list |check )?(?:my )?orders?\??$"),
+    re.compile(r"\bwhere(?:'s| is) my orders?\b"),
+]
+_SHOW_MENU_PATTERNS = [
+    re.compile(r"^(?:show|see|list|view|get|display|send)(?: me)?(?: the| your)? menu\??$"),
+    re.compile(r"^(?:what(?:'s| is) on the menu|what do you have|what do you sell|menu)\??$"),
+    re.compile(r"^(?:can i|could i|may i) (?:see|have|get) (?:the |your )?menu\??$"),
+]
+
+
+def _normalize(text: str) -> str:
+    s = (text or '').strip().lower()
+    s = s.replace('’', "'")
+    s = re.sub(r"\s+", " ", s)
+    return s.rstrip('.! ')
+
+
+def _norm_item(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", (name or '').lower()).strip()
+
+
+# Arguments that refer to something said earlier ("how much is it?") name no menu item
+_VAGUE_ITEMS = frozenset({'it', 'this', 'that', 'these', 'those', 'they', 'them', 'one', 'ones', 'thing', 'things'})
+# Shorter item words are too ambiguous to look up on their own
+_MIN_ITEM_CHARS = 3
+
+
+def match_menu_item(name: str, menu) -> tuple[str, str] | None:
+    """Find the (item, price) in menu that `name` unambiguously refers to.
+
+    Exact (case/punctuation-insensitive) match wins; otherwise the one item whose name
+    contains all the requested words, or whose words all appear in the request. Pronouns,
+    very short names and requests matching several items return None (left to the LLM).
+    """
+    wanted = _norm_item(name)
+    tokens = set(wanted.split())
+    if not tokens or tokens <= _VAGUE_ITEMS or len(wanted) < _MIN_ITEM_CHARS:
+        return None
+    partial = []
+    for item, price in menu or []:
+        norm = _norm_item(item)
+        if norm == wanted:
+            return item, price
+        words = set(norm.split())
+        if words and (tokens <= words or words <= tokens):
+            partial.append((item, price))
+    return partial[0] if len(partial) == 1 else None
+
+
+class IntentRouter:
+    """Classify a user message into a deterministic intent, counting hits and misses."""
+
+    def __init__(self, max_words: int = MAX_ROUTED_WORDS):
+        self.max_words = max_words
+        self.hits: Counter = Counter()
+        self.misses = 0
+
+    def classify(self, text: str) -> Intent | None:
+        s = _normalize(text)
+        if not s or s.startswith('/') or len(s.split()) > self.max_words:
+            return None
+        for p in _ORDER_STATUS_PATTERNS:
+            if p.search(s):
+                return Intent(ORDER_STATUS)
+        for p in _SHOW_MENU_PATTERNS:
+            if p.search(s):
+                return Intent(SHOW_MENU)
+        for p in _PRICE_PATTERNS:
+            m = p.search(s)
+            if m and m.group('item').strip():
+                return Intent(ITEM_PRICE, m.group('item').strip())
+        return None
+
+    def record_hit(self, intent: Intent) -> None:
+        self.hits[intent.name] += 1
+
+    def record_miss(self) -> None:
+        self.misses += 1
+
+    def stats(self) -> dict:
+        total_hits = sum(self.hits.values())
+        total = total_hits + self.misses
+        return {
+            'hits': dict(self.hits),
+            'hit_total': total_hits,
+            'misses': self.misses,
+            'hit_rate': (total_hits / total) if total else 0.0,
+        }
@@ -0,0 +1,171 @@
+import asyncio
+import os
+
+import httpx
+from openai import AsyncOpenAI
+
+from agent.llm_cache import LLMResponseCache
+from agent.tracing import Tracer
+
+# Shared async LLM client layer for the customer and merchant agents.
+# Each agent process owns one AsyncLLMClient: a single pooled HTTP connection
+# set to the ASI:One endpoint plus a semaphore bounding concurrent completions,
+# so one slow conversation no longer blocks the agent's event loop.
+
+ASI_BASE_URL = 'https://api.asi1.ai/v1'
+DEFAULT_MODEL = 'asi1-mini'
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class AsyncLLMClient:
+    """Pooled AsyncOpenAI client with a per-agent concurrency limit.
+
+    - max_concurrency: completions allowed in flight at once; extra callers queue
+    - timeout: per-call deadline in seconds (covers queueing + the request)
+    - in_flight / queued: live counters exposed through stats()
+    - cache: optional LLMResponseCache consulted before each request
+    - tracer: optional Tracer; each call records an llm.chat span
+    """
+
+    def __init__(self,
+                 api_key: str,
+                 base_url: str = ASI_BASE_URL,
+                 max_concurrency: int = 4,
+                 timeout: float = 60.0,
+                 max_connections: int = 16,
+                 cache: LLMResponseCache | None = None,
+                 tracer: Tracer | None = None):
+        self.timeout = timeout
+        self.cache = cache
+        self.tracer = tracer
+        self.max_concurrency = max_concurrency
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=httpx.Timeout(timeout),
+        )
+        self.client = AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            http_client=self._http,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+
+    async def chat(self, timeout: float | None = None, menu_version: str | None = None, **kwargs):
+        """Run chat.completions.create under the concurrency limit.
+
+        Accepts the same keyword arguments as the OpenAI SDK; model defaults to
+        DEFAULT_MODEL. menu_version is folded into the cache key so menu edits
+        never serve stale answers. Raises asyncio.TimeoutError when the deadline expires.
+        """
+        kwargs.setdefault('model', DEFAULT_MODEL)
+        if self.tracer is None:
+            return await self._chat(timeout, menu_version, kwargs)
+        with self.tracer.span('llm.chat', model=kwargs['model']) as span:
+            return await self._chat(timeout, menu_version, kwargs, span)
+
+    async def _chat(self, timeout, menu_version, kwargs: dict, span=None):
+        cache_key = None
+        if self.cache is not None and self.cache.is_cacheable_request(kwargs.get('messages')):
+            cache_key = self.cache.make_key(menu_version=menu_version, **kwargs)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                if span is not None:
+                    span.set(cached=True)
+                return cached
+        deadline = timeout if timeout is not None else self.timeout
+        try:
+            r = await asyncio.wait_for(self._limited_create(kwargs), deadline)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise
+        if cache_key is not None:
+            self.cache.put(cache_key, r)
+        return r
+
+    async def _limited_create(self, kwargs: dict):
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+        try:
+            r = await self.client.chat.completions.create(**kwargs)
+            self.completed += 1
+            return r
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        stats = {
+            'in_flight': self.in_flight,
+            'queued': self.queued,
+            'max_concurrency': self.max_concurrency,
+            'completed': self.completed,
+            'failed': self.failed,
+            'timed_out': self.timed_out,
+        }
+        if self.cache is not None:
+            stats['cache'] = self.cache.stats()
+        return stats
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+def create_llm_client_from_env(side_effect_tools: tuple[str, ...] = (),
+                               tracer: Tracer | None = None) -> AsyncLLMClient:
+    """Build the agent's LLM client from environment settings.
+
+    API_ASI_KEY is required. Optional tuning:
+      LLM_MAX_CONCURRENCY (default 4), LLM_TIMEOUT_S (default 60),
+      LLM_MAX_CONNECTIONS (default 16)
+    Response cache (set LLM_CACHE_ENABLED=0 to disable):
+      LLM_CACHE_MAX_ENTRIES (default 512), LLM_CACHE_TTL_S (default 300),
+      LLM_CACHE_DIR (default llm_cache; empty string keeps the cache in memory only)
+    side_effect_tools names tool calls that must bypass the cache; tracer records llm.chat spans.
+    """
+    api_key = os.getenv('API_ASI_KEY')
+    if not api_key:
+        raise RuntimeError("Missing API_ASI_KEY in environment; set it in your .env file.")
+    cache = None
+    if os.getenv('LLM_CACHE_ENABLED', '1') not in ('0', 'false', 'False'):
+        cache = LLMResponseCache(
+            max_entries=_env_int('LLM_CACHE_MAX_ENTRIES', 512),
+            ttl=_env_float('LLM_CACHE_TTL_S', 300.0),
+            disk_dir=os.getenv('LLM_CACHE_DIR', 'llm_cache') or None,
+            side_effect_tools=side_effect_tools,
+        )
+    return AsyncLLMClient(
+        api_key=api_key,
+        max_concurrency=_env_int('LLM_MAX_CONCURRENCY', 4),
+        timeout=_env_float('LLM_TIMEOUT_S', 60.0),
+        max_connections=_env_int('LLM_MAX_CONNECTIONS', 16),
+        cache=cache,
+        tracer=tracer,
+    )
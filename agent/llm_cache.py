@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+# Exact-match cache for chat completions.
+# Keys hash (model, messages, tools, menu version, remaining params); entries live in
+# an in-memory LRU with a TTL, backed by an optional on-disk tier so identical
+# questions survive agent restarts. Turns that involve side-effecting tools
+# (e.g. create_propose) are never served from or written to the cache.
+
+
+def _plain(obj):
+    """Convert SDK objects (pydantic models) into plain JSON-serializable data."""
+    dump = getattr(obj, 'model_dump', None)
+    if callable(dump):
+        return dump(exclude_none=True)
+    if isinstance(obj, dict):
+        return {k: _plain(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_plain(v) for v in obj]
+    return obj
+
+
+def _tool_call_names(message) -> list[str]:
+    m = _plain(message)
+    if not isinstance(m, dict):
+        return []
+    names = []
+    for call in m.get('tool_calls') or []:
+        fn = (call or {}).get('function') or {}
+        if fn.get('name'):
+            names.append(fn['name'])
+    return names
+
+
+class LLMResponseCache:
+    """LRU + TTL cache of chat completions with an optional disk tier.
+
+    - max_entries: in-memory LRU capacity
+    - ttl: seconds an entry stays valid (memory and disk)
+    - disk_dir: directory for the persistent tier; None disables it
+    - side_effect_tools: tool names whose calls must never be cached
+    """
+
+    def __init__(self,
+                 max_entries: int = 512,
+                 ttl: float = 300.0,
+                 disk_dir: str | None = None,
+                 side_effect_tools: Iterable[str] = ()):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.side_effect_tools = set(side_effect_tools)
+        self._entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self._puts = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def make_key(self, model: str, messages, tools=None, menu_version: str | None = None, **params) -> str:
+        payload = {
+            'model': model,
+            'messages': _plain(messages or []),
+            'tools': _plain(tools or []),
+            'menu_version': menu_version or '',
+            'params': _plain(params),
+        }
+        raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def is_cacheable_request(self, messages) -> bool:
+        """False when the conversation already carries a side-effecting tool call."""
+        for m in messages or []:
+            if self.side_effect_tools.intersection(_tool_call_names(m)):
+                return False
+        return True
+
+    def is_cacheable_response(self, response) -> bool:
+        try:
+            for choice in response.choices:
+                if self.side_effect_tools.intersection(_tool_call_names(choice.message)):
+                    return False
+        except Exception:
+            return False
+        return True
+
+    def get(self, key: str):
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            created, response = entry
+            if now - created <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return response
+            del self._entries[key]
+        response = self._disk_get(key, now)
+        if response is not None:
+            self.disk_hits += 1
+            return response
+        self.misses += 1
+        return None
+
+    def put(self, key: str, response) -> bool:
+        if not self.is_cacheable_response(response):
+            self.skipped += 1
+            return False
+        now = time.time()
+        self._remember(key, now, response)
+        self._disk_put(key, now, response)
+        self._puts += 1
+        if self._puts % 64 == 0:
+            self.prune_disk(now)
+        return True
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'skipped': self.skipped,
+            'hit_rate': ((self.hits + self.disk_hits) / lookups) if lookups else 0.0,
+        }
+
+    def _remember(self, key: str, created: float, response) -> None:
+        self._entries[key] = (created, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # Disk tier: one JSON file per key, written atomically via temp file + rename
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _disk_get(self, key: str, now: float):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                obj = json.load(f)
+        except (OSError, ValueError):
+            return None
+        created = float(obj.get('created', 0))
+        if now - created > self.ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        try:
+            response = _completion_from_dict(obj['response'])
+        except Exception:
+            return None
+        self._remember(key, created, response)
+        return response
+
+    def prune_disk(self, now: float | None = None) -> int:
+        """Delete expired disk entries; returns how many files were removed."""
+        if not self.disk_dir:
+            return 0
+        now = time.time() if now is None else now
+        removed = 0
+        try:
+            names = os.listdir(self.disk_dir)
+        except OSError:
+            return 0
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.disk_dir, name)
+            try:
+                if now - os.path.getmtime(path) > self.ttl:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def _disk_put(self, key: str, created: float, response) -> None:
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'created': created, 'response': _plain(response)}, f)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+
+def _completion_from_dict(data: dict):
+    # Imported lazily so the cache itself stays usable without the OpenAI SDK
+    from openai.types.chat import ChatCompletion
+    return ChatCompletion.model_validate(data)
@@ -0,0 +1,81 @@
+import json
+import os
+from typing import Callable, List
+
+from metta.catalog import CatalogSnapshot
+from metta.indexer import search_merchants
+
+# The merchant agent's reply to the customer's list_menu (consult_merchant) request.
+# Only the merchants ranked for the customer's query are listed, one page at a time,
+# and the reply is bounded in items per merchant and characters overall so the
+# customer's LLM context stays small. Menu blocks come from the catalog snapshot.
+
+LIST_MENU_MAX_PAGE_SIZE = int(os.getenv('LIST_MENU_MAX_PAGE_SIZE', '5'))
+LIST_MENU_MAX_ITEMS = int(os.getenv('LIST_MENU_MAX_ITEMS', '20'))
+LIST_MENU_MAX_CHARS = int(os.getenv('LIST_MENU_MAX_CHARS', '4000'))
+
+
+def parse_list_menu_request(content) -> tuple[str, int, int]:
+    """Decode a list_menu payload ({"query","page","page_size"}); tolerate legacy empty content."""
+    query_text, page, page_size = '', 0, 3
+    try:
+        payload = json.loads(content) if isinstance(content, str) and content.strip() else {}
+        query_text = str(payload.get('query') or '')
+        page = max(0, int(payload.get('page') or 0))
+        page_size = max(1, int(payload.get('page_size') or 3))
+    except Exception:
+        pass
+    return query_text, page, min(page_size, LIST_MENU_MAX_PAGE_SIZE)
+
+
+def format_menu_block(merchant_id: str, menu) -> str:
+    lines = [f"The following are from merchant_id: {merchant_id}"]
+    if not menu:
+        lines.append("(no items yet)")
+    for i, p in (menu or [])[:LIST_MENU_MAX_ITEMS]:
+        lines.append(f"- {i}: ${p}")
+    if menu and len(menu) > LIST_MENU_MAX_ITEMS:
+        lines.append(f"(+{len(menu) - LIST_MENU_MAX_ITEMS} more items)")
+    return "\n".join(lines)
+
+
+def render_menu_page(catalog: CatalogSnapshot, ranked: List[str], page: int, page_size: int) -> str:
+    """Join the catalog's preformatted blocks for ranked[page*page_size:...], capped at LIST_MENU_MAX_CHARS."""
+    if not ranked:
+        return 'The menu is empty now!'
+    start = page * page_size
+    selected = ranked[start:start + page_size]
+    if not selected:
+        return f'No more merchants (page {page} is past the last page).'
+    blocks = []
+    used = 0
+    for mid in selected:
+        block = catalog.block(mid)
+        if blocks and used + len(block) > LIST_MENU_MAX_CHARS:
+            break
+        blocks.append(block[:LIST_MENU_MAX_CHARS])
+        used += len(block)
+    text = "\n\n".join(blocks)
+    if len(ranked) > start + len(blocks):
+        text += f"\n\n(more merchants available: call consult_merchant with page={page + 1})"
+    return text
+
+
+def list_menus(catalog: CatalogSnapshot, query_text: str, page: int, page_size: int,
+               search: Callable[..., List[dict]] = search_merchants) -> str:
+    """Menus of the merchants ranked page*page_size..(page+1)*page_size for the query.
+
+    Merchants are ranked with `search` (search_merchants); an empty query (or no keyword
+    hits) falls back to merchant id order, whose pages are prerendered in the catalog
+    snapshot. Menu blocks always come from the snapshot, so no merchant is hydrated here.
+    """
+    ranked: List[str] = []
+    if query_text:
+        try:
+            top_k = (page + 1) * page_size + 1
+            ranked = [str(r['merchant_id']) for r in search(query_text, top_k=top_k)]
+        except Exception:
+            ranked = []
+    if ranked:
+        return render_menu_page(catalog, ranked, page, page_size)
+    return catalog.page(page, page_size, lambda order, p, size: render_menu_page(catalog, order, p, size))
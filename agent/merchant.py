@@ -3,7 +3,6 @@ from uuid import uuid4
 from storage.lighthouse import upload_order_desc,CID2Digest
 from uagents.query import send_sync_message,query
 
-from openai import OpenAI
 from uagents import Context, Protocol, Agent
 from uagents_core.contrib.protocols.chat import (
     ChatAcknowledgement,
@@ -18,61 +17,27 @@ from dotenv import load_dotenv
 from hyperon import MeTTa
 from metta.utils import (
     create_metta,
-    add_menu_item,
-    get_menu_for_merchant,
-    update_item_price,
-    remove_menu_item,
-    set_merchant_description,
-    set_open_hours,
-    set_location,
-    set_item_description,
-    set_merchant_wallet,
     get_merchant_wallet,
     get_merchant_description,
     get_open_hours,
     get_location,
     _normalize_item_name,
 )
-from metta.storage import (
-    merchant_file,
-    load_merchant_into,
-    append_menu_item as storage_append_menu_item,
-    append_price as storage_append_price,
-    append_remove_item as storage_append_remove,
-    append_wallet as storage_append_wallet,
-    append_desc as storage_append_desc,
-    append_hours as storage_append_hours,
-    append_location as storage_append_location,
-    append_item_desc as storage_append_item_desc,
-)
+from metta.storage import storage_backend
+from metta.indexer import refresh_index, index_store
+from metta.registry import MerchantSpaceRegistry
+from metta.catalog import CatalogSnapshot
+from metta.query_cache import query_cache_stats
 from blockchain.merchant_nft import get_wallet_for_merchant_id
+from agent.llm import create_llm_client_from_env
+from agent.tracing import Tracer
+from agent.menu_listing import format_menu_block, list_menus, parse_list_menu_request
 
-# Global MeTTa instance for merchant knowledge (lazy, NFT-gated via admin API)
-METTA_INSTANCE: MeTTa | None = None
-
-
-def _rewrite_wallet_singleton(file_path: str, merchant_label: str, wallet: str) -> None:
-    """Ensure only a single merchant-wallet fact exists for this merchant in storage.
+# Where merchant facts are persisted (METTA_STORAGE_BACKEND: .metta files or SQLite)
+STORE = storage_backend()
 
-    This rewrites the .metta file by removing all existing (merchant-wallet <id> "...")
-    lines for the given merchant_label and appending exactly one with the new wallet.
-    """
-    try:
-        # Read all lines
-        with open(file_path, 'r') as f:
-            lines = f.readlines()
-        # Filter out existing wallet lines for this merchant
-        prefix = f"(merchant-wallet {merchant_label} "
-        filtered = [ln for ln in lines if not ln.strip().startswith(prefix)]
-        # Append the new single wallet line
-        filtered.append(f'(merchant-wallet {merchant_label} "{wallet}")\n')
-        # Write back
-        with open(file_path, 'w') as f:
-            f.writelines(filtered)
-    except Exception:
-        # Non-fatal: if rewrite fails, we still set wallet in MeTTa and appended to storage
-        # downstream queries will prefer the in-memory value; persistence will be cleaned up later
-        pass
+# One lazily created MeTTa space per merchant (NFT-gated via admin API), LRU-evicted when idle
+SPACES = MerchantSpaceRegistry(create_metta, backend=STORE)
 
 
 def _normalize_admin_command(text: str) -> str:
@@ -124,29 +89,57 @@ def _normalize_admin_command(text: str) -> str:
     # Fallback: no mapping; return original without leading slash
     return s
 
-def _ensure_metta_for_admin() -> MeTTa:
-    """Create the MeTTa instance on-demand for admin-only mutations.
+def _ensure_metta_for_read(merchant_label: str) -> MeTTa:
+    """Return this merchant's own MeTTa space, hydrated from storage.
 
-    Admin access is already NFT-gated at the API layer (only role='merchant' can
-    send agent-role messages). We avoid creating any MeTTa state unless an admin
-    mutation is performed.
+    Each merchant has a separate space, so queries only touch that merchant's atoms.
+    Hydration is incremental: only lines appended since the last call are ingested,
+    and a rewritten file is reloaded once instead of duplicating atoms.
     """
-    global METTA_INSTANCE
-    if METTA_INSTANCE is None:
-        METTA_INSTANCE = create_metta()
-    return METTA_INSTANCE
+    return SPACES.get(merchant_label)
 
-def _ensure_metta_for_read(merchant_label: str) -> MeTTa:
-    """Ensure a MeTTa instance exists and is hydrated from storage for this merchant."""
-    global METTA_INSTANCE
-    if METTA_INSTANCE is None:
-        METTA_INSTANCE = create_metta()
-    # Load persisted facts (idempotent)
+
+def _menu_for(merchant_label: str) -> list:
+    """(item, price) pairs from the merchant's materialized menu; no per-item MeTTa queries."""
+    return SPACES.menu(merchant_label).menu()
+
+
+def _list_menus(query_text: str, page: int, page_size: int) -> str:
+    """Top-ranked merchants' menus for the query, one bounded page (see agent.menu_listing)."""
+    return list_menus(CATALOG, query_text, page, page_size)
+
+
+# Prebuilt menus/blocks for list_menu; refreshed per merchant on admin mutations
+CATALOG = CatalogSnapshot(format_menu_block, backend=STORE)
+
+
+def _apply_bulk_import(merchant_label: str, content) -> dict:
+    """Persist a validated batch of menu items as one record, then refresh MeTTa, catalog and index once."""
     try:
-        load_merchant_into(METTA_INSTANCE, merchant_label)
+        payload = json.loads(content) if isinstance(content, str) else {}
+        items = [
+            {k: str(it.get(k) or '') for k in ('slug', 'name', 'price', 'desc')}
+            for it in payload.get('items') or []
+            if isinstance(it, dict)
+        ]
+        final = bool(payload.get('final', True))
     except Exception:
+        return {'merchant_id': merchant_label, 'imported': 0, 'error': 'invalid bulk_import payload'}
+    items = [it for it in items if it['slug'] and it['name'] and it['price']]
+    imported = STORE.add_menu_items(merchant_label, items)
+    try:
+        STORE.maybe_compact(merchant_label)
+    except OSError:
         pass
-    return METTA_INSTANCE
+    CATALOG.refresh(merchant_label, _menu_for(merchant_label))
+    if final:
+        # Re-index this merchant once for the whole import
+        try:
+            refresh_index(merchant_ids=[merchant_label])
+        except Exception:
+            pass
+    return {'merchant_id': merchant_label, 'imported': imported, 'menu_items': len(_menu_for(merchant_label))}
+
 from blockchain.order_contract import OrderContractManager
 
 from agent.contract import get_erc20_abi,get_contract_abi
@@ -230,15 +223,11 @@ create_propose = {
 }
 
 
-_asi_api_key = os.getenv('API_ASI_KEY')
-if not _asi_api_key:
-    raise RuntimeError("Missing API_ASI_KEY in environment; set it in your .env file.")
+# Span recorder for this agent; parents come from the caller's A3AContext.trace
+tracer = Tracer('merchant')
 
-client = OpenAI(
-    # By default, we are using the ASI:One LLM endpoint and model
-    base_url='https://api.asi1.ai/v1',
-    api_key=_asi_api_key,
-)
+# Pooled async client for the ASI:One LLM endpoint; bounded by LLM_MAX_CONCURRENCY
+llm = create_llm_client_from_env(tracer=tracer)
   
 A3AMerchantAgent = Agent(
     name="A2A Merchant Agent",
@@ -261,8 +250,20 @@ async def agent_details(ctx: Context):
     # Do not create or seed MeTTa here. MeTTa is created only when an admin mutation occurs.
 
 
+@A3AMerchantAgent.on_rest_get("/stats", A3AStatsResponse)
+async def agent_stats(ctx: Context) -> A3AStatsResponse:
+    return A3AStatsResponse(stats={
+        'llm': llm.stats(),
+        'spaces': SPACES.stats(),
+        'catalog': CATALOG.stats(),
+        'search_index': index_store().stats(),
+        'query_cache': query_cache_stats(),
+    })
+
+
 # On_query handler for news_url request
 @a3a_protocol.on_query(model=A3AContext, replies={A3AResponse})
+@tracer.handler('merchant.query_handler')
 async def query_handler(ctx: Context, sender: str, msg: A3AContext):
     # Merchant identity for scoping MeTTa entries; default fallback name
     merchant_label = "TestPizzaAgent"
@@ -296,35 +297,29 @@ async def query_handler(ctx: Context, sender: str, msg: A3AContext):
         await ctx.send(sender, A3AWalletResponse(wallet))
         return
     if last_role == 'query_menu':
-        metta_ro = _ensure_metta_for_read(merchant_label)
-        menu = get_menu_for_merchant(metta_ro, merchant_label)
+        menu = _menu_for(merchant_label)
         menu_lines = "\n".join([f"- {i}: ${p}" for i, p in (menu or [])]) if menu else "(no items yet)"
         await ctx.send(sender, A3AMenuResponse(menu_lines))
         return
     if last_role == 'list_menu':
-        try:
-            with open('metta_store/index.json') as f:
-                indexs = json.load(f)['index']
-        except Exception as e:
-            await ctx.send(sender, A3AMenuResponse('The menu is empty now!'))
-            return
-        menu_lines = ''
-        for k,v in indexs.items():
-            metta_ro = _ensure_metta_for_read(k)
-            menu = get_menu_for_merchant(metta_ro, k)
-            menu_lines+='\nThe following are from merchant_id: '+k+'\n'
-            menu_lines+= "\n".join([f"- {i}: ${p}" for i, p in (menu or [])]) if menu else "(no items yet)"
-        print(menu_lines)
-        await ctx.send(sender, A3AMenuResponse(menu_lines))
+        #customer side list menu: only the top-ranked merchants for the query, one page at a time
+        query_text, page, page_size = parse_list_menu_request(msg.messages[-1].get('content'))
+        menu_lines = _list_menus(query_text, page, page_size)
+        await ctx.send(sender, A3AMenuResponse(menu_lines, version=str(CATALOG.version)))
+        return
+    if last_role == 'bulk_import':
+        # Batch menu import (rows validated by the API): one storage record, one catalog/index refresh
+        reply = _apply_bulk_import(merchant_label, msg.messages[-1].get('content'))
+        await ctx.send(sender, A3AResponse(type='bulk_import', content=json.dumps(reply),
+                                           version=str(CATALOG.version)))
         return
-        #customer side list menu
 
     wallet_address = ''
     # Track whether this request performed an admin action (not just a merchant_id hint)
     admin_action_present = False
+    force_compact = False
     # Precompute menu based on current merchant_label
-    metta_ro = _ensure_metta_for_read(merchant_label)
-    menu = get_menu_for_merchant(metta_ro, merchant_label)
+    menu = _menu_for(merchant_label)
     new_system_prompt = system_prompt
     if menu:
         new_system_prompt += "\n\nAvailable Menu (via MeTTa):\n" + "\n".join([f"- {i}: ${p}" for i, p in menu])
@@ -359,107 +354,83 @@ async def query_handler(ctx: Context, sender: str, msg: A3AContext):
             if content.startswith('merchant_id:'):
                 try:
                     merchant_label = content.split(':', 1)[1].strip() or merchant_label
-                    menu = get_menu_for_merchant(METTA_INSTANCE, merchant_label) if METTA_INSTANCE else []
+                    menu = _menu_for(merchant_label)
                 except Exception:
                     ctx.logger.warning("Failed to apply merchant_id hint")
                 continue
             # For admin mutations, only keep the last command for this turn
             last_admin_content = _normalize_admin_command(content)
 
-    # Apply only the latest admin command once per request
+    # Apply only the latest admin command once per request.
+    # Mutations are persisted first, then projected into MeTTa by tailing the merchant file,
+    # so storage stays the single source of truth and atoms are never loaded twice.
     if last_admin_content:
         print('is last time admin:')
-    
-        metta = _ensure_metta_for_admin()
         content = last_admin_content
         try:
             if content.startswith('set_wallet:'):
                 wallet = content.split(':',1)[1].strip()
-                set_merchant_wallet(metta, merchant_label, wallet)
-                try:
-                    mf = merchant_file(merchant_label)
-                    storage_append_wallet(mf, merchant_label, wallet)
-                    # Ensure only one wallet entry remains for this merchant in the file
-                    _rewrite_wallet_singleton(mf, merchant_label, wallet)
-                except Exception:
-                    pass
+                STORE.set_wallet(merchant_label, wallet)
+                # Ensure only one wallet entry remains for this merchant in the file
+                force_compact = True
                 admin_action_present = True
             elif content.startswith('add_item:'):
                 _, rest = content.split(':',1)
                 name, price = [s.strip() for s in rest.split(':',1)]
-                add_menu_item(metta, merchant_label, name, price)
                 # Persist: menu + item-display + price
-                try:
-                    slug = _normalize_item_name(name)
-                    storage_append_menu_item(merchant_file(merchant_label), merchant_label, slug, name, price)
-                except Exception:
-                    pass
+                slug = _normalize_item_name(name)
+                STORE.add_menu_item(merchant_label, slug, name, price)
                 admin_action_present = True
             elif content.startswith('update_price:'):
                 _, rest = content.split(':',1)
                 name, price = [s.strip() for s in rest.split(':',1)]
-                update_item_price(metta, name, price)
-                try:
-                    slug = _normalize_item_name(name)
-                    storage_append_price(merchant_file(merchant_label), slug, price)
-                except Exception:
-                    pass
+                STORE.set_price(merchant_label, _normalize_item_name(name), price)
                 admin_action_present = True
             elif content.startswith('remove_item:'):
                 name = content.split(':',1)[1].strip()
-                remove_menu_item(metta, merchant_label, name)
-                try:
-                    slug = _normalize_item_name(name)
-                    storage_append_remove(merchant_file(merchant_label), merchant_label, slug)
-                except Exception:
-                    pass
+                STORE.remove_item(merchant_label, _normalize_item_name(name))
                 admin_action_present = True
             elif content.startswith('set_desc:'):
                 desc = content.split(':',1)[1].strip()
-                set_merchant_description(metta, merchant_label, desc)
-                try:
-                    storage_append_desc(merchant_file(merchant_label), merchant_label, desc)
-                except Exception:
-                    pass
+                STORE.set_desc(merchant_label, desc)
                 admin_action_present = True
             elif content.startswith('set_hours:'):
                 hours = content.split(':',1)[1].strip()
-                set_open_hours(metta, merchant_label, hours)
-                try:
-                    storage_append_hours(merchant_file(merchant_label), merchant_label, hours)
-                except Exception:
-                    pass
+                STORE.set_hours(merchant_label, hours)
                 admin_action_present = True
             elif content.startswith('set_location:'):
                 loc = content.split(':',1)[1].strip()
-                set_location(metta, merchant_label, loc)
-                try:
-                    storage_append_location(merchant_file(merchant_label), merchant_label, loc)
-                except Exception:
-                    pass
+                STORE.set_location(merchant_label, loc)
                 admin_action_present = True
             elif content.startswith('set_item_desc:'):
                 _, rest = content.split(':',1)
                 name, desc = [s.strip() for s in rest.split(':',1)]
-                set_item_description(metta, name, desc)
-                try:
-                    slug = _normalize_item_name(name)
-                    storage_append_item_desc(merchant_file(merchant_label), slug, desc)
-                except Exception:
-                    pass
+                STORE.set_item_desc(merchant_label, _normalize_item_name(name), desc)
                 admin_action_present = True
         except Exception as e:
             ctx.logger.warning(f"Failed to apply admin command '{content}': {e}")
+        if admin_action_present:
+            # Keep load/index time proportional to the catalog, not the edit history
+            try:
+                if force_compact:
+                    STORE.compact(merchant_label)
+                else:
+                    STORE.maybe_compact(merchant_label)
+            except OSError as e:
+                ctx.logger.warning(f"Compaction failed for merchant {merchant_label}: {e}")
+            # Hydrates the merchant's space and re-renders only its catalog entry
+            CATALOG.refresh(merchant_label, _menu_for(merchant_label))
 
     print(msgs)
     # If this is an admin-only update (no user messages), acknowledge deterministically without calling the LLM
     if admin_action_present and len(msgs) == 1:
         try:
-            updated_menu = get_menu_for_merchant(METTA_INSTANCE, merchant_label) if METTA_INSTANCE else []
+            metta_ro = _ensure_metta_for_read(merchant_label)
+            updated_menu = _menu_for(merchant_label)
             menu_lines = "\n".join([f"- {i}: ${p}" for i, p in updated_menu]) if updated_menu else "(no items yet)"
-            desc = get_merchant_description(METTA_INSTANCE, merchant_label) if METTA_INSTANCE else None
-            hours = get_open_hours(METTA_INSTANCE, merchant_label) if METTA_INSTANCE else None
-            loc = get_location(METTA_INSTANCE, merchant_label) if METTA_INSTANCE else None
+            desc = get_merchant_description(metta_ro, merchant_label)
+            hours = get_open_hours(metta_ro, merchant_label)
+            loc = get_location(metta_ro, merchant_label)
             extras = []
             if desc:
                 extras.append(f"Description: {desc}")
@@ -479,7 +450,8 @@ async def query_handler(ctx: Context, sender: str, msg: A3AContext):
             # fall through to model path if something unexpected happens
     try:
         while True:
-            r = client.chat.completions.create(
+            r = await llm.chat(
+                menu_version=STORE.version(merchant_label),
                 model="asi1-mini",
                 messages=msgs,
                 max_tokens=2048,
@@ -496,7 +468,7 @@ async def query_handler(ctx: Context, sender: str, msg: A3AContext):
         ctx.logger.exception('Error querying model')
         # Fallback: build a simple response from the known menu to avoid 500s and help the user proceed
         try:
-            fallback_menu = get_menu_for_merchant(METTA_INSTANCE, merchant_label) if METTA_INSTANCE else []
+            fallback_menu = _menu_for(merchant_label)
             if fallback_menu:
                 items = "\n".join([f"- {i}: ${p}" for i, p in fallback_menu])
                 fallback_text = (
@@ -24,10 +24,19 @@ class A3AMessage(TypedDict, total = False):
 
 class A3AContext(Model):
     messages:list[A3AMessage]
+    # Trace context ({"trace_id", "span_id"}) propagated across hops for latency tracing
+    trace:dict | None = None
 
 class A3AResponse(Model):
     type:str
     content:str | A3ACustomerOrderResponse
+    trace:dict | None = None
+    # Version stamp of the data the content was rendered from (e.g. the catalog snapshot)
+    version:str | None = None
+
+class A3AStatsResponse(Model):
+    # Runtime counters exposed by an agent's GET /stats endpoint
+    stats:dict
 
 def A3AWalletPacket(address:str):
     return {'role':'wallet','content':address}
@@ -60,9 +69,30 @@ def A3AMerchantMenuQuery(merchant_id: str | None = None):
         msgs.append(A3AMessage(role='agent', content=f'merchant_id:{merchant_id}'))
     msgs.append(A3AMessage(role='query_menu', content=''))
     return A3AContext(messages=msgs)
-def A3AMenuResponse(menu_lines:str):
+def A3AMerchantListMenuQuery(query: str = '', page: int = 0, page_size: int = 3):
+    """Build a query for the menus of the merchants most relevant to `query`.
+
+    Results are ranked by merchant search and paginated: page N returns merchants
+    [N*page_size, (N+1)*page_size). An empty query lists merchants in id order.
+    """
+    payload = {'query': query or '', 'page': max(0, int(page)), 'page_size': max(1, int(page_size))}
+    return A3AContext(messages=[A3AMessage(role='list_menu', content=json.dumps(payload))])
+
+def A3AMerchantBulkImport(items: list, merchant_id: str | None = None, final: bool = True):
+    """Build a batch menu import for the merchant agent.
+
+    `items` are validated rows ({"slug","name","price","desc"}); the agent persists them as
+    one record. Large imports are sent in chunks and only the `final` one refreshes the index.
+    """
+    msgs: list[A3AMessage] = []
+    if merchant_id:
+        msgs.append(A3AMessage(role='agent', content=f'merchant_id:{merchant_id}'))
+    msgs.append(A3AMessage(role='bulk_import', content=json.dumps({'items': items, 'final': bool(final)})))
+    return A3AContext(messages=msgs)
+
+def A3AMenuResponse(menu_lines:str, version:str | None = None):
     # menu_lines is a pre-formatted string like "- item: $price\n- item2: $price2"
-    return A3AResponse(type='menu', content=menu_lines)
+    return A3AResponse(type='menu', content=menu_lines, version=version)
 def A3AProposeCtx(desc:str,price:str,cid:str,offerId:str,wallet:str):
     return A3AContext(messages=[A3AMessage(role='answer_order',content= A3ACustomerProposeRequest(desc=desc,
                                                           price=price,
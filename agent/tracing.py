@@ -0,0 +1,181 @@
+import contextvars
+import functools
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+# Lightweight cross-hop latency tracing: API -> customer agent -> merchant agent -> LLM -> chain.
+# A trace context ({"trace_id", "span_id"}) travels in A3AContext.trace; every hop records
+# spans into an in-memory ring buffer and appends them to TRACE_DIR/<service>.jsonl so the
+# API can assemble one request's waterfall across processes (/api/debug/traces/{id}).
+
+TRACE_DIR = os.getenv('TRACE_DIR', 'traces')
+TRACE_MAX_BYTES = int(os.getenv('TRACE_MAX_BYTES', str(5 * 1024 * 1024)))
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar('a3a_current_span', default=None)
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class Span:
+    def __init__(self, service: str, name: str, trace_id: str, parent_id: str | None, attrs: dict):
+        self.service = service
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id()
+        self.parent_id = parent_id
+        self.attrs = dict(attrs)
+        self.error: str | None = None
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.duration_ms: float | None = None
+
+    def context(self) -> dict:
+        """Trace context to propagate to the next hop."""
+        return {'trace_id': self.trace_id, 'span_id': self.span_id}
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def finish(self) -> None:
+        self.duration_ms = round((time.perf_counter() - self._t0) * 1000, 3)
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'service': self.service,
+            'name': self.name,
+            'start': self.start,
+            'duration_ms': self.duration_ms,
+            'attrs': self.attrs,
+            'error': self.error,
+        }
+
+
+def current_context() -> dict | None:
+    """Trace context of the innermost active span, if any."""
+    span = _current_span.get()
+    return span.context() if span is not None else None
+
+
+class Tracer:
+    """Records spans for one service (process) into a ring buffer and a JSONL file."""
+
+    def __init__(self, service: str, trace_dir: str | None = TRACE_DIR, ring_size: int = 2048):
+        self.service = service
+        self.trace_dir = trace_dir
+        self.ring: deque = deque(maxlen=ring_size)
+        self._lock = threading.Lock()
+        if trace_dir:
+            os.makedirs(trace_dir, exist_ok=True)
+
+    @contextmanager
+    def span(self, name: str, parent: dict | None = None, **attrs):
+        """Time a block. Parent defaults to the active span; a new trace starts otherwise."""
+        if parent is None:
+            parent = current_context()
+        trace_id = (parent or {}).get('trace_id') or _new_id()
+        s = Span(self.service, name, trace_id, (parent or {}).get('span_id'), attrs)
+        token = _current_span.set(s)
+        try:
+            yield s
+        except BaseException as e:
+            s.error = repr(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            s.finish()
+            self.record(s)
+
+    def handler(self, name: str):
+        """Decorator for uAgents handlers: opens a span parented on msg.trace."""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(ctx, sender, msg, *args, **kwargs):
+                parent = getattr(msg, 'trace', None) or None
+                with self.span(name, parent, sender=sender):
+                    return await func(ctx, sender, msg, *args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, span: Span) -> None:
+        data = span.to_dict()
+        self.ring.append(data)
+        if not self.trace_dir:
+            return
+        path = os.path.join(self.trace_dir, f'{self.service}.jsonl')
+        line = json.dumps(data, default=str) + '\n'
+        with self._lock:
+            try:
+                if os.path.exists(path) and os.path.getsize(path) > TRACE_MAX_BYTES:
+                    os.replace(path, path + '.1')
+                with open(path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+            except OSError:
+                # Tracing must never break the request path
+                pass
+
+    def spans_for(self, trace_id: str) -> list[dict]:
+        return [s for s in list(self.ring) if s.get('trace_id') == trace_id]
+
+
+def load_trace(trace_id: str, trace_dir: str = TRACE_DIR, extra: list[dict] | None = None) -> list[dict]:
+    """Collect all spans of one trace from every service's span files (deduplicated)."""
+    spans: dict[str, dict] = {}
+    for s in extra or []:
+        spans[s['span_id']] = s
+    for path in sorted(glob.glob(os.path.join(trace_dir, '*.jsonl*'))):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if trace_id not in line:
+                        continue
+                    try:
+                        s = json.loads(line)
+                    except ValueError:
+                        continue
+                    if s.get('trace_id') == trace_id:
+                        spans[s['span_id']] = s
+        except OSError:
+            continue
+    return sorted(spans.values(), key=lambda s: s.get('start') or 0)
+
+
+def build_waterfall(spans: list[dict]) -> dict:
+    """Order spans parent-first and compute offsets/depth relative to the trace start."""
+    if not spans:
+        return {'duration_ms': 0, 'spans': [], 'waterfall': []}
+    t0 = min(s['start'] for s in spans)
+    end = max(s['start'] + (s.get('duration_ms') or 0) / 1000 for s in spans)
+    by_id = {s['span_id']: s for s in spans}
+    children: dict[str | None, list[dict]] = {}
+    for s in spans:
+        parent = s.get('parent_id') if s.get('parent_id') in by_id else None
+        children.setdefault(parent, []).append(s)
+
+    ordered = []
+
+    def walk(parent_id, depth):
+        for s in sorted(children.get(parent_id, []), key=lambda x: x['start']):
+            row = dict(s)
+            row['depth'] = depth
+            row['offset_ms'] = round((s['start'] - t0) * 1000, 3)
+            ordered.append(row)
+            walk(s['span_id'], depth + 1)
+
+    walk(None, 0)
+    lines = [
+        f"{r['offset_ms']:>10.1f}ms {(r.get('duration_ms') or 0):>10.1f}ms  "
+        f"{'  ' * r['depth']}{r['service']}:{r['name']}{'  !' + r['error'] if r.get('error') else ''}"
+        for r in ordered
+    ]
+    return {'duration_ms': round((end - t0) * 1000, 3), 'spans': ordered, 'waterfall': lines}
@@ -6,6 +6,7 @@ from uagents.query import send_sync_message,query
 from agent.protocol.a3acontext import *
 import json,web3
 from .auth_dependencies import verify_jwt_token
+from .debug import tracer
 from eth_utils import to_checksum_address
 from api.blockchain import *
 from storage.lighthouse import *
@@ -60,7 +61,12 @@ async def send_chat_message(
     if request.merchantId:
         final_msg.append(A3AMessage(role='agent', content=f"merchant_id:{request.merchantId}"))
     # final_msg.extend(msgs)
-    resp = await send_sync_message(custom_agent_address,A3AContext(messages=final_msg),response_type=A3AResponse)
+    with tracer.span('api.chat_messages', role=current_user['role']) as root:
+        with tracer.span('api.send_sync_message') as span:
+            resp = await send_sync_message(custom_agent_address,A3AContext(messages=final_msg,trace=span.context()),response_type=A3AResponse)
+    # Hand the trace id back so the client can fetch /api/debug/traces/{trace_id}
+    if isinstance(resp, A3AResponse):
+        resp.trace = {'trace_id': root.trace_id}
     # async def event_stream():
     #     async for chunk in send_message(custom_agent_address, A3AContext(messages=msgs)):
     #         yield f"data: {json.dumps(chunk)}\n\n"
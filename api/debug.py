@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, HTTPException
+from .auth_dependencies import verify_jwt_token
+from agent.tracing import Tracer, TRACE_DIR, load_trace, build_waterfall
+
+router = APIRouter(prefix="/api/debug", tags=["debug"])
+
+# Span recorder for the API process; agents write their spans to the same TRACE_DIR
+tracer = Tracer('api')
+
+@router.get('/traces/{trace_id}')
+async def get_trace(trace_id: str, current_user: dict = Depends(verify_jwt_token)):
+    """Return the latency waterfall of one request across API, agents, LLM and chain hops."""
+    spans = load_trace(trace_id, TRACE_DIR, extra=tracer.spans_for(trace_id))
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return {'trace_id': trace_id, **build_waterfall(spans)}
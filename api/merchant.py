@@ -1,28 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 from .auth_dependencies import verify_jwt_token
+from .debug import tracer
 from api.blockchain import *
 from storage.lighthouse import *
 from typing import List, Dict, Any
 from uagents.query import send_sync_message
-from agent.protocol.a3acontext import A3AContext, A3AResponse, A3AMessage
+from agent.protocol.a3acontext import A3AContext, A3AResponse, A3AMessage, A3AMerchantBulkImport
 from eth_utils import to_checksum_address
 import os
+import json
 from dotenv import load_dotenv
 load_dotenv()
-from metta.indexer import search_merchants
+from metta.indexer import search_merchants, search_items, suggest_queries
 router = APIRouter(prefix="/api", tags=["merchant"])
-from hyperon import MeTTa
-from metta.utils import (
-    create_metta,
-    get_menu_for_merchant,
-    get_item_description,
-    get_merchant_wallet,
-    get_merchant_description,
-    get_open_hours,
-    get_location,
-)
-from metta.storage import load_merchant_into
+from metta.menu import MenuProjection
+from metta.storage import storage_backend
+from metta.menu_import import parse_csv_rows, validate_menu_rows
 from blockchain.merchant_nft import get_wallet_for_merchant_id
 
 class UpdateStatusRequest(BaseModel):
@@ -35,6 +29,8 @@ merchant_agent_address = os.getenv(
     'MERCHANT_AGENT_ADDRESS',
     'agent1qf9ua6p2gz6nx47emvsf5d9840h7wpfwlcqhsqt4zz0dun8tj43l23jtuch'
 )
+# Rows per bulk_import message sent to the merchant agent (keeps envelopes small)
+MENU_IMPORT_CHUNK_ROWS = int(os.getenv('MENU_IMPORT_CHUNK_ROWS', '500'))
 
 @router.get('/tasks')
 async def get_assigned_tasks(current_user: dict = Depends(verify_jwt_token)):
@@ -111,28 +107,31 @@ async def send_merchant_chat_message(
             # For query_wallet, content can be empty; normalize to empty string
             final_msg.append(A3AMessage(role=role, content=content or ""))
 
-    resp = await send_sync_message(merchant_agent_address, A3AContext(messages=final_msg), response_type=A3AResponse)
+    with tracer.span('api.merchant_chat_messages') as root:
+        with tracer.span('api.send_sync_message') as span:
+            resp = await send_sync_message(merchant_agent_address, A3AContext(messages=final_msg, trace=span.context()), response_type=A3AResponse)
+    if isinstance(resp, A3AResponse):
+        resp.trace = {'trace_id': root.trace_id}
     return resp
 
 @router.get('/merchant/{merchant_id}/profile')
 async def get_merchant_profile(merchant_id: str, current_user: dict = Depends(verify_jwt_token)):
     """Return the live merchant profile (menu, metadata, wallet) for a given merchant_id.
 
-    This uses the MeTTa storage files to reconstruct state and is safe for customer/frontend reads.
+    Read straight from the storage backend (one pass over the merchant's .metta file, or
+    one SQL query), without building a MeTTa space; safe for customer/frontend reads.
     """
-    # Build a fresh MeTTa instance and hydrate it from storage for this merchant
-    metta = create_metta()
     try:
-        load_merchant_into(metta, merchant_id)
+        profile = storage_backend().profile(merchant_id)
     except Exception:
         # If storage missing/unreadable, return empty profile gracefully
-        pass
+        profile = MenuProjection(merchant_id)
 
     # Read metadata
-    desc = get_merchant_description(metta, merchant_id)
-    hours = get_open_hours(metta, merchant_id)
-    loc = get_location(metta, merchant_id)
-    wallet = get_merchant_wallet(metta, merchant_id)
+    desc = profile.meta.get('merchant-desc')
+    hours = profile.meta.get('merchant-hours')
+    loc = profile.meta.get('merchant-location')
+    wallet = profile.meta.get('merchant-wallet')
     if not wallet:
         # Default wallet falls back to NFT owner for ERC-721 merchant_id
         try:
@@ -145,19 +144,15 @@ async def get_merchant_profile(merchant_id: str, current_user: dict = Depends(ve
         # No environment fallback by design
         wallet = owner_wallet or None
 
-    # Build menu with optional per-item descriptions
-    menu_pairs = get_menu_for_merchant(metta, merchant_id) or []
-    menu = []
-    for name, price in menu_pairs:
-        try:
-            item_desc = get_item_description(metta, name)
-        except Exception:
-            item_desc = None
-        menu.append({
-            'name': name,
-            'price': price,
-            'description': item_desc,
-        })
+    # Menu with optional per-item descriptions
+    menu = [
+        {
+            'name': item['display'],
+            'price': item['price'],
+            'description': item['desc'],
+        }
+        for item in profile.items()
+    ]
 
     return {
         'merchant_id': merchant_id,
@@ -172,7 +167,85 @@ async def get_merchant_profile(merchant_id: str, current_user: dict = Depends(ve
 async def search_merchants_api(q: str, current_user: dict = Depends(verify_jwt_token)):
     """Search merchants by keywords extracted from their MeTTa storage.
 
-    Returns a list of candidate merchants with basic info for selection.
+    Returns a list of candidate merchants with basic info for selection, and the
+    matching menu items with their latest prices (price phrases such as "under $10"
+    filter the items), all from the search index without touching MeTTa.
     """
     results = search_merchants(q)
-    return {"query": q, "results": results}
\ No newline at end of file
+    items = search_items(q)
+    return {"query": q, "results": results, "items": items}
+
+@router.get('/merchant/search/suggest')
+async def suggest_merchant_search_api(q: str, limit: int = 5, current_user: dict = Depends(verify_jwt_token)):
+    """Autocomplete for the search box: the query with its last word completed.
+
+    Served from the same in-memory term dictionary as /merchant/search.
+    """
+    limit = max(1, min(limit, 20))
+    return {"query": q, "suggestions": suggest_queries(q, limit=limit)}
+
+async def _read_import_rows(request: Request) -> list:
+    """Rows from a JSON body ({"items": [...]} or a bare list), a CSV body, or a multipart 'file' upload."""
+    ctype = (request.headers.get('content-type') or '').lower()
+    if ctype.startswith('multipart/form-data'):
+        form = await request.form()
+        upload = form.get('file')
+        if upload is None or not hasattr(upload, 'read'):
+            raise HTTPException(status_code=400, detail="Upload a CSV or JSON file in the 'file' field")
+        raw = (await upload.read()).decode('utf-8', errors='replace')
+        is_json = (getattr(upload, 'filename', '') or '').lower().endswith('.json') or raw.lstrip().startswith(('[', '{'))
+    else:
+        raw = (await request.body()).decode('utf-8', errors='replace')
+        is_json = 'json' in ctype or (not ctype.startswith('text/csv') and raw.lstrip().startswith(('[', '{')))
+    if is_json:
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid JSON")
+        rows = data.get('items') if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="JSON must be a list of items or {\"items\": [...]}")
+        return rows
+    return parse_csv_rows(raw)
+
+@router.post('/merchant/menu/import')
+async def import_merchant_menu(request: Request, current_user: dict = Depends(verify_jwt_token)):
+    """Bulk-import menu items for the authenticated merchant.
+
+    Accepts JSON ({"items": [{"name", "price", "description"}]}) or CSV with a
+    name,price[,description] header. All rows are validated first; nothing is applied
+    if any row is invalid. Valid items are persisted by the merchant agent as batch
+    records and the search index is rebuilt once at the end.
+    """
+    if current_user.get('role') != 'merchant' or not current_user.get('merchant_id'):
+        raise HTTPException(status_code=403, detail="Menu import requires a merchant with a merchant_id")
+    merchant_id = str(current_user['merchant_id'])
+    rows = await _read_import_rows(request)
+    items, errors = validate_menu_rows(rows)
+    if errors:
+        raise HTTPException(status_code=400, detail={'error_count': len(errors), 'errors': errors[:50]})
+    if not items:
+        raise HTTPException(status_code=400, detail="No items to import")
+
+    chunks = [items[i:i + MENU_IMPORT_CHUNK_ROWS] for i in range(0, len(items), MENU_IMPORT_CHUNK_ROWS)]
+    imported = 0
+    reply: dict = {}
+    with tracer.span('api.merchant_menu_import', rows=len(items), chunks=len(chunks)) as root:
+        for n, chunk in enumerate(chunks):
+            with tracer.span('api.send_sync_message') as span:
+                ctx_msg = A3AMerchantBulkImport(chunk, merchant_id=merchant_id, final=(n == len(chunks) - 1))
+                ctx_msg.trace = span.context()
+                resp = await send_sync_message(merchant_agent_address, ctx_msg, response_type=A3AResponse)
+            if not isinstance(resp, A3AResponse) or resp.type != 'bulk_import':
+                raise HTTPException(status_code=502, detail={
+                    'error': 'Merchant agent did not confirm the import',
+                    'imported': imported,
+                })
+            reply = json.loads(resp.content)
+            imported += int(reply.get('imported') or 0)
+    return {
+        'merchant_id': merchant_id,
+        'imported': imported,
+        'menu_items': reply.get('menu_items'),
+        'trace': {'trace_id': root.trace_id},
+    }
@@ -12,6 +12,7 @@ from api.auth import router as auth_router
 from api.customer import router as customer_router
 from api.merchant import router as merchant_router
 from api.contracts import router as user_router
+from api.debug import router as debug_router
 
 # from api.blockchain import router as order_contract_router
 
@@ -31,6 +32,7 @@ app.include_router(auth_router)
 app.include_router(customer_router)
 app.include_router(merchant_router)
 app.include_router(user_router)
+app.include_router(debug_router)
 # app.include_router(order_contract_router)
 
 @app.get("/")
@@ -0,0 +1,96 @@
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .storage import DEFAULT_DIR, FileBackend, StorageBackend
+
+# Precomputed global catalog for the customer-facing list_menu reply.
+# Holds every merchant's (item, price) list and its preformatted menu block, plus the
+# rendered id-ordered pages. Built once from storage, then refreshed one merchant at a
+# time when that merchant's menu changes, so serving a page is a dict lookup.
+# `version` increases on every refresh and identifies the snapshot a reply came from.
+
+
+class CatalogSnapshot:
+    """Ready-to-serve menus and menu blocks for all merchants."""
+
+    def __init__(self, format_block: Callable[[str, list], str], base_dir: str = DEFAULT_DIR,
+                 backend: StorageBackend | None = None):
+        self.format_block = format_block
+        self.base_dir = base_dir
+        self.backend = backend or FileBackend(base_dir)
+        self.version = 0
+        self._menus: Dict[str, list] = {}
+        self._blocks: Dict[str, str] = {}
+        self._order: List[str] = []
+        self._pages: Dict[Tuple[int, int], str] = {}
+        self._built = False
+        self._lock = threading.Lock()
+
+    def rebuild(self) -> None:
+        """Full build from storage (first use, or to pick up out-of-band edits)."""
+        menus = {mid: self.backend.profile(mid).menu() for mid in self.backend.merchants()}
+        blocks = {mid: self.format_block(mid, menu) for mid, menu in menus.items()}
+        with self._lock:
+            self._menus = menus
+            self._blocks = blocks
+            self._order = list(menus)
+            self._pages = {}
+            self._built = True
+            self.version += 1
+
+    def refresh(self, merchant_id: str, menu: Optional[list] = None) -> None:
+        """Re-render one merchant after a mutation; `menu` defaults to reading it from storage."""
+        if not self._built:
+            self.rebuild()
+            return
+        mid = str(merchant_id)
+        if menu is None:
+            menu = self.backend.profile(mid).menu()
+        block = self.format_block(mid, menu)
+        with self._lock:
+            if mid not in self._menus:
+                self._order = self.backend.merchants()
+            self._menus[mid] = list(menu)
+            self._blocks[mid] = block
+            self._pages = {}
+            self.version += 1
+
+    def _ensure_built(self) -> None:
+        if not self._built:
+            self.rebuild()
+
+    def merchants(self) -> List[str]:
+        self._ensure_built()
+        return self._order
+
+    def menu(self, merchant_id: str) -> list:
+        self._ensure_built()
+        return self._menus.get(str(merchant_id), [])
+
+    def block(self, merchant_id: str) -> str:
+        self._ensure_built()
+        mid = str(merchant_id)
+        block = self._blocks.get(mid)
+        if block is None:
+            # Unknown merchant (e.g. a ranked id without a file): render an empty block
+            block = self.format_block(mid, [])
+        return block
+
+    def page(self, page: int, page_size: int, render: Callable[[List[str], int, int], str]) -> str:
+        """Id-ordered page of menu blocks, rendered once per snapshot version."""
+        self._ensure_built()
+        key = (page, page_size)
+        text = self._pages.get(key)
+        if text is None:
+            text = render(self._order, page, page_size)
+            with self._lock:
+                self._pages[key] = text
+        return text
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "merchants": len(self._order),
+            "items": sum(len(m) for m in self._menus.values()),
+            "cached_pages": len(self._pages),
+        }
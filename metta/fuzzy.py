@@ -0,0 +1,135 @@
+import bisect
+import os
+from collections import Counter, defaultdict
+from itertools import chain
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Typo-tolerant term lookup for merchant search.
+# The index's vocabulary is kept in two structures, both updated as terms enter or
+# leave the postings: a sorted list for prefix completion (bisect) and a padded-bigram
+# index that yields fuzzy candidates. Candidates are filtered with the q-gram count
+# bound and verified with a bounded edit distance (adjacent transpositions count as one
+# edit), so a lookup only touches terms that share most of the query's bigrams.
+
+# Edits allowed by term length: none below FUZZY_MIN_LEN, one below FUZZY_TWO_EDITS_LEN, else two
+FUZZY_MIN_LEN = int(os.getenv("SEARCH_FUZZY_MIN_LEN", "3"))
+FUZZY_TWO_EDITS_LEN = int(os.getenv("SEARCH_FUZZY_TWO_EDITS_LEN", "7"))
+FUZZY_MAX_EDITS = int(os.getenv("SEARCH_FUZZY_MAX_EDITS", "2"))
+
+
+def max_edits(term: str) -> int:
+    if len(term) < FUZZY_MIN_LEN:
+        return 0
+    return min(FUZZY_MAX_EDITS, 1 if len(term) < FUZZY_TWO_EDITS_LEN else 2)
+
+
+def _bigrams(term: str) -> Set[str]:
+    padded = f"^{term}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance, or limit + 1 as soon as it must exceed `limit`.
+
+    Only the diagonal band |i - j| <= limit of the DP table is computed.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    big = limit + 1
+    n = len(b)
+    prev2: List[int] = []
+    prev = [j if j <= limit else big for j in range(n + 1)]
+    for i in range(1, len(a) + 1):
+        cur = [big] * (n + 1)
+        if i <= limit:
+            cur[0] = i
+        ai = a[i - 1]
+        for j in range(max(1, i - limit), min(n, i + limit) + 1):
+            bj = b[j - 1]
+            d = prev[j - 1] + (ai != bj)
+            if prev[j] + 1 < d:
+                d = prev[j] + 1
+            if cur[j - 1] + 1 < d:
+                d = cur[j - 1] + 1
+            if i > 1 and j > 1 and ai == b[j - 2] and a[i - 2] == bj and prev2[j - 2] + 1 < d:
+                d = prev2[j - 2] + 1
+            cur[j] = d if d < big else big
+        if min(cur) >= big:
+            return big
+        prev2, prev = prev, cur
+    return prev[n]
+
+
+class TermDictionary:
+    """The set of indexed terms, searchable by prefix and by bounded edit distance."""
+
+    def __init__(self, terms: Iterable[str] = ()):
+        self._sorted: List[str] = sorted(set(terms))
+        self._grams: Dict[str, Set[str]] = defaultdict(set)
+        self._gram_count: Dict[str, int] = {}
+        for term in self._sorted:
+            self._index_grams(term)
+
+    def _index_grams(self, term: str) -> None:
+        grams = _bigrams(term)
+        self._gram_count[term] = len(grams)
+        for g in grams:
+            self._grams[g].add(term)
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def __contains__(self, term: str) -> bool:
+        i = bisect.bisect_left(self._sorted, term)
+        return i < len(self._sorted) and self._sorted[i] == term
+
+    def add(self, term: str) -> None:
+        i = bisect.bisect_left(self._sorted, term)
+        if i < len(self._sorted) and self._sorted[i] == term:
+            return
+        self._sorted.insert(i, term)
+        self._index_grams(term)
+
+    def remove(self, term: str) -> None:
+        i = bisect.bisect_left(self._sorted, term)
+        if i == len(self._sorted) or self._sorted[i] != term:
+            return
+        del self._sorted[i]
+        self._gram_count.pop(term, None)
+        for g in _bigrams(term):
+            bucket = self._grams.get(g)
+            if bucket is not None:
+                bucket.discard(term)
+                if not bucket:
+                    del self._grams[g]
+
+    def prefix(self, prefix: str, limit: int = 50) -> List[str]:
+        """Up to `limit` terms starting with `prefix`, in sorted order."""
+        out = []
+        i = bisect.bisect_left(self._sorted, prefix)
+        while i < len(self._sorted) and len(out) < limit and self._sorted[i].startswith(prefix):
+            out.append(self._sorted[i])
+            i += 1
+        return out
+
+    def fuzzy(self, term: str, edits: int | None = None) -> List[Tuple[str, int]]:
+        """(term, distance) for indexed terms within `edits` of `term` (default: max_edits)."""
+        k = max_edits(term) if edits is None else edits
+        if k <= 0:
+            return [(term, 0)] if term in self else []
+        grams = _bigrams(term)
+        # Counted in C: terms sharing each of the query's bigrams
+        shared = Counter(chain.from_iterable(self._grams.get(g, ()) for g in grams))
+        # An edit changes at most three bigrams of either side's set (two, or three
+        # for a transposition), so closer terms must share at least this many
+        need = len(grams) - 3 * k
+        n = len(term)
+        out = []
+        for cand, count in shared.items():
+            if count < need or abs(len(cand) - n) > k or count < self._gram_count[cand] - 3 * k:
+                continue
+            d = edit_distance(term, cand, k)
+            if d <= k:
+                out.append((cand, d))
+        out.sort(key=lambda td: (td[1], td[0]))
+        return out
@@ -0,0 +1,325 @@
+import heapq
+import json
+import math
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# Compact binary search index, read through mmap.
+#
+#   header   magic "MIDX", format version, doc/term counts, total doc length and the
+#            offsets of the sections below
+#   docs     one fixed-size entry per merchant (sorted by id): doc length, id, payload
+#            and meta location in the blob area
+#   terms    one fixed-size entry per term (sorted by UTF-8 bytes): term location in the
+#            blob area, document frequency and postings offset; binary-searchable in place
+#   postings per term, (doc ordinal delta, tf) pairs as LEB128 varints
+#   blobs    merchant ids, term strings, JSON payloads (items/desc/hours/location/wallet/menu;
+#            MerchantIndexStore checkpoints add each document's keywords) and JSON meta (the
+#            source file identity in checkpoints, kept apart so it is cheap to read alone)
+#
+# Opening a file only reads the header; pages are faulted in as queries touch them and
+# shared between processes mapping the same file.
+
+MAGIC = b"MIDX"
+FORMAT_VERSION = 2
+
+_HEADER = struct.Struct("<4sHHIIQQQQQ")
+_DOC = struct.Struct("<IQIQHQI")   # doc_len, payload_off, payload_len, id_off, id_len, meta_off, meta_len
+_DOC_LEN = struct.Struct("<I")     # leading doc_len field of a _DOC entry
+_TERM = struct.Struct("<QHIQ")     # term_off, term_len, df, postings_off
+
+_PAYLOAD_FIELDS = ("items", "desc", "hours", "location", "wallet", "menu")
+# Meta fields, written only when present: what the document was built from
+# (see MerchantIndexStore.checkpoint)
+_OPTIONAL_FIELDS = ("source",)
+
+
+def _varint(n: int, out: bytearray) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(buf, pos: int) -> Tuple[int, int]:
+    n = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n, pos
+        shift += 7
+
+
+def write_index(path: str, index: Dict[str, Dict], with_keywords: bool = False) -> str:
+    """Write `index` (merchant_id -> {keywords, items, desc, ...}) atomically to `path`.
+
+    `with_keywords` also stores each document's keywords in its payload, so a reader can
+    take a replaced document's terms out of the statistics (see indexer.LayeredIndex).
+    """
+    mids = sorted(str(m) for m in index)
+    ordinal = {mid: i for i, mid in enumerate(mids)}
+    blobs = bytearray()
+    docs = bytearray()
+    postings_by_term: Dict[str, List[Tuple[int, int]]] = {}
+    total_len = 0
+    for mid in mids:
+        data = index[mid]
+        keywords = data.get("keywords") or {}
+        length = 0
+        for term, tf in keywords.items():
+            if tf > 0:
+                postings_by_term.setdefault(term, []).append((ordinal[mid], int(tf)))
+                length += int(tf)
+        total_len += length
+        id_bytes = mid.encode("utf-8")
+        id_off = len(blobs)
+        blobs += id_bytes
+        fields = {k: data.get(k) for k in _PAYLOAD_FIELDS}
+        if with_keywords:
+            fields["keywords"] = {t: int(tf) for t, tf in keywords.items() if tf > 0}
+        payload = json.dumps(fields).encode("utf-8")
+        payload_off = len(blobs)
+        blobs += payload
+        extra = {k: data[k] for k in _OPTIONAL_FIELDS if k in data}
+        meta = json.dumps(extra).encode("utf-8") if extra else b""
+        meta_off = len(blobs)
+        blobs += meta
+        docs += _DOC.pack(length, payload_off, len(payload), id_off, len(id_bytes), meta_off, len(meta))
+
+    terms = bytearray()
+    postings = bytearray()
+    for term in sorted(postings_by_term, key=lambda t: t.encode("utf-8")):
+        plist = postings_by_term[term]  # ascending ordinals: mids were visited in order
+        term_bytes = term.encode("utf-8")
+        term_off = len(blobs)
+        blobs += term_bytes
+        terms += _TERM.pack(term_off, len(term_bytes), len(plist), len(postings))
+        prev = 0
+        for doc, tf in plist:
+            _varint(doc - prev, postings)
+            _varint(tf, postings)
+            prev = doc
+
+    docs_off = _HEADER.size
+    terms_off = docs_off + len(docs)
+    postings_off = terms_off + len(terms)
+    blobs_off = postings_off + len(postings)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(mids), len(postings_by_term), total_len,
+                          docs_off, terms_off, postings_off, blobs_off)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            for part in (header, docs, terms, postings, blobs):
+                f.write(part)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return path
+
+
+def read_version(path: str) -> int | None:
+    """Format version from the header, or None if `path` is not a binary index."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(_HEADER.size)
+    except OSError:
+        return None
+    if len(head) < _HEADER.size or head[:4] != MAGIC:
+        return None
+    return _HEADER.unpack(head)[1]
+
+
+class MappedIndex:
+    """Read-only BM25 search over a binary index file, without loading it into memory.
+
+    Scores match InvertedIndex for the same documents and k1/b.
+    """
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f"{path}: not a binary index")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, _, self.n_docs, self.n_terms, self.total_len,
+         self._docs_off, self._terms_off, self._postings_off, self._blobs_off) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mm.close()
+            raise ValueError(f"{path}: unsupported index format {magic!r} v{version}")
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def __enter__(self) -> "MappedIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def _blob(self, off: int, length: int) -> bytes:
+        start = self._blobs_off + off
+        return self._mm[start:start + length]
+
+    def _doc_entry(self, ordinal: int) -> Tuple[int, int, int, int, int, int, int]:
+        return _DOC.unpack_from(self._mm, self._docs_off + ordinal * _DOC.size)
+
+    def merchant_id(self, ordinal: int) -> str:
+        id_off, id_len = self._doc_entry(ordinal)[3:5]
+        return self._blob(id_off, id_len).decode("utf-8")
+
+    def doc(self, ordinal: int) -> Dict:
+        _, payload_off, payload_len = self._doc_entry(ordinal)[:3]
+        return json.loads(self._blob(payload_off, payload_len))
+
+    def meta(self, ordinal: int) -> Dict:
+        """The document's meta fields (e.g. source), without decoding its payload."""
+        meta_off, meta_len = self._doc_entry(ordinal)[5:]
+        return json.loads(self._blob(meta_off, meta_len)) if meta_len else {}
+
+    def _term_entry(self, i: int) -> Tuple[int, int, int, int]:
+        return _TERM.unpack_from(self._mm, self._terms_off + i * _TERM.size)
+
+    def _term(self, i: int) -> bytes:
+        term_off, term_len, _, _ = self._term_entry(i)
+        return self._blob(term_off, term_len)
+
+    def _lower_bound(self, key: bytes) -> int:
+        """Index of the first term >= key (UTF-8 bytes order)."""
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _find(self, term: str) -> Tuple[int, int] | None:
+        """(df, postings offset) for `term` by binary search over the term table."""
+        key = term.encode("utf-8")
+        i = self._lower_bound(key)
+        if i < self.n_terms:
+            term_off, term_len, df, postings_off = self._term_entry(i)
+            if self._blob(term_off, term_len) == key:
+                return df, postings_off
+        return None
+
+    def df(self, term: str) -> int:
+        found = self._find(term)
+        return found[0] if found is not None else 0
+
+    def prefix(self, prefix: str, limit: int = 50) -> List[str]:
+        """Up to `limit` terms starting with `prefix`, in sorted order."""
+        key = prefix.encode("utf-8")
+        out = []
+        i = self._lower_bound(key)
+        while i < self.n_terms and len(out) < limit:
+            term = self._term(i)
+            if not term.startswith(key):
+                break
+            out.append(term.decode("utf-8"))
+            i += 1
+        return out
+
+    def ordinal(self, merchant_id: str) -> int | None:
+        """Position of a merchant's document (ids are sorted), or None."""
+        key = str(merchant_id).encode("utf-8")
+        lo, hi = 0, self.n_docs
+        while lo < hi:
+            mid = (lo + hi) // 2
+            id_off, id_len = self._doc_entry(mid)[3:5]
+            if self._blob(id_off, id_len) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.n_docs and self.merchant_id(lo) == str(merchant_id):
+            return lo
+        return None
+
+    def doc_len(self, ordinal: int) -> int:
+        return _DOC_LEN.unpack_from(self._mm, self._docs_off + ordinal * _DOC.size)[0]
+
+    def _postings(self, df: int, postings_off: int) -> Iterator[Tuple[int, int]]:
+        mm = self._mm
+        pos = self._postings_off + postings_off
+        doc = 0
+        for _ in range(df):
+            # Most deltas and tfs fit in one byte
+            delta = mm[pos]
+            if delta < 0x80:
+                pos += 1
+            else:
+                delta, pos = _read_varint(mm, pos)
+            tf = mm[pos]
+            if tf < 0x80:
+                pos += 1
+            else:
+                tf, pos = _read_varint(mm, pos)
+            doc += delta
+            yield doc, tf
+
+    def iter_postings(self, term: str) -> Iterator[Tuple[int, int]]:
+        """(doc ordinal, tf) for one term, in ordinal order."""
+        found = self._find(term)
+        return self._postings(*found) if found is not None else iter(())
+
+    def postings(self, term: str) -> Dict[str, int]:
+        """{merchant_id: tf} for one term."""
+        found = self._find(term)
+        if found is None:
+            return {}
+        return {self.merchant_id(doc): tf for doc, tf in self._postings(*found)}
+
+    def terms(self) -> Iterator[str]:
+        for i in range(self.n_terms):
+            yield self._term(i).decode("utf-8")
+
+    def search(self, tokens: Iterable[str], top_k: int = 5) -> List[Tuple[str, float]]:
+        """Top-k (merchant_id, BM25 score); only the query terms' postings are read."""
+        n = self.n_docs
+        avgdl = (self.total_len / n) if n else 0.0
+        k1, b = self.k1, self.b
+        norms: Dict[int, float] = {}
+        scores: Dict[int, float] = {}
+        for term in set(tokens):
+            found = self._find(term)
+            if found is None:
+                continue
+            df = found[0]
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for doc, tf in self._postings(*found):
+                norm = norms.get(doc)
+                if norm is None:
+                    length = self.doc_len(doc)
+                    norm = norms[doc] = k1 * (1 - b + b * (length / avgdl if avgdl else 0.0))
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+        # Ordinals follow merchant_id order, so this breaks ties like InvertedIndex
+        best = heapq.nsmallest(top_k, scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        return [(self.merchant_id(doc), score) for doc, score in best]
+
+    def to_index(self) -> Dict[str, Dict]:
+        """Materialize the whole index (merchant_id -> data with a keywords dict)."""
+        index = {}
+        for ordinal in range(self.n_docs):
+            data = self.doc(ordinal)
+            data.update(self.meta(ordinal))
+            data["keywords"] = {}
+            index[self.merchant_id(ordinal)] = data
+        ids = [self.merchant_id(i) for i in range(self.n_docs)]
+        for i in range(self.n_terms):
+            term_off, term_len, df, postings_off = self._term_entry(i)
+            term = self._blob(term_off, term_len).decode("utf-8")
+            for doc, tf in self._postings(df, postings_off):
+                index[ids[doc]]["keywords"][term] = tf
+        return index
@@ -1,10 +1,31 @@
 import os
 import re
 import json
+import bisect
+import heapq
+import math
+import threading
 from collections import defaultdict, Counter
-from typing import Dict, List, Tuple
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from .storage import DEFAULT_DIR
+from .fuzzy import TermDictionary
+from .index_format import FORMAT_VERSION, MappedIndex, read_version, write_index
+from .menu import parse_fact
+from .vectors import VectorIndex, vectors_available
+from .storage import (
+    DEFAULT_DIR,
+    add_write_listener,
+    committed_lines,
+    merchant_file,
+    storage_backend,
+    StorageBackend,
+    _committed_prefix,
+    _iter_merchant_files,
+)
+from .watcher import DirectoryWatcher, WATCH_MODE
 
 
 def _tokenize(text: str) -> List[str]:
@@ -13,125 +34,1188 @@ def _tokenize(text: str) -> List[str]:
     return [t for t in re.split(r"[^a-z0-9]+", text) if t]
 
 
-def _iter_merchant_files(base_dir: str = DEFAULT_DIR):
-    if not os.path.isdir(base_dir):
-        return
-    for name in os.listdir(base_dir):
-        if not name.startswith("merchant_") or not name.endswith(".metta"):
-            continue
-        path = os.path.join(base_dir, name)
-        # merchant_<id>.metta → <id>
-        mid = name[len("merchant_") : -len(".metta")]
-        yield mid, path
+class _MerchantDoc:
+    """Streaming parse of one merchant's facts into its search document.
+
+    The parser state is serializable so a shard can resume from a byte offset and only
+    read lines appended since the last update.
+    """
+
+    __slots__ = ("keywords", "items", "slug_to_display", "menu_slugs", "prices", "removed",
+                 "desc", "hours", "location", "wallet")
+
+    def __init__(self, state: Dict | None = None):
+        state = state or {}
+        self.keywords: Counter = Counter(state.get("keywords") or {})
+        self.items: List[str] = list(state.get("items") or [])
+        self.slug_to_display: Dict[str, str] = dict(state.get("slug_to_display") or {})
+        # Item-level view (latest-wins like MenuProjection): ordered slugs, prices, tombstones
+        self.menu_slugs: Dict[str, None] = dict.fromkeys(state.get("menu_slugs") or [])
+        self.prices: Dict[str, str] = dict(state.get("prices") or {})
+        self.removed: set = set(state.get("removed") or [])
+        self.desc = state.get("desc")
+        self.hours = state.get("hours")
+        self.location = state.get("location")
+        self.wallet = state.get("wallet")
+
+    def feed(self, line: str) -> None:
+        fact = parse_fact(line)
+        if fact is None:
+            return
+        rel, args = fact
+        if len(args) < 2:
+            return
+        key, text = args[0], args[1]
+        if rel == "item-display":
+            self.slug_to_display[key] = text
+        elif rel == "menu":
+            display = self.slug_to_display.get(text, text)
+            self.items.append(display)
+            self.keywords.update(_tokenize(display))
+            self.menu_slugs.setdefault(text)
+        elif rel == "price":
+            self.prices[key] = text
+        elif rel == "removed-menu":
+            self.removed.add(text)
+        elif rel == "merchant-desc":
+            self.desc = text
+            self.keywords.update(_tokenize(text))
+        elif rel == "merchant-hours":
+            self.hours = text
+        elif rel == "merchant-location":
+            self.location = text
+            self.keywords.update(_tokenize(text))
+        elif rel == "merchant-wallet":
+            self.wallet = text
+
+    def data(self) -> Dict:
+        return {
+            "keywords": self.keywords,
+            "items": self.items,
+            "desc": self.desc,
+            "hours": self.hours,
+            "location": self.location,
+            "wallet": self.wallet,
+            "menu": [
+                {"slug": slug, "display": self.slug_to_display.get(slug, slug), "price": self.prices.get(slug)}
+                for slug in self.menu_slugs
+                if slug not in self.removed
+            ],
+        }
+
+    def state(self) -> Dict:
+        d = self.data()
+        del d["menu"]
+        d["keywords"] = dict(self.keywords)
+        d["slug_to_display"] = self.slug_to_display
+        d["menu_slugs"] = list(self.menu_slugs)
+        d["prices"] = self.prices
+        d["removed"] = sorted(self.removed)
+        return d
+
+
+# Cold builds parse merchant files in a process pool once there are at least
+# PARALLEL_MIN_FILES of them (pool start-up costs more than parsing a few small files)
+BUILD_WORKERS = int(os.getenv("INDEX_BUILD_WORKERS", "0")) or (os.cpu_count() or 1)
+PARALLEL_MIN_FILES = int(os.getenv("INDEX_PARALLEL_MIN_FILES", "64"))
+# Bytes before a shard's offset compared on resume to detect in-place rewrites
+TAIL_CHECK = 64
+
+
+def _parse_chunk(data: bytes, state: Dict | None = None) -> Tuple[_MerchantDoc, int]:
+    """Feed the committed records of `data` to a doc; returns it and the bytes consumed."""
+    end = _committed_prefix(data)
+    doc = _MerchantDoc(state)
+    for line in committed_lines(data[:end].decode("utf-8", errors="replace").splitlines()):
+        doc.feed(line)
+    return doc, end
+
 
+def _parse_merchant_file(path: str) -> Dict | None:
+    """Full parse of one merchant file into shard fields (runs in pool workers).
 
-def build_index(base_dir: str = DEFAULT_DIR) -> Dict[str, Dict]:
+    The file identity comes from the open descriptor, so a concurrent append only
+    makes the shard look changed and the next refresh picks the rest up.
+    """
+    try:
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            data = f.read()
+    except OSError:
+        return None
+    doc, end = _parse_chunk(data)
+    return {
+        "ino": st.st_ino,
+        "size": st.st_size,
+        # A partially written tail is re-examined on the next refresh
+        "mtime_ns": st.st_mtime_ns if end == len(data) else 0,
+        "offset": end,
+        "tail": data[:end][-TAIL_CHECK:].decode("latin-1"),
+        "state": doc.state(),
+    }
+
+
+def _parse_files(paths: List[str], workers: int | None = None) -> List[Dict | None]:
+    """_parse_merchant_file over `paths`, fanned out to `workers` processes when worthwhile."""
+    workers = BUILD_WORKERS if workers is None else workers
+    if workers > 1 and len(paths) >= PARALLEL_MIN_FILES:
+        workers = min(workers, len(paths))
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(_parse_merchant_file, paths, chunksize=max(1, len(paths) // (workers * 4))))
+        except (OSError, RuntimeError):
+            # No usable process pool here (e.g. restricted sandbox): parse serially
+            pass
+    return [_parse_merchant_file(p) for p in paths]
+
+
+def build_index(base_dir: str = DEFAULT_DIR, workers: int | None = None) -> Dict[str, Dict]:
     """Scan all merchant_*.metta files and build a keyword index.
 
+    Files are parsed in parallel (see _parse_files) and the per-merchant results merged.
     Returns a dict keyed by merchant_id with fields:
     - keywords: Counter of keyword → freq
     - items: list of item display names
     - desc/hours/location/wallet
+    - menu: live items as {slug, display, price} (latest price, removed items left out)
     """
+    files = list(_iter_merchant_files(base_dir))
+    parsed = _parse_files([path for _, path in files], workers)
     index: Dict[str, Dict] = {}
-    for merchant_id, path in _iter_merchant_files(base_dir):
-        keywords: Counter = Counter()
-        items: List[str] = []
-        slug_to_display: Dict[str, str] = {}
-        desc = hours = location = wallet = None
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                for raw in f:
-                    line = raw.strip()
-                    if not line or line.startswith("#"):
-                        continue
-                    # (item-display slug "display name")
-                    if line.startswith("(item-display "):
-                        try:
-                            # naive parse: (item-display <slug> "<display>")
-                            parts = line[len("(item-display ") : -1]
-                            slug, display = parts.split(" ", 1)
-                            display = display.strip()
-                            if display.startswith('"') and display.endswith('"'):
-                                display = display[1:-1]
-                            slug_to_display[slug] = display
-                        except Exception:
-                            pass
-                    # (menu <merchant> <slug>)
-                    elif line.startswith("(menu "):
-                        try:
-                            parts = line[len("(menu ") : -1].split()
-                            # parts: [merchant_id, slug]
-                            if len(parts) >= 2:
-                                slug = parts[1]
-                                display = slug_to_display.get(slug, slug)
-                                items.append(display)
-                                for t in _tokenize(display):
-                                    keywords[t] += 1
-                        except Exception:
-                            pass
-                    elif line.startswith("(merchant-desc "):
-                        try:
-                            content = line[len("(merchant-desc ") : -1]
-                            # merchant desc → first token is merchant_id
-                            _, text = content.split(" ", 1)
-                            text = text.strip()
-                            if text.startswith('"') and text.endswith('"'):
-                                text = text[1:-1]
-                            desc = text
-                            for t in _tokenize(text):
-                                keywords[t] += 1
-                        except Exception:
-                            pass
-                    elif line.startswith("(merchant-hours "):
-                        try:
-                            content = line[len("(merchant-hours ") : -1]
-                            _, text = content.split(" ", 1)
-                            text = text.strip()
-                            if text.startswith('"') and text.endswith('"'):
-                                text = text[1:-1]
-                            hours = text
-                        except Exception:
-                            pass
-                    elif line.startswith("(merchant-location "):
-                        try:
-                            content = line[len("(merchant-location ") : -1]
-                            _, text = content.split(" ", 1)
-                            text = text.strip()
-                            if text.startswith('"') and text.endswith('"'):
-                                text = text[1:-1]
-                            location = text
-                            for t in _tokenize(text):
-                                keywords[t] += 1
-                        except Exception:
-                            pass
-                    elif line.startswith("(merchant-wallet "):
-                        try:
-                            content = line[len("(merchant-wallet ") : -1]
-                            _, text = content.split(" ", 1)
-                            text = text.strip()
-                            if text.startswith('"') and text.endswith('"'):
-                                text = text[1:-1]
-                            wallet = text
-                        except Exception:
-                            pass
-        except FileNotFoundError:
+    for (merchant_id, _), shard in zip(files, parsed):
+        if shard is not None:
+            index[merchant_id] = _MerchantDoc(shard["state"]).data()
+    return index
+
+
+# BM25 parameters: term-frequency saturation and document-length normalization strength
+BM25_K1 = float(os.getenv("SEARCH_BM25_K1", "1.2"))
+BM25_B = float(os.getenv("SEARCH_BM25_B", "0.75"))
+
+# Typo tolerance: a query token missing from the index is expanded to indexed terms within
+# a small edit distance (scored at FUZZY_WEIGHT per edit) and, from PREFIX_MIN_LEN characters,
+# to terms it is a prefix of (scored at PREFIX_WEIGHT). At most MAX_EXPANSIONS terms per token.
+SEARCH_FUZZY = os.getenv("SEARCH_FUZZY", "1") not in ("0", "false", "False")
+FUZZY_WEIGHT = float(os.getenv("SEARCH_FUZZY_WEIGHT", "0.8"))
+PREFIX_WEIGHT = float(os.getenv("SEARCH_PREFIX_WEIGHT", "0.9"))
+PREFIX_MIN_LEN = int(os.getenv("SEARCH_PREFIX_MIN_LEN", "3"))
+MAX_EXPANSIONS = int(os.getenv("SEARCH_MAX_EXPANSIONS", "8"))
+
+# Default search_merchants mode: "keyword" (BM25) or "vector" (n-gram similarity; needs numpy)
+SEARCH_MODE = os.getenv("SEARCH_MODE", "keyword")
+
+
+class _TermRanking:
+    """Query expansion, IDF and completion shared by InvertedIndex and LayeredIndex.
+
+    Subclasses provide len(), df(term) and the vocabulary lookups _fuzzy_terms/_prefix_terms.
+    """
+
+    def df(self, term: str) -> int:
+        raise NotImplementedError
+
+    def _fuzzy_terms(self, token: str) -> List[Tuple[str, int]]:
+        raise NotImplementedError
+
+    def _prefix_terms(self, prefix: str, limit: int) -> List[str]:
+        raise NotImplementedError
+
+    def idf(self, term: str) -> float:
+        df = self.df(term)
+        n = len(self)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5)) if df else 0.0
+
+    def expand(self, tokens: Iterable[str], fuzzy: bool = True) -> List[Dict[str, float]]:
+        """One {term: weight} group per distinct query token.
+
+        Indexed tokens match exactly; with `fuzzy`, others are replaced by close or
+        completing terms (see FUZZY_WEIGHT / PREFIX_WEIGHT). Tokens with no match are dropped.
+        """
+        groups = []
+        for token in set(tokens):
+            if self.df(token):
+                groups.append({token: 1.0})
+                continue
+            if not fuzzy:
+                continue
+            cands: Dict[str, float] = {}
+            for term, dist in self._fuzzy_terms(token):
+                cands[term] = FUZZY_WEIGHT ** dist
+            if len(token) >= PREFIX_MIN_LEN:
+                for term in self._prefix_terms(token, MAX_EXPANSIONS * 4):
+                    cands[term] = max(cands.get(term, 0.0), PREFIX_WEIGHT)
+            if cands:
+                best = sorted(cands.items(), key=lambda tw: (-tw[1], -self.df(tw[0]), tw[0]))
+                groups.append(dict(best[:MAX_EXPANSIONS]))
+        return groups
+
+    def suggest(self, prefix: str, limit: int = 5) -> List[str]:
+        """Indexed terms completing `prefix`, most frequent (by document count) first.
+
+        Falls back to typo-tolerant matches when nothing starts with `prefix`.
+        """
+        if not prefix:
+            return []
+        terms = self._prefix_terms(prefix, max(limit * 20, 100))
+        if not terms:
+            terms = [t for t, _ in self._fuzzy_terms(prefix)]
+        terms.sort(key=lambda t: (-self.df(t), len(t), t))
+        return terms[:limit]
+
+
+class InvertedIndex(_TermRanking):
+    """Term -> {merchant_id: term frequency} postings with BM25 ranking.
+
+    Each merchant's keyword Counter is one document. Per-document length normalization
+    (k1 * (1 - b + b * len / avgdl)) is precomputed whenever documents change, so a query
+    only walks the postings of its own terms and keeps the best top_k with a heap.
+    `terms` mirrors the postings' vocabulary for prefix and typo-tolerant lookups.
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_len: Dict[str, int] = {}
+        # merchant data returned with hits (items/desc/location/...), keyed by merchant_id
+        self.docs: Dict[str, Dict] = {}
+        self.terms = TermDictionary()
+        self._total_len = 0
+        self._norm: Dict[str, float] = {}
+        self._dirty = True
+
+    @classmethod
+    def from_index(cls, index: Dict[str, Dict], **kwargs) -> "InvertedIndex":
+        inv = cls(**kwargs)
+        for mid, data in index.items():
+            inv.add(mid, data)
+        return inv
+
+    def add(self, merchant_id: str, data: Dict) -> None:
+        """Index (or re-index) one merchant's document."""
+        mid = str(merchant_id)
+        if mid in self.docs:
+            self.remove(mid)
+        keywords = data.get("keywords") or {}
+        for term, tf in keywords.items():
+            if tf > 0:
+                plist = self.postings.get(term)
+                if plist is None:
+                    plist = self.postings[term] = {}
+                    self.terms.add(term)
+                plist[mid] = int(tf)
+        length = sum(int(tf) for tf in keywords.values() if tf > 0)
+        self.doc_len[mid] = length
+        self._total_len += length
+        self.docs[mid] = data
+        self._dirty = True
+
+    def remove(self, merchant_id: str) -> None:
+        mid = str(merchant_id)
+        data = self.docs.pop(mid, None)
+        if data is None:
+            return
+        for term in (data.get("keywords") or {}):
+            plist = self.postings.get(term)
+            if plist is not None:
+                plist.pop(mid, None)
+                if not plist:
+                    del self.postings[term]
+                    self.terms.remove(term)
+        self._total_len -= self.doc_len.pop(mid, 0)
+        self._dirty = True
+
+    def _finalize(self) -> None:
+        n = len(self.doc_len)
+        avgdl = (self._total_len / n) if n else 0.0
+        k1, b = self.k1, self.b
+        self._norm = {
+            mid: k1 * (1 - b + b * (length / avgdl if avgdl else 0.0))
+            for mid, length in self.doc_len.items()
+        }
+        self._dirty = False
+
+    def df(self, term: str) -> int:
+        return len(self.postings.get(term, ()))
+
+    def _fuzzy_terms(self, token: str) -> List[Tuple[str, int]]:
+        return self.terms.fuzzy(token)
+
+    def _prefix_terms(self, prefix: str, limit: int) -> List[str]:
+        return self.terms.prefix(prefix, limit=limit)
+
+    def search(self, tokens: Iterable[str], top_k: int = 5, fuzzy: bool = False,
+               allow: Callable[[str], bool] | None = None) -> List[Tuple[str, float]]:
+        """Top-k (merchant_id, BM25 score) for query tokens; cost ~ postings touched.
+
+        With `fuzzy`, a token's expansions are scored at their weight and a merchant
+        counts only its best-matching expansion per token. `allow` filters documents
+        before the top-k cut.
+        """
+        if self._dirty:
+            self._finalize()
+        scores: Dict[str, float] = defaultdict(float)
+        k1 = self.k1
+        norm = self._norm
+        for group in self.expand(tokens, fuzzy):
+            best: Dict[str, float] = {}
+            for term, weight in group.items():
+                idf = self.idf(term)
+                for mid, tf in self.postings[term].items():
+                    s = idf * tf * (k1 + 1) / (tf + norm[mid])
+                    if weight != 1.0:
+                        s *= weight
+                    if s > best.get(mid, 0.0):
+                        best[mid] = s
+            for mid, s in best.items():
+                scores[mid] += s
+        if allow is not None:
+            scores = {mid: s for mid, s in scores.items() if allow(mid)}
+        # Highest score first; ties broken by merchant_id for stable output
+        return heapq.nsmallest(top_k, scores.items(), key=lambda kv: (-kv[1], kv[0]))
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+
+class _LayeredDocs(Mapping):
+    """Read-only merchant_id -> doc view over both layers of a LayeredIndex."""
+
+    def __init__(self, layered: "LayeredIndex"):
+        self._layered = layered
+
+    def __getitem__(self, merchant_id: str) -> Dict:
+        data = self._layered.doc(merchant_id)
+        if data is None:
+            raise KeyError(merchant_id)
+        return data
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._layered.base_ids()
+        yield from list(self._layered.delta.docs)
+
+    def __len__(self) -> int:
+        return len(self._layered)
+
+
+class LayeredIndex(_TermRanking):
+    """BM25 over a mapped checkpoint (MappedIndex) with in-memory changes on top.
+
+    `delta` holds the merchants indexed since the checkpoint was written; the base
+    document of a merchant that was re-indexed or dropped is shadowed. Document count,
+    total length and document frequencies are kept for the served documents (a shadowed
+    document's terms come from its checkpoint payload), so scores equal an InvertedIndex
+    over the same documents. A query reads only its own terms' postings from the map and
+    decodes only the payloads of its hits; the base vocabulary is loaded on the first
+    typo-tolerant lookup.
+    """
+
+    def __init__(self, base: MappedIndex | None = None, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.base = base
+        self.delta = InvertedIndex(k1=k1, b=b)
+        self.docs = _LayeredDocs(self)
+        # Base ordinals no longer served, with their length and terms taken out of the totals
+        self._shadowed: set = set()
+        self._shadow_len = 0
+        self._shadow_df: Counter = Counter()
+        self._base_terms: TermDictionary | None = None
+
+    def close(self) -> None:
+        if self.base is not None:
+            self.base.close()
+
+    def __len__(self) -> int:
+        n_base = self.base.n_docs - len(self._shadowed) if self.base is not None else 0
+        return n_base + len(self.delta)
+
+    @property
+    def total_len(self) -> int:
+        base = self.base.total_len - self._shadow_len if self.base is not None else 0
+        return base + self.delta._total_len
+
+    def _base_ordinal(self, merchant_id: str) -> int | None:
+        """Ordinal of a merchant's served base document, or None."""
+        if self.base is None:
+            return None
+        ordinal = self.base.ordinal(merchant_id)
+        return None if ordinal is None or ordinal in self._shadowed else ordinal
+
+    def in_base(self, merchant_id: str) -> bool:
+        return self._base_ordinal(str(merchant_id)) is not None
+
+    def base_ids(self) -> Iterator[str]:
+        if self.base is None:
+            return
+        for ordinal in range(self.base.n_docs):
+            if ordinal not in self._shadowed:
+                yield self.base.merchant_id(ordinal)
+
+    def _shadow(self, mid: str) -> None:
+        ordinal = self._base_ordinal(mid)
+        if ordinal is None:
+            return
+        self._shadowed.add(ordinal)
+        self._shadow_len += self.base.doc_len(ordinal)
+        self._shadow_df.update(self.base.doc(ordinal).get("keywords") or ())
+
+    def add(self, merchant_id: str, data: Dict) -> None:
+        """Index (or re-index) one merchant's document in the delta."""
+        mid = str(merchant_id)
+        self._shadow(mid)
+        self.delta.add(mid, data)
+
+    def remove(self, merchant_id: str) -> None:
+        mid = str(merchant_id)
+        self._shadow(mid)
+        self.delta.remove(mid)
+
+    def doc(self, merchant_id: str) -> Dict | None:
+        mid = str(merchant_id)
+        data = self.delta.docs.get(mid)
+        if data is not None:
+            return data
+        ordinal = self._base_ordinal(mid)
+        if ordinal is None:
+            return None
+        data = self.base.doc(ordinal)
+        data["keywords"] = Counter(data.get("keywords") or {})
+        return data
+
+    def source(self, merchant_id: str) -> Dict | None:
+        """What a served base document was built from (see MerchantIndexStore.checkpoint)."""
+        ordinal = self._base_ordinal(str(merchant_id))
+        if ordinal is None:
+            return None
+        source = self.base.meta(ordinal).get("source")
+        return source if isinstance(source, dict) else None
+
+    def df(self, term: str) -> int:
+        base = self.base.df(term) - self._shadow_df.get(term, 0) if self.base is not None else 0
+        return base + self.delta.df(term)
+
+    @property
+    def n_terms(self) -> int:
+        if self.base is None:
+            return len(self.delta.postings)
+        new = sum(1 for term in self.delta.postings if not self.base.df(term))
+        gone = sum(1 for term, n in self._shadow_df.items()
+                   if n == self.base.df(term) and term not in self.delta.postings)
+        return self.base.n_terms + new - gone
+
+    def _vocabulary(self) -> TermDictionary | None:
+        if self._base_terms is None and self.base is not None:
+            self._base_terms = TermDictionary(self.base.terms())
+        return self._base_terms
+
+    def _fuzzy_terms(self, token: str) -> List[Tuple[str, int]]:
+        found = dict(self.delta.terms.fuzzy(token))
+        vocab = self._vocabulary()
+        if vocab is not None:
+            found.update((term, d) for term, d in vocab.fuzzy(token) if self.df(term))
+        return sorted(found.items(), key=lambda td: (td[1], td[0]))
+
+    def _prefix_terms(self, prefix: str, limit: int) -> List[str]:
+        terms = set(self.delta.terms.prefix(prefix, limit=limit))
+        if self.base is not None:
+            # Fetch extra: some base terms may only occur in shadowed documents
+            terms.update(t for t in self.base.prefix(prefix, limit + len(self._shadowed)) if self.df(t))
+        return sorted(terms)[:limit]
+
+    def _postings(self, term: str) -> Iterator[Tuple[int | str, int, int]]:
+        """(key, tf, doc length) for the served documents containing `term`.
+
+        Base documents are keyed by ordinal, so their ids are decoded only for the hits
+        that make the top-k; delta documents by merchant_id.
+        """
+        base = self.base
+        if base is not None:
+            shadowed = self._shadowed
+            for ordinal, tf in base.iter_postings(term):
+                if ordinal not in shadowed:
+                    yield ordinal, tf, base.doc_len(ordinal)
+        delta = self.delta
+        for mid, tf in delta.postings.get(term, {}).items():
+            yield mid, tf, delta.doc_len[mid]
+
+    def _merchant_id(self, key: int | str) -> str:
+        return self.base.merchant_id(key) if isinstance(key, int) else key
+
+    def search(self, tokens: Iterable[str], top_k: int = 5, fuzzy: bool = False,
+               allow: Callable[[str], bool] | None = None) -> List[Tuple[str, float]]:
+        """Top-k (merchant_id, BM25 score); same contract as InvertedIndex.search."""
+        n = len(self)
+        avgdl = (self.total_len / n) if n else 0.0
+        k1, b = self.k1, self.b
+        norms: Dict[int | str, float] = {}
+        scores: Dict[int | str, float] = defaultdict(float)
+        for group in self.expand(tokens, fuzzy):
+            best: Dict[int | str, float] = {}
+            for term, weight in group.items():
+                idf = self.idf(term)
+                for key, tf, length in self._postings(term):
+                    norm = norms.get(key)
+                    if norm is None:
+                        norm = norms[key] = k1 * (1 - b + b * (length / avgdl if avgdl else 0.0))
+                    s = idf * tf * (k1 + 1) / (tf + norm)
+                    if weight != 1.0:
+                        s *= weight
+                    if s > best.get(key, 0.0):
+                        best[key] = s
+            for key, s in best.items():
+                scores[key] += s
+        if allow is not None:
+            scores = {key: s for key, s in scores.items() if allow(self._merchant_id(key))}
+        # Ordinals follow merchant_id order, so the base's best are cut before decoding ids
+        base_best = heapq.nsmallest(top_k, ((key, s) for key, s in scores.items() if isinstance(key, int)),
+                                    key=lambda kv: (-kv[1], kv[0]))
+        hits = [(self.base.merchant_id(key), s) for key, s in base_best]
+        hits.extend((key, s) for key, s in scores.items() if isinstance(key, str))
+        return heapq.nsmallest(top_k, hits, key=lambda kv: (-kv[1], kv[0]))
+
+
+# Item-level search: every live menu item is its own document.
+# Items are ranked with the same BM25 InvertedIndex as merchants (over the item's display
+# name), and a price-sorted list of (price, item) answers range filters such as
+# "under $10" by bisection. Both are updated one merchant at a time by MerchantIndexStore,
+# so a query never has to load a merchant's MeTTa space to see its items or prices.
+
+# A price needs a currency marker ("$10", "10 dollars") and must end at a word boundary, so
+# "5th avenue" or "2 to 4 people" stay search text. A range needs the marker on one end.
+_NUM = r"(\d+(?:\.\d+)?)\b"
+_MONEY = rf"(?:\$\s*{_NUM}|{_NUM}\s*(?:dollars?|usd|bucks)\b)"
+
+
+def _money_range(sep: str) -> str:
+    return rf"(?:{_MONEY}{sep}(?:{_MONEY}|{_NUM})|{_NUM}{sep}{_MONEY})"
+
+
+_PRICE_PATTERNS = [
+    (re.compile(r"\bbetween\s+" + _money_range(r"\s+(?:and|to|-)\s+"), re.I), "between"),
+    (re.compile(_money_range(r"\s*(?:-|to)\s*"), re.I), "between"),
+    (re.compile(rf"\b(?:under|below|less than|cheaper than|up to|max(?:imum)?|at most)\s+{_MONEY}", re.I), "max"),
+    (re.compile(rf"\b(?:over|above|more than|at least|min(?:imum)?|from)\s+{_MONEY}", re.I), "min"),
+]
+
+
+def parse_price_filter(query: str) -> Tuple[str, Optional[float], Optional[float]]:
+    """Split "pizza under $10" into ("pizza", None, 10.0).
+
+    Only phrases that parse as a price filter are removed from the text; a query without
+    one is returned unchanged.
+    """
+    lo = hi = None
+    text = query or ""
+    for pattern, kind in _PRICE_PATTERNS:
+        m = pattern.search(text)
+        if not m:
             continue
-        index[merchant_id] = {
-            "keywords": keywords,
-            "items": items,
-            "desc": desc,
-            "hours": hours,
-            "location": location,
-            "wallet": wallet,
+        amounts = [float(g) for g in m.groups() if g is not None]
+        if kind == "between":
+            lo, hi = min(amounts[:2]), max(amounts[:2])
+        elif kind == "max":
+            hi = amounts[0]
+        else:
+            lo = amounts[0]
+        text = text[:m.start()] + " " + text[m.end():]
+    return text, lo, hi
+
+
+def _price_value(price: Optional[str]) -> Optional[float]:
+    try:
+        value = Decimal(str(price).strip().lstrip("$"))
+    except (InvalidOperation, ValueError):
+        return None
+    return float(value) if value.is_finite() else None
+
+
+class ItemIndex:
+    """Searchable (merchant_id, slug, display, latest price) entries for all live items."""
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.text = InvertedIndex(k1=k1, b=b)
+        self.items: Dict[str, Dict] = {}
+        self._by_merchant: Dict[str, List[str]] = {}
+        # (price, item key), kept sorted for range queries
+        self._prices: List[Tuple[float, str]] = []
+
+    @staticmethod
+    def _key(merchant_id: str, slug: str) -> str:
+        # Slugs are [a-z0-9_] (see utils._normalize_item_name), so "/" cannot be ambiguous
+        return f"{merchant_id}/{slug}"
+
+    def set_merchant(self, merchant_id: str, menu: Iterable[Dict]) -> None:
+        """Replace one merchant's items with `menu` ([{slug, display, price}, ...])."""
+        mid = str(merchant_id)
+        self.remove_merchant(mid)
+        keys = []
+        for item in menu or ():
+            key = self._key(mid, item["slug"])
+            entry = {
+                "merchant_id": mid,
+                "slug": item["slug"],
+                "item": item.get("display") or item["slug"],
+                "price": item.get("price"),
+            }
+            value = _price_value(entry["price"])
+            self.items[key] = entry
+            self.text.add(key, {"keywords": Counter(_tokenize(entry["item"]))})
+            if value is not None:
+                bisect.insort(self._prices, (value, key))
+            entry["_value"] = value
+            keys.append(key)
+        if keys:
+            self._by_merchant[mid] = keys
+
+    def remove_merchant(self, merchant_id: str) -> None:
+        for key in self._by_merchant.pop(str(merchant_id), ()):
+            entry = self.items.pop(key)
+            self.text.remove(key)
+            if entry["_value"] is not None:
+                i = bisect.bisect_left(self._prices, (entry["_value"], key))
+                if i < len(self._prices) and self._prices[i] == (entry["_value"], key):
+                    del self._prices[i]
+
+    def in_price_range(self, lo: Optional[float], hi: Optional[float]) -> List[str]:
+        """Item keys with lo <= price <= hi, cheapest first."""
+        start = 0 if lo is None else bisect.bisect_left(self._prices, (lo, ""))
+        end = len(self._prices) if hi is None else bisect.bisect_right(self._prices, (hi, "\uffff"))
+        return [key for _, key in self._prices[start:end]]
+
+    def search(self, tokens: List[str], lo: Optional[float] = None, hi: Optional[float] = None,
+               top_k: int = 10, fuzzy: bool = False) -> List[Dict]:
+        """Items matching `tokens` within the price range; with no tokens, the cheapest in range."""
+        if not tokens:
+            if lo is None and hi is None:
+                return []
+            return [self._hit(key, None) for key in self.in_price_range(lo, hi)[:top_k]]
+        if lo is None and hi is None:
+            allow = None
+        else:
+            low = float("-inf") if lo is None else lo
+            high = float("inf") if hi is None else hi
+
+            def allow(key: str) -> bool:
+                value = self.items[key]["_value"]
+                return value is not None and low <= value <= high
+        return [self._hit(key, score) for key, score in self.text.search(tokens, top_k, fuzzy=fuzzy, allow=allow)]
+
+    def _hit(self, key: str, score: Optional[float]) -> Dict:
+        entry = self.items[key]
+        hit = {k: v for k, v in entry.items() if not k.startswith("_")}
+        hit["score"] = None if score is None else round(score, 4)
+        return hit
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+def _merchant_text(data: Dict) -> str:
+    """What a merchant's similarity vector is built from: item names, description, location."""
+    parts = [item.get("display") or item.get("slug") or "" for item in data.get("menu") or []]
+    parts.extend(data.get(k) or "" for k in ("desc", "location"))
+    return " ".join(p for p in parts if p)
+
+
+def _shard_path(merchant_id: str, base_dir: str = DEFAULT_DIR) -> str:
+    return os.path.join(base_dir, "index", f"merchant_{merchant_id}.json")
+
+
+# Shard fields identifying what a document was built from, saved with it by checkpoint()
+_SOURCE_KEYS = ("ino", "size", "mtime_ns", "backend_version")
+# Merchants re-indexed since the checkpoint before the background thread writes a new one
+CHECKPOINT_DELTA = int(os.getenv("INDEX_CHECKPOINT_DELTA", "1000"))
+
+
+class MerchantIndexStore:
+    """Search index maintained per merchant from each file's inode, size, mtime and byte offset.
+
+    Every merchant has a shard (base_dir/index/merchant_<id>.json) with its file identity,
+    the offset parsed so far and the parser state. refresh() only touches merchants whose
+    file changed: appended bytes are parsed from the stored offset, a rewritten (e.g.
+    compacted) file is parsed again from the start, and only that merchant's postings in
+    `inverted` are replaced. One merchant's edit therefore costs O(that merchant).
+
+    Once start()ed the store is a hot in-process cache: searches only read memory and the
+    mapped checkpoint, and merchants are re-indexed by a background thread when they are
+    invalidated, either by this process's storage writers or by the directory watcher
+    (writes from other processes). `generation` increases with every applied change.
+
+    With a non-file StorageBackend (e.g. SQLite) there are no offsets to resume from: a
+    merchant whose backend version changed is re-read from the backend's latest-wins
+    facts, which are already compact.
+
+    checkpoint() writes the served documents, with the file identity (or backend version)
+    each was built from, to base_dir/index.bin. The next start maps that file and serves
+    keyword queries from it (see LayeredIndex) instead of reading every shard; merchants
+    re-indexed since are kept in memory on top, and a merchant's shard is read only once
+    its file no longer matches the checkpoint. The background thread folds the changes
+    into a new checkpoint once CHECKPOINT_DELTA merchants have changed. The item index and
+    similarity vectors are built from the served documents on their first query.
+    """
+
+    SHARD_VERSION = 2
+
+    def __init__(self, base_dir: str = DEFAULT_DIR, backend: StorageBackend | None = None):
+        self.base_dir = base_dir
+        # None: index the merchant files directly (incrementally, by byte offset)
+        self.backend = backend if backend is not None and backend.kind != "file" else None
+        # Database file watched for writes from other processes (e.g. merchants.db, merchants.db-wal)
+        self._backend_file = os.path.basename(getattr(self.backend, "path", "") or "")
+        self.inverted = LayeredIndex()
+        # Created on the first item search (see _item_index)
+        self.items: ItemIndex | None = None
+        # Created on the first similarity search (see enable_vectors)
+        self.vectors: VectorIndex | None = None
+        # Shards of the merchants indexed since the checkpoint (see _shard for the others)
+        self._shards: Dict[str, Dict] = {}
+        self._loaded = False
+        self.full_parses = 0
+        self.tail_parses = 0
+        self.seeded = 0
+        self.generation = 0
+        # Generation the on-disk checkpoint reflects (None: there is none, or it is partial)
+        self._checkpoint_generation: int | None = None
+        # Guards `inverted` for readers; _refresh_lock serializes the (file reading) writers
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._dirty: set = set()
+        self._dirty_all = False
+        self._wake = threading.Event()
+        self._started = False
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+        self._watcher: DirectoryWatcher | None = None
+        self.watch_mode = "off"
+
+    def _load_shards(self) -> None:
+        seeded = self._seed_from_checkpoint()
+        shard_dir = os.path.join(self.base_dir, "index")
+        names = os.listdir(shard_dir) if os.path.isdir(shard_dir) else []
+        complete = True
+        for name in names:
+            if not name.startswith("merchant_") or not name.endswith(".json"):
+                continue
+            mid = name[len("merchant_") : -len(".json")]
+            if self.inverted.in_base(mid):
+                continue
+            shard = self._read_shard(mid)
+            if shard is None:
+                continue
+            complete = False
+            self._shards[mid] = shard
+            self._swap(mid, _MerchantDoc(shard.get("state")).data())
+        if seeded and complete:
+            self._checkpoint_generation = self.generation
+        self._loaded = True
+
+    def _seed_from_checkpoint(self) -> bool:
+        """Serve the documents saved by checkpoint() from the mapped file; shards stay on disk."""
+        mapped = open_mapped_index(self.base_dir)
+        if mapped is None:
+            return False
+        if mapped.n_docs and "keywords" not in mapped.doc(0):
+            # Saved by save_index, not checkpoint(): no per-document keywords or sources
+            mapped.close()
+            return False
+        with self._lock:
+            self.inverted = LayeredIndex(mapped)
+        self.seeded = mapped.n_docs
+        return True
+
+    def _shard(self, mid: str) -> Dict | None:
+        """The merchant's shard, or the source of its checkpoint document (marked seeded)."""
+        shard = self._shards.get(mid)
+        if shard is None:
+            source = self.inverted.source(mid)
+            if source is not None:
+                shard = dict(source, seeded=True)
+        return shard
+
+    def _known(self, mid: str) -> bool:
+        return mid in self._shards or self.inverted.in_base(mid)
+
+    def _read_shard(self, mid: str) -> Dict | None:
+        try:
+            with open(_shard_path(mid, self.base_dir), "r", encoding="utf-8") as f:
+                shard = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(shard, dict) or shard.get("version") != self.SHARD_VERSION:
+            return None
+        return shard
+
+    def refresh(self, merchant_ids: Iterable[str] | None = None) -> List[str]:
+        """Re-index changed merchants (all, or just merchant_ids); returns the ids that changed."""
+        with self._refresh_lock:
+            changed = self._refresh_locked(merchant_ids)
+        if changed:
+            with self._lock:
+                self.generation += 1
+        return changed
+
+    def _refresh_locked(self, merchant_ids: Iterable[str] | None) -> List[str]:
+        if not self._loaded:
+            self._load_shards()
+        if self.backend is not None:
+            return self._refresh_from_backend(merchant_ids)
+        if merchant_ids is None:
+            files = dict(_iter_merchant_files(self.base_dir))
+            targets = set(files) | set(self._shards) | set(self.inverted.base_ids())
+        else:
+            targets = {str(m) for m in merchant_ids}
+            files = {}
+            for mid in targets:
+                path = merchant_file(mid, self.base_dir)
+                if os.path.exists(path):
+                    files[mid] = path
+        # Merchants without a shard (cold start, new files) are parsed in parallel first;
+        # the loop below then only sees what changed since those parses
+        cold = sorted(mid for mid in files if mid in targets and not self._known(mid))
+        prefetched = set()
+        if len(cold) >= PARALLEL_MIN_FILES:
+            for mid, shard in zip(cold, _parse_files([files[mid] for mid in cold])):
+                if shard is not None:
+                    self._install(mid, shard)
+                    self.full_parses += 1
+                    prefetched.add(mid)
+        changed = []
+        for mid in sorted(targets):
+            path = files.get(mid)
+            if path is None:
+                if self._known(mid):
+                    self._drop(mid)
+                    changed.append(mid)
+            elif self._update(mid, path) or mid in prefetched:
+                changed.append(mid)
+        return changed
+
+    def _refresh_from_backend(self, merchant_ids: Iterable[str] | None) -> List[str]:
+        versions = self.backend.versions()
+        if merchant_ids is None:
+            targets = set(versions) | set(self._shards) | set(self.inverted.base_ids())
+        else:
+            targets = {str(m) for m in merchant_ids}
+        changed = []
+        for mid in sorted(targets):
+            version = versions.get(mid)
+            if version is None:
+                if self._known(mid):
+                    self._drop(mid)
+                    changed.append(mid)
+                continue
+            shard = self._shard(mid)
+            if shard is not None and shard.get("backend_version") == version:
+                continue
+            doc = _MerchantDoc()
+            for line in self.backend.lines(mid):
+                doc.feed(line)
+            self.full_parses += 1
+            self._install(mid, {"backend_version": version, "state": doc.state()})
+            changed.append(mid)
+        return changed
+
+    def _update(self, mid: str, path: str) -> bool:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        identity = (st.st_ino, st.st_size, st.st_mtime_ns)
+        shard = self._shard(mid)
+        if shard is not None and "ino" not in shard:
+            # Shard from another backend: rebuild it from the file
+            shard = None
+        if shard and (shard["ino"], shard["size"], shard["mtime_ns"]) == identity:
+            return False
+        if shard and shard.get("seeded"):
+            # Changed since the checkpoint: continue from the merchant's own shard
+            shard = self._read_shard(mid)
+            if shard is not None and "ino" not in shard:
+                shard = None
+            if shard and (shard["ino"], shard["size"], shard["mtime_ns"]) == identity:
+                # Another process indexed this change after the checkpoint was written
+                self._shards[mid] = shard
+                self._swap(mid, _MerchantDoc(shard["state"]).data())
+                return True
+        resume = bool(shard) and shard["ino"] == st.st_ino and st.st_size >= shard["offset"]
+        if resume:
+            with open(path, "rb") as f:
+                tail = shard["tail"].encode("latin-1")
+                if tail:
+                    f.seek(shard["offset"] - len(tail))
+                    resume = f.read(len(tail)) == tail
+                if resume:
+                    f.seek(shard["offset"])
+                    data = f.read()
+        if not resume:
+            # New, replaced (e.g. compacted) or rewritten in place: parse from the start
+            new = _parse_merchant_file(path)
+            if new is None:
+                return False
+            self.full_parses += 1
+            self._install(mid, new)
+            return True
+        doc, end = _parse_chunk(data, shard["state"])
+        self.tail_parses += 1
+        self._install(mid, {
+            "ino": st.st_ino,
+            "size": st.st_size,
+            # A partially written tail is re-examined on the next refresh
+            "mtime_ns": st.st_mtime_ns if end == len(data) else 0,
+            "offset": shard["offset"] + end,
+            "tail": (tail + data[:end])[-TAIL_CHECK:].decode("latin-1"),
+            "state": doc.state(),
+        })
+        return True
+
+    def _install(self, mid: str, shard: Dict) -> None:
+        """Persist a merchant's new shard and swap its doc into the in-memory indexes."""
+        shard["version"] = self.SHARD_VERSION
+        self._write_shard(mid, shard)
+        self._shards[mid] = shard
+        self._swap(mid, _MerchantDoc(shard["state"]).data())
+
+    def _swap(self, mid: str, data: Dict) -> None:
+        with self._lock:
+            self.inverted.add(mid, data)
+            if self.items is not None:
+                self.items.set_merchant(mid, data["menu"])
+            if self.vectors is not None:
+                self.vectors.set(mid, _merchant_text(data))
+
+    def _write_shard(self, mid: str, shard: Dict) -> None:
+        path = _shard_path(mid, self.base_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(shard, f)
+            os.replace(tmp, path)
+        except OSError:
+            # The in-memory index is still updated; the shard is rewritten on the next change
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _drop(self, mid: str) -> None:
+        self._shards.pop(mid, None)
+        with self._lock:
+            self.inverted.remove(mid)
+            if self.items is not None:
+                self.items.remove_merchant(mid)
+            if self.vectors is not None:
+                self.vectors.remove(mid)
+        try:
+            os.remove(_shard_path(mid, self.base_dir))
+        except OSError:
+            pass
+
+    def checkpoint(self) -> str | None:
+        """Save the served documents to index.bin and serve from it; None if up to date.
+
+        The in-memory changes are folded into the new file, so afterwards `inverted` holds
+        no delta and the shards of the folded merchants are dropped from memory.
+        """
+        with self._refresh_lock:
+            if not self._loaded or self._checkpoint_generation == self.generation:
+                return None
+            # Only refreshes change the documents, and they wait for _refresh_lock
+            generation = self.generation
+            index = {}
+            for mid, data in self.inverted.docs.items():
+                shard = self._shard(mid) or {}
+                source = {k: shard[k] for k in _SOURCE_KEYS if k in shard}
+                index[mid] = dict(data, source=source)
+            try:
+                path = write_index(_binary_index_path(self.base_dir), index, with_keywords=True)
+            except OSError:
+                return None
+            self._checkpoint_generation = generation
+            mapped = open_mapped_index(self.base_dir)
+            if mapped is not None:
+                with self._lock:
+                    old, self.inverted = self.inverted, LayeredIndex(mapped)
+                    self._shards.clear()
+                old.close()
+            return path
+
+    def _maybe_checkpoint(self) -> None:
+        """Fold the in-memory changes into index.bin once there is no checkpoint or they pile up."""
+        delta = len(self.inverted.delta)
+        if delta and (self.inverted.base is None or delta >= CHECKPOINT_DELTA):
+            self.checkpoint()
+
+    def start(self, watch: str = WATCH_MODE) -> None:
+        """Index everything once, then keep the index current in the background."""
+        with self._refresh_lock:
+            if self._started:
+                return
+            self._started = True
+            self._stopping = False
+        try:
+            self.refresh()
+            self._maybe_checkpoint()
+        except Exception:
+            # Serve what the shards hold; the watcher and writers fill in the rest
+            pass
+        os.makedirs(self.base_dir, exist_ok=True)
+        self._watcher = DirectoryWatcher(self.base_dir, self._on_file_change, mode=watch)
+        self.watch_mode = self._watcher.start()
+        self._thread = threading.Thread(target=self._run, name=f"index:{self.base_dir}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        with self._refresh_lock:
+            self._started = False
+        self.checkpoint()
+
+    def invalidate(self, merchant_id: str | None = None) -> None:
+        """Mark a merchant (or, with None, every merchant) for re-indexing; no I/O here."""
+        with self._lock:
+            if merchant_id is None:
+                self._dirty_all = True
+            else:
+                self._dirty.add(str(merchant_id))
+        self._wake.set()
+
+    def _on_file_change(self, name: str) -> None:
+        if name.startswith("merchant_") and name.endswith(".metta"):
+            self.invalidate(name[len("merchant_") : -len(".metta")])
+        elif self._backend_file and name.startswith(self._backend_file):
+            # The backend's database (or its journal) changed in another process: compare versions
+            self.invalidate()
+
+    def sync(self) -> List[str]:
+        """Apply pending invalidations now (the background thread does this on its own)."""
+        with self._lock:
+            everything, dirty = self._dirty_all, self._dirty
+            self._dirty_all, self._dirty = False, set()
+        if not (everything or dirty):
+            return []
+        return self.refresh(None if everything else dirty)
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wake.wait()
+            self._wake.clear()
+            if self._stopping:
+                break
+            try:
+                self.sync()
+                self._maybe_checkpoint()
+            except Exception:
+                # Keep serving the current generation; the next change retries
+                continue
+
+    def search(self, tokens: List[str], top_k: int = 5, fuzzy: bool = False) -> List[Tuple[str, float, Dict]]:
+        """BM25 hits as (merchant_id, score, doc), from memory and the mapped checkpoint."""
+        with self._lock:
+            hits = self.inverted.search(tokens, top_k, fuzzy=fuzzy)
+            return [(mid, score, self.inverted.doc(mid)) for mid, score in hits]
+
+    def _item_index(self) -> ItemIndex:
+        """The item index, built from the served documents on first use (call with _lock held)."""
+        if self.items is None:
+            items = ItemIndex()
+            for mid, data in self.inverted.docs.items():
+                items.set_merchant(mid, data["menu"])
+            self.items = items
+        return self.items
+
+    def search_items(self, tokens: List[str], lo: float | None = None, hi: float | None = None,
+                     top_k: int = 10, fuzzy: bool = False) -> List[Dict]:
+        with self._lock:
+            return self._item_index().search(tokens, lo, hi, top_k=top_k, fuzzy=fuzzy)
+
+    def enable_vectors(self) -> bool:
+        """Start keeping similarity vectors (built from the indexed docs); False without numpy."""
+        if not vectors_available():
+            return False
+        with self._lock:
+            if self.vectors is None:
+                vectors = VectorIndex(capacity=max(1024, len(self.inverted)))
+                vectors.set_many((mid, _merchant_text(d)) for mid, d in self.inverted.docs.items())
+                self.vectors = vectors
+        return True
+
+    def search_similar(self, query: str, top_k: int = 5) -> List[Tuple[str, float, Dict]]:
+        """Cosine hits as (merchant_id, score, doc); requires enable_vectors()."""
+        with self._lock:
+            hits = self.vectors.search(query, top_k)
+            return [(mid, score, self.inverted.doc(mid)) for mid, score in hits]
+
+    def suggest(self, prefix: str, limit: int = 5) -> List[str]:
+        with self._lock:
+            return self.inverted.suggest(prefix, limit)
+
+    def stats(self) -> Dict:
+        return {
+            "merchants": len(self.inverted),
+            "terms": self.inverted.n_terms,
+            "items": len(self.items) if self.items is not None else None,
+            "delta": len(self.inverted.delta),
+            "vectors": len(self.vectors) if self.vectors is not None else None,
+            "full_parses": self.full_parses,
+            "tail_parses": self.tail_parses,
+            "seeded": self.seeded,
+            "generation": self.generation,
+            "watch": self.watch_mode,
+            "pending": len(self._dirty) + int(self._dirty_all),
         }
-    return index
 
 
-def _index_path(base_dir: str = DEFAULT_DIR) -> str:
+_STORES: Dict[str, MerchantIndexStore] = {}
+
+
+def index_store(base_dir: str = DEFAULT_DIR) -> MerchantIndexStore:
+    key = os.path.abspath(base_dir)
+    store = _STORES.get(key)
+    if store is None:
+        store = _STORES[key] = MerchantIndexStore(base_dir, storage_backend(base_dir))
+    return store
+
+
+def _on_storage_write(path: str) -> None:
+    # Writers in this process invalidate the hot index directly, without waiting for the watcher
+    store = _STORES.get(os.path.abspath(os.path.dirname(path)))
+    if store is not None and store._started:
+        store._on_file_change(os.path.basename(path))
+
+
+add_write_listener(_on_storage_write)
+
+
+def refresh_index(base_dir: str = DEFAULT_DIR, merchant_ids: Iterable[str] | None = None) -> List[str]:
+    """Bring the per-merchant index up to date (e.g. once after a bulk import)."""
+    return index_store(base_dir).refresh(merchant_ids)
+
+
+# Format save_index writes: "binary" (index.bin, mmap-able; see index_format) or "json"
+INDEX_FORMAT = os.getenv("SEARCH_INDEX_FORMAT", "binary")
+
+
+def _json_index_path(base_dir: str = DEFAULT_DIR) -> str:
     return os.path.join(base_dir, "index.json")
 
 
+def _binary_index_path(base_dir: str = DEFAULT_DIR) -> str:
+    return os.path.join(base_dir, "index.bin")
+
+
+def _index_path(base_dir: str = DEFAULT_DIR) -> str:
+    """The saved index file in use: index.bin if present, else index.json."""
+    path = _binary_index_path(base_dir)
+    return path if os.path.exists(path) else _json_index_path(base_dir)
+
+
 def _latest_metta_mtime(base_dir: str = DEFAULT_DIR) -> float:
     latest = 0.0
     for _, path in _iter_merchant_files(base_dir):
@@ -155,9 +1239,8 @@ def index_is_stale(base_dir: str = DEFAULT_DIR) -> bool:
     return idx_mtime < _latest_metta_mtime(base_dir)
 
 
-def save_index(index: Dict[str, Dict], base_dir: str = DEFAULT_DIR) -> str:
+def save_index(index: Dict[str, Dict], base_dir: str = DEFAULT_DIR, format: str = INDEX_FORMAT) -> str:
     os.makedirs(base_dir, exist_ok=True)
-    path = _index_path(base_dir)
     # Convert Counters to plain dicts
     serializable = {}
     for mid, data in index.items():
@@ -166,65 +1249,143 @@ def save_index(index: Dict[str, Dict], base_dir: str = DEFAULT_DIR) -> str:
         if isinstance(kw, Counter):
             d["keywords"] = dict(kw)
         serializable[mid] = d
+    # Keep a single saved index so readers never pick up an older one in the other format
+    stale = _json_index_path(base_dir) if format == "binary" else _binary_index_path(base_dir)
+    if os.path.exists(stale):
+        os.remove(stale)
+    if format == "binary":
+        return write_index(_binary_index_path(base_dir), serializable)
+    path = _json_index_path(base_dir)
+    inv = InvertedIndex.from_index(serializable)
     with open(path, "w", encoding="utf-8") as f:
         json.dump({
             "base_dir": base_dir,
             "index": serializable,
+            # Inverted form, so search does not have to invert every merchant's Counter
+            "postings": inv.postings,
+            "doc_len": inv.doc_len,
         }, f)
     return path
 
 
-def load_index(base_dir: str = DEFAULT_DIR) -> Dict[str, Dict] | None:
-    path = _index_path(base_dir)
+def open_mapped_index(base_dir: str = DEFAULT_DIR) -> MappedIndex | None:
+    """Map index.bin for searching in place; None if absent or written by another format version."""
+    path = _binary_index_path(base_dir)
+    if read_version(path) != FORMAT_VERSION:
+        return None
+    try:
+        return MappedIndex(path, k1=BM25_K1, b=BM25_B)
+    except (OSError, ValueError):
+        return None
+
+
+def _read_index_file(base_dir: str = DEFAULT_DIR) -> Dict | None:
+    path = _json_index_path(base_dir)
     if not os.path.exists(path):
         return None
     try:
         with open(path, "r", encoding="utf-8") as f:
-            obj = json.load(f)
-            idx = obj.get("index") or {}
-            # Rehydrate keyword Counters
-            for mid, data in idx.items():
-                if isinstance(data, dict) and isinstance(data.get("keywords"), dict):
-                    data["keywords"] = Counter(data["keywords"])
-            return idx
+            return json.load(f)
     except Exception:
         return None
 
 
-def search_merchants(query: str, base_dir: str = DEFAULT_DIR, top_k: int = 5) -> List[Dict]:
-    """Simple keyword match over merchant index.
+def load_index(base_dir: str = DEFAULT_DIR) -> Dict[str, Dict] | None:
+    if os.path.exists(_binary_index_path(base_dir)):
+        # An unknown format version reads as missing, so callers rebuild it
+        mapped = open_mapped_index(base_dir)
+        if mapped is None:
+            return None
+        with mapped:
+            idx = mapped.to_index()
+    else:
+        obj = _read_index_file(base_dir)
+        if obj is None:
+            return None
+        idx = obj.get("index") or {}
+    # Rehydrate keyword Counters
+    for mid, data in idx.items():
+        if isinstance(data, dict) and isinstance(data.get("keywords"), dict):
+            data["keywords"] = Counter(data["keywords"])
+    return idx
+
+
+def load_inverted_index(base_dir: str = DEFAULT_DIR) -> InvertedIndex | None:
+    """Load the saved postings (or invert an index saved without them)."""
+    if os.path.exists(_binary_index_path(base_dir)):
+        idx = load_index(base_dir)
+        return InvertedIndex.from_index(idx) if idx is not None else None
+    obj = _read_index_file(base_dir)
+    if obj is None:
+        return None
+    idx = obj.get("index") or {}
+    postings, doc_len = obj.get("postings"), obj.get("doc_len")
+    if not isinstance(postings, dict) or not isinstance(doc_len, dict):
+        return InvertedIndex.from_index(idx)
+    inv = InvertedIndex()
+    inv.postings = postings
+    inv.terms = TermDictionary(postings)
+    inv.doc_len = {mid: int(n) for mid, n in doc_len.items()}
+    inv._total_len = sum(inv.doc_len.values())
+    inv.docs = idx
+    return inv
+
+
+def search_merchants(query: str, base_dir: str = DEFAULT_DIR, top_k: int = 5, fuzzy: bool = SEARCH_FUZZY,
+                     mode: str = SEARCH_MODE) -> List[Dict]:
+    """BM25 keyword search over the merchant inverted index.
 
-    Uses a cached index at base_dir/index.json when fresh; rebuilds if stale.
+    The index is served in process (see MerchantIndexStore) and built, or mapped from its
+    checkpoint, on the first search; afterwards it is updated in the background, so a
+    query reads no merchant files.
+    With `fuzzy`, misspelled or partial words ("piza", "burrit") match the indexed
+    terms they are close to or a prefix of. mode="vector" ranks by cosine similarity
+    of hashed character n-gram vectors instead (falls back to keywords without numpy).
     """
-    q_tokens = _tokenize(query)
+    # Price phrases ("under $10") filter items, not merchants; see search_items
+    text = parse_price_filter(query)[0]
+    q_tokens = _tokenize(text)
     if not q_tokens:
         return []
-    idx = None
-    try:
-        if index_is_stale(base_dir):
-            idx = build_index(base_dir)
-            save_index(idx, base_dir)
-        else:
-            idx = load_index(base_dir) or build_index(base_dir)
-            if idx is not None and not isinstance(idx, dict):
-                idx = build_index(base_dir)
-    except Exception:
-        idx = build_index(base_dir)
-    scored: List[Tuple[str, int]] = []
-    for mid, data in idx.items():
-        kw: Counter = data.get("keywords", Counter())
-        score = sum(kw.get(t, 0) for t in q_tokens)
-        if score > 0:
-            scored.append((mid, score))
-    scored.sort(key=lambda x: x[1], reverse=True)
+    store = index_store(base_dir)
+    store.start()
+    if mode == "vector" and store.enable_vectors():
+        hits = store.search_similar(text, top_k)
+    else:
+        hits = store.search(q_tokens, top_k, fuzzy=fuzzy)
     results: List[Dict] = []
-    for mid, score in scored[:top_k]:
-        d = idx[mid]
+    for mid, score, d in hits:
         results.append({
             "merchant_id": mid,
-            "score": score,
+            "score": round(score, 4),
             "items": d.get("items", [])[:5],
             "desc": d.get("desc"),
             "location": d.get("location"),
         })
     return results
+
+
+def suggest_queries(query: str, base_dir: str = DEFAULT_DIR, limit: int = 5) -> List[str]:
+    """Autocomplete: `query` with its last word completed from the indexed terms."""
+    q_tokens = _tokenize(query)
+    if not q_tokens:
+        return []
+    store = index_store(base_dir)
+    store.start()
+    head = " ".join(q_tokens[:-1])
+    return [f"{head} {term}" if head else term for term in store.suggest(q_tokens[-1], limit)]
+
+
+def search_items(query: str, base_dir: str = DEFAULT_DIR, top_k: int = 10, fuzzy: bool = SEARCH_FUZZY) -> List[Dict]:
+    """Menu items matching `query`, honouring price phrases ("pizza under $10", "$5-$8").
+
+    Returns [{merchant_id, slug, item, price, score}]; served from the hot index like
+    search_merchants. A query that is only a price range lists the cheapest items in it.
+    """
+    text, lo, hi = parse_price_filter(query)
+    q_tokens = _tokenize(text)
+    if not q_tokens and lo is None and hi is None:
+        return []
+    store = index_store(base_dir)
+    store.start()
+    return store.search_items(q_tokens, lo, hi, top_k=top_k, fuzzy=fuzzy)
@@ -1,5 +1,9 @@
 # knowledge.py
-from hyperon import MeTTa, E, S, ValueAtom
+import threading
+from typing import Tuple
+
+from hyperon import Atom, MeTTa, E, S, ValueAtom
+from .query_cache import bump
 
 def initialize_knowledge_graph(metta: MeTTa):
     """Initialize the MeTTa knowledge graph with comprehensive Fetch.ai/uAgents knowledge for real-time queries."""
@@ -215,9 +219,53 @@ def initialize_knowledge_graph(metta: MeTTa):
     metta.space().add_atom(E(S("faq"), S("How do I debug agent issues?"), ValueAtom("Use agent inspector URLs, check logs for error messages, verify agent registration on Almanac, and test with simple message exchanges.")))
     metta.space().add_atom(E(S("faq"), S("My agent isn't discoverable"), ValueAtom("Ensure your agent has a comprehensive readme with tags, domain descriptions, and clear input/output models for better search visibility.")))
     metta.space().add_atom(E(S("faq"), S("ASI:One API not working"), ValueAtom("Verify your API key is correct, check rate limits, ensure proper request format, and validate your authentication headers.")))
+    bump(metta)
 
 def seed_merchant_example(metta: MeTTa, merchant_name: str):
     """Optional: seed minimal merchant-facing data for demos/tests."""
     # Description and hours are intentionally minimal; real data should come from merchant setup flows.
     metta.space().add_atom(E(S("merchant-desc"), S(merchant_name), ValueAtom("Cozy pizza place with classic and specialty pies.")))
-    metta.space().add_atom(E(S("merchant-hours"), S(merchant_name), ValueAtom("Mon–Sun 10:00–22:00")))
\ No newline at end of file
+    metta.space().add_atom(E(S("merchant-hours"), S(merchant_name), ValueAtom("Mon–Sun 10:00–22:00")))
+    bump(metta)
+
+
+# Precompiled seed graph.
+# Building the atoms (E/S/ValueAtom construction) is most of initialize_knowledge_graph's cost;
+# the atoms are immutable and a space copies what it is given, so they are built once per
+# process and every new instance only adds them. They are recorded from the seed function
+# itself, so edits to it are picked up on the next start.
+
+class _AtomRecorder:
+    """Collects the atoms a seed function adds, in place of a MeTTa instance."""
+
+    def __init__(self):
+        self.atoms = []
+
+    def space(self):
+        return self
+
+    def add_atom(self, atom: Atom):
+        self.atoms.append(atom)
+
+
+_KNOWLEDGE_ATOMS = None
+_KNOWLEDGE_LOCK = threading.Lock()
+
+
+def knowledge_atoms() -> Tuple[Atom, ...]:
+    """The atoms initialize_knowledge_graph adds, built on first use."""
+    global _KNOWLEDGE_ATOMS
+    with _KNOWLEDGE_LOCK:
+        if _KNOWLEDGE_ATOMS is None:
+            recorder = _AtomRecorder()
+            initialize_knowledge_graph(recorder)
+            _KNOWLEDGE_ATOMS = tuple(recorder.atoms)
+        return _KNOWLEDGE_ATOMS
+
+
+def load_knowledge_graph(metta: MeTTa):
+    """Same graph as initialize_knowledge_graph, from the precompiled atoms."""
+    space = metta.space()
+    for atom in knowledge_atoms():
+        space.add_atom(atom)
+    bump(metta)
@@ -0,0 +1,107 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Materialized view of one merchant's menu, built in a single pass over its facts.
+# Fed either with storage lines as they are hydrated, or with the atoms returned by one
+# MeTTa match, so reading a menu never needs a per-item removed-menu/price/item-display query.
+# Later facts win (latest price, display name and description), matching the append-only store.
+
+_TOKEN = re.compile(r'"(?:\\.|[^"\\])*"|[^\s()]+')
+
+
+_ESCAPE = re.compile(r'\\(x[0-9a-fA-F]{2}|u\{[0-9a-fA-F]{1,6}\}|.)')
+_SIMPLE_ESCAPES = {"n": "\n", "r": "\r", "t": "\t"}
+
+
+def _unescape(m: "re.Match") -> str:
+    e = m.group(1)
+    if len(e) > 1:
+        return chr(int(e[1:3] if e[0] == "x" else e[2:-1], 16))
+    return _SIMPLE_ESCAPES.get(e, e)
+
+
+def _unquote(tok: str) -> str:
+    # Inverse of storage._quote, with MeTTa's escapes (\\ \" \n \r \t \xNN \u{N})
+    if len(tok) >= 2 and tok[0] == '"' and tok[-1] == '"':
+        return _ESCAPE.sub(_unescape, tok[1:-1])
+    return tok
+
+
+def parse_fact(text: str) -> Optional[Tuple[str, List[str]]]:
+    """Split a flat fact like (price cheese_pizza "5") into ("price", ["cheese_pizza", "5"])."""
+    s = text.strip()
+    if not (s.startswith("(") and s.endswith(")")):
+        return None
+    toks = _TOKEN.findall(s[1:-1])
+    if not toks:
+        return None
+    return toks[0], [_unquote(t) for t in toks[1:]]
+
+
+class MenuProjection:
+    """Menu items, latest prices, display names, descriptions and tombstones for one merchant."""
+
+    __slots__ = ("merchant", "slugs", "display", "price", "desc", "removed", "meta", "version")
+
+    # merchant-level relations kept as latest-wins metadata
+    META_RELATIONS = ("merchant-wallet", "merchant-desc", "merchant-hours", "merchant-location")
+
+    def __init__(self, merchant: str):
+        self.merchant = str(merchant)
+        self.slugs: Dict[str, None] = {}  # insertion-ordered set of menu slugs
+        self.display: Dict[str, str] = {}
+        self.price: Dict[str, str] = {}
+        self.desc: Dict[str, str] = {}
+        self.removed: set = set()
+        self.meta: Dict[str, str] = {}
+        # Bumped on every applied fact so callers can cache derived views
+        self.version = 0
+
+    def apply(self, text: str) -> bool:
+        """Fold one fact into the projection; returns False if it is not a menu fact."""
+        fact = parse_fact(text)
+        if fact is None:
+            return False
+        rel, args = fact
+        if len(args) != 2:
+            return False
+        a, b = args
+        if rel == "menu":
+            if a != self.merchant:
+                return False
+            self.slugs.setdefault(b)
+        elif rel == "removed-menu":
+            if a != self.merchant:
+                return False
+            self.removed.add(b)
+        elif rel == "price":
+            self.price[a] = b
+        elif rel == "item-display":
+            self.display[a] = b
+        elif rel == "item-desc":
+            self.desc[a] = b
+        elif rel in self.META_RELATIONS:
+            if a != self.merchant:
+                return False
+            self.meta[rel] = b
+        else:
+            return False
+        self.version += 1
+        return True
+
+    def items(self) -> List[Dict[str, Optional[str]]]:
+        """Live (not tombstoned) items in menu order."""
+        return [
+            {
+                "slug": slug,
+                "display": self.display.get(slug) or slug,
+                "price": self.price.get(slug),
+                "desc": self.desc.get(slug),
+            }
+            for slug in self.slugs
+            if slug not in self.removed
+        ]
+
+    def menu(self) -> List[Tuple[str, Optional[str]]]:
+        """(display name, latest price) pairs, same shape as get_menu_for_merchant."""
+        return [(i["display"], i["price"]) for i in self.items()]
@@ -0,0 +1,95 @@
+import csv
+import io
+import os
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Tuple
+
+from .utils import _normalize_item_name
+
+# Validation for bulk menu imports (JSON rows or CSV with a name,price[,description] header).
+# Rows are checked and slugged up front so the merchant agent can persist a whole
+# catalog as one storage record instead of one add_item round trip per item.
+
+MAX_IMPORT_ROWS = int(os.getenv("MENU_IMPORT_MAX_ROWS", "5000"))
+MAX_NAME_CHARS = 120
+MAX_DESC_CHARS = 1000
+
+_NAME_KEYS = ("name", "item", "item_name", "title")
+_PRICE_KEYS = ("price", "cost", "amount")
+_DESC_KEYS = ("description", "desc", "item_desc")
+# Line breaks and other control characters (names and descriptions are single-line text)
+_CONTROL_CHARS = re.compile(r"[\x00-\x1f\x7f-\x9f\u2028\u2029]")
+
+
+def _first(row: Dict[str, Any], keys) -> Any:
+    for k in keys:
+        if row.get(k) not in (None, ""):
+            return row[k]
+    return None
+
+
+def parse_csv_rows(text: str) -> List[Dict[str, Any]]:
+    """Read CSV text with a header row into dicts keyed by lower-cased column name."""
+    reader = csv.DictReader(io.StringIO(text.lstrip("﻿")))
+    if reader.fieldnames:
+        reader.fieldnames = [(f or "").strip().lower() for f in reader.fieldnames]
+    return [dict(r) for r in reader]
+
+
+def _normalize_price(value: Any) -> str | None:
+    s = str(value).strip().lstrip("$").strip()
+    try:
+        d = Decimal(s)
+    except InvalidOperation:
+        return None
+    if not d.is_finite() or d < 0:
+        return None
+    return s
+
+
+def validate_menu_rows(rows: List[Any]) -> Tuple[List[Dict[str, str]], List[Dict[str, Any]]]:
+    """Validate import rows; returns (items, errors).
+
+    items are {"slug", "name", "price", "desc"} with slugs from _normalize_item_name;
+    errors are {"row", "error"} with 1-based row numbers. A slug may appear only once.
+    """
+    items: List[Dict[str, str]] = []
+    errors: List[Dict[str, Any]] = []
+    if len(rows) > MAX_IMPORT_ROWS:
+        return [], [{"row": None, "error": f"too many rows ({len(rows)} > {MAX_IMPORT_ROWS})"}]
+    seen: Dict[str, int] = {}
+    for n, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({"row": n, "error": "row must be an object"})
+            continue
+        row = {str(k).strip().lower(): v for k, v in row.items() if k is not None}
+        name = str(_first(row, _NAME_KEYS) or "").strip()
+        if not name:
+            errors.append({"row": n, "error": "missing item name"})
+            continue
+        if len(name) > MAX_NAME_CHARS:
+            errors.append({"row": n, "error": f"name longer than {MAX_NAME_CHARS} characters"})
+            continue
+        if _CONTROL_CHARS.search(name):
+            errors.append({"row": n, "error": "name contains line breaks or control characters"})
+            continue
+        raw_price = _first(row, _PRICE_KEYS)
+        price = _normalize_price(raw_price) if raw_price is not None else None
+        if price is None:
+            errors.append({"row": n, "error": f"invalid price {raw_price!r}"})
+            continue
+        desc = str(_first(row, _DESC_KEYS) or "").strip()
+        if len(desc) > MAX_DESC_CHARS:
+            errors.append({"row": n, "error": f"description longer than {MAX_DESC_CHARS} characters"})
+            continue
+        if _CONTROL_CHARS.search(desc):
+            errors.append({"row": n, "error": "description contains line breaks or control characters"})
+            continue
+        slug = _normalize_item_name(name)
+        if slug in seen:
+            errors.append({"row": n, "error": f"duplicate item {name!r} (same as row {seen[slug]})"})
+            continue
+        seen[slug] = n
+        items.append({"slug": slug, "name": name, "price": price, "desc": desc})
+    return items, errors
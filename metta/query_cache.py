@@ -0,0 +1,110 @@
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+# Memoized metta.run query results (and other space reads), per MeTTa instance.
+# Every instance carries a write generation. Code that changes a space (the add_atom helpers,
+# run_facts, hydrator removals, GeneralRAG.add_knowledge) calls bump(metta), which drops the
+# instance's cached results; reads of an unchanged space then cost a dict lookup instead of
+# an interpreter pattern match. Results are shared between callers and must not be mutated.
+
+QUERY_CACHE_SIZE = int(os.getenv("METTA_QUERY_CACHE_SIZE", "1024"))  # per instance; 0 disables
+
+
+class _SpaceCache:
+    __slots__ = ("ref", "generation", "results")
+
+    def __init__(self, ref):
+        self.ref = ref
+        self.generation = 0
+        self.results: "OrderedDict[str, tuple]" = OrderedDict()
+
+
+# hyperon.MeTTa is unhashable, so instances are keyed by id() and checked against a weakref
+_SPACES: Dict[int, _SpaceCache] = {}
+_LOCK = threading.Lock()
+_STATS = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _forget(key: int, entry: _SpaceCache) -> None:
+    with _LOCK:
+        if _SPACES.get(key) is entry:
+            del _SPACES[key]
+
+
+def _entry(metta) -> Optional[_SpaceCache]:
+    """Cache state for metta (caller holds _LOCK); None if metta can't be weak-referenced."""
+    key = id(metta)
+    entry = _SPACES.get(key)
+    if entry is not None and entry.ref() is metta:
+        return entry
+    try:
+        ref = weakref.ref(metta)
+    except TypeError:
+        return None
+    entry = _SPACES[key] = _SpaceCache(ref)
+    weakref.finalize(metta, _forget, key, entry)
+    return entry
+
+
+def bump(metta) -> None:
+    """Record a write to metta's space: results cached for it so far are dropped."""
+    with _LOCK:
+        entry = _SPACES.get(id(metta))
+        if entry is None or entry.ref() is not metta:
+            return
+        entry.generation += 1
+        if entry.results:
+            entry.results.clear()
+            _STATS["invalidations"] += 1
+
+
+def generation(metta) -> int:
+    with _LOCK:
+        entry = _SPACES.get(id(metta))
+        return entry.generation if entry is not None and entry.ref() is metta else 0
+
+
+def cached_run(metta, query: str):
+    """metta.run(query), memoized until the next bump(metta)."""
+    return cached_query(metta, query, lambda: metta.run(query))
+
+
+def cached_query(metta, key: str, compute: Callable[[], Any]):
+    """compute() for a read of metta's space, memoized under key until the next bump(metta)."""
+    if QUERY_CACHE_SIZE <= 0:
+        return compute()
+    with _LOCK:
+        entry = _entry(metta)
+        if entry is None:
+            return compute()
+        hit = entry.results.get(key)
+        if hit is not None and hit[0] == entry.generation:
+            entry.results.move_to_end(key)
+            _STATS["hits"] += 1
+            return hit[1]
+        gen = entry.generation
+        _STATS["misses"] += 1
+    result = compute()
+    with _LOCK:
+        # A write that raced the query bumped the generation: don't cache what it may have missed
+        if entry.generation == gen and _SPACES.get(id(metta)) is entry:
+            entry.results[key] = (gen, result)
+            if len(entry.results) > QUERY_CACHE_SIZE:
+                entry.results.popitem(last=False)
+    return result
+
+
+def query_cache_stats() -> dict:
+    with _LOCK:
+        hits, misses = _STATS["hits"], _STATS["misses"]
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "invalidations": _STATS["invalidations"],
+            "spaces": len(_SPACES),
+            "entries": sum(len(e.results) for e in _SPACES.values()),
+        }
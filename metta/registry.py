@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from .menu import MenuProjection
+from .storage import DEFAULT_DIR, FileBackend, StorageBackend
+
+# One MeTTa space per merchant instead of a single global instance.
+# A merchant's space is created lazily on first use, hydrated from storage (its
+# merchant_<id>.metta file by default, or any StorageBackend), and dropped again when it
+# has been idle too long or the registry is over capacity (least recently used first).
+# Since storage is the source of truth, an evicted merchant is simply rebuilt from it on
+# the next request.
+
+MERCHANT_SPACES_MAX = int(os.getenv("MERCHANT_SPACES_MAX", "256"))
+MERCHANT_SPACE_IDLE_S = float(os.getenv("MERCHANT_SPACE_IDLE_S", "1800"))
+
+
+def _default_factory():
+    from hyperon import MeTTa
+    return MeTTa()
+
+
+class _Entry:
+    __slots__ = ("metta", "hydrator", "last_used")
+
+    def __init__(self, metta, hydrator):
+        self.metta = metta
+        self.hydrator = hydrator
+        self.last_used = time.monotonic()
+
+
+class MerchantSpaceRegistry:
+    """LRU registry of per-merchant MeTTa spaces kept in sync with storage."""
+
+    def __init__(
+        self,
+        factory: Callable = _default_factory,
+        base_dir: str = DEFAULT_DIR,
+        max_spaces: int = MERCHANT_SPACES_MAX,
+        idle_ttl: float = MERCHANT_SPACE_IDLE_S,
+        backend: StorageBackend | None = None,
+    ):
+        self.factory = factory
+        self.base_dir = base_dir
+        self.backend = backend or FileBackend(base_dir)
+        self.max_spaces = max(1, max_spaces)
+        self.idle_ttl = idle_ttl
+        self._spaces: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+
+    def get(self, merchant_label: str):
+        """Return the merchant's MeTTa space, creating and hydrating it as needed."""
+        return self._hydrated(str(merchant_label)).metta
+
+    def menu(self, merchant_label: str) -> MenuProjection:
+        """The merchant's materialized menu, kept current by the same hydration pass."""
+        key = str(merchant_label)
+        return self._hydrated(key).hydrator.menu(key)
+
+    def _hydrated(self, key: str) -> _Entry:
+        with self._lock:
+            entry = self._spaces.get(key)
+            if entry is None:
+                metta = self.factory()
+                entry = _Entry(metta, self.backend.hydrator(metta))
+                self._spaces[key] = entry
+                self.created += 1
+            else:
+                self._spaces.move_to_end(key)
+            entry.last_used = time.monotonic()
+            self._evict_locked(keep=key)
+        try:
+            entry.hydrator.hydrate(key)
+        except Exception:
+            # A failed hydrate leaves the space as it was; the next read retries
+            pass
+        return entry
+
+    def invalidate(self, merchant_label: str) -> None:
+        """Reload this merchant from storage on next use (e.g. after its file was rewritten)."""
+        with self._lock:
+            entry = self._spaces.get(str(merchant_label))
+        if entry is not None:
+            entry.hydrator.invalidate(str(merchant_label))
+
+    def evict(self, merchant_label: str) -> bool:
+        with self._lock:
+            if self._spaces.pop(str(merchant_label), None) is None:
+                return False
+            self.evicted += 1
+            return True
+
+    def evict_idle(self) -> int:
+        """Drop spaces unused for longer than idle_ttl; returns how many were evicted."""
+        with self._lock:
+            before = self.evicted
+            self._evict_locked()
+            return self.evicted - before
+
+    def _evict_locked(self, keep: str | None = None) -> None:
+        now = time.monotonic()
+        for key in list(self._spaces):
+            if key == keep:
+                continue
+            over = len(self._spaces) > self.max_spaces
+            idle = self.idle_ttl > 0 and now - self._spaces[key].last_used > self.idle_ttl
+            if not (over or idle):
+                # Entries are in LRU order: later ones are fresher than this one
+                break
+            del self._spaces[key]
+            self.evicted += 1
+
+    def __contains__(self, merchant_label) -> bool:
+        return str(merchant_label) in self._spaces
+
+    def __len__(self) -> int:
+        return len(self._spaces)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = list(self._spaces.values())
+        full_loads = sum(e.hydrator.full_loads for e in entries)
+        tail_loads = sum(e.hydrator.tail_loads for e in entries)
+        return {
+            "spaces": len(entries),
+            "max_spaces": self.max_spaces,
+            "created": self.created,
+            "evicted": self.evicted,
+            "full_loads": full_loads,
+            "tail_loads": tail_loads,
+        }
@@ -0,0 +1,322 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Tuple
+
+from .menu import MenuProjection, parse_fact
+from .query_cache import bump
+from .storage import (
+    DEFAULT_DIR,
+    FSYNC_POLICY,
+    StorageBackend,
+    committed_lines,
+    ensure_dir,
+    merchant_file,
+    run_facts,
+    _merchant_order,
+    _notify_write,
+    _quote,
+)
+
+# SQLite storage backend (METTA_STORAGE_BACKEND=sqlite).
+# Keeps each merchant's latest-wins state in indexed tables instead of an append-only log:
+#   merchants    id -> version, bumped by every committed record
+#   menu         one row per (merchant, slug): menu position (NULL until a menu fact),
+#                display name and description
+#   prices       latest price per (merchant, slug); the most frequent write, kept narrow
+#   tombstones   removed (merchant, slug) pairs; a removed item stays hidden, as in the log
+#   metadata     latest merchant-wallet/desc/hours/location value per merchant
+#   other_facts  any other fact line, kept once, so export/import round-trips
+# A record is one transaction, so a crash keeps all or none of a mutation's facts.
+# snapshot() reads everything about a merchant in a single query, which both serves
+# profiles directly and hydrates MeTTa.
+
+SQLITE_PATH = os.getenv("METTA_SQLITE_PATH", "")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS merchants (
+    merchant TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS menu (
+    merchant TEXT NOT NULL,
+    slug TEXT NOT NULL,
+    pos INTEGER,
+    display TEXT,
+    description TEXT,
+    PRIMARY KEY (merchant, slug)
+);
+CREATE INDEX IF NOT EXISTS menu_by_pos ON menu (merchant, pos);
+CREATE TABLE IF NOT EXISTS prices (
+    merchant TEXT NOT NULL,
+    slug TEXT NOT NULL,
+    price TEXT NOT NULL,
+    PRIMARY KEY (merchant, slug)
+);
+CREATE TABLE IF NOT EXISTS tombstones (
+    merchant TEXT NOT NULL,
+    slug TEXT NOT NULL,
+    PRIMARY KEY (merchant, slug)
+);
+CREATE TABLE IF NOT EXISTS metadata (
+    merchant TEXT NOT NULL,
+    relation TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (merchant, relation)
+);
+CREATE TABLE IF NOT EXISTS other_facts (
+    seq INTEGER PRIMARY KEY,
+    merchant TEXT NOT NULL,
+    line TEXT NOT NULL,
+    UNIQUE (merchant, line)
+);
+"""
+
+_UPSERT_MENU = (
+    "INSERT INTO menu (merchant, slug, pos) "
+    "VALUES (?1, ?2, (SELECT COALESCE(MAX(pos), -1) + 1 FROM menu WHERE merchant = ?1)) "
+    "ON CONFLICT (merchant, slug) DO UPDATE SET pos = COALESCE(menu.pos, excluded.pos)"
+)
+_UPSERT_DISPLAY = (
+    "INSERT INTO menu (merchant, slug, display) VALUES (?, ?, ?) "
+    "ON CONFLICT (merchant, slug) DO UPDATE SET display = excluded.display"
+)
+_UPSERT_DESC = (
+    "INSERT INTO menu (merchant, slug, description) VALUES (?, ?, ?) "
+    "ON CONFLICT (merchant, slug) DO UPDATE SET description = excluded.description"
+)
+_UPSERT_PRICE = (
+    "INSERT INTO prices (merchant, slug, price) VALUES (?, ?, ?) "
+    "ON CONFLICT (merchant, slug) DO UPDATE SET price = excluded.price"
+)
+_UPSERT_META = (
+    "INSERT INTO metadata (merchant, relation, value) VALUES (?, ?, ?) "
+    "ON CONFLICT (merchant, relation) DO UPDATE SET value = excluded.value"
+)
+_BUMP_VERSION = (
+    "INSERT INTO merchants (merchant, version) VALUES (?, 1) "
+    "ON CONFLICT (merchant) DO UPDATE SET version = version + 1"
+)
+
+# Everything about one merchant, tagged by part: 0 items (slug, display, price, desc; pos
+# orders the menu), 1 metadata, 2 tombstones, 3 other facts, 4 the version
+_SNAPSHOT = """
+SELECT 0, m.pos, m.slug, m.display, p.price, m.description
+  FROM menu m LEFT JOIN prices p ON p.merchant = m.merchant AND p.slug = m.slug
+ WHERE m.merchant = :m
+UNION ALL SELECT 1, NULL, relation, value, NULL, NULL FROM metadata WHERE merchant = :m
+UNION ALL SELECT 2, NULL, slug, NULL, NULL, NULL FROM tombstones WHERE merchant = :m
+UNION ALL SELECT 3, seq, line, NULL, NULL, NULL FROM other_facts WHERE merchant = :m
+UNION ALL SELECT 4, version, NULL, NULL, NULL, NULL FROM merchants WHERE merchant = :m
+ORDER BY 1, 2
+"""
+
+# METTA_FSYNC maps onto SQLite's durability levels (WAL: NORMAL syncs at checkpoints)
+_SYNCHRONOUS = {"always": "FULL", "interval": "NORMAL", "never": "OFF"}
+
+_META_RELATIONS = MenuProjection.META_RELATIONS
+
+
+class SqliteBackend(StorageBackend):
+    """Merchant facts in one SQLite database (base_dir/merchants.db unless METTA_SQLITE_PATH)."""
+
+    kind = "sqlite"
+
+    def __init__(self, base_dir: str = DEFAULT_DIR, path: str | None = None, fsync: str = FSYNC_POLICY):
+        super().__init__(base_dir)
+        self.path = path or SQLITE_PATH or os.path.join(ensure_dir(base_dir), "merchants.db")
+        self.synchronous = _SYNCHRONOUS.get(fsync, "NORMAL")
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        # Part of every version string, so a recreated database never repeats an old version
+        self._epoch = os.stat(self.path).st_ino
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; transactions are opened explicitly
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def append(self, merchant_label: str, lines: List[str]) -> None:
+        mid = str(merchant_label)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for line in committed_lines(lines):
+                self._apply(conn, mid, line)
+            conn.execute(_BUMP_VERSION, (mid,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        # Listeners key on the merchant's path under base_dir (e.g. the hot search index)
+        _notify_write(merchant_file(mid, self.base_dir))
+
+    @staticmethod
+    def _apply(conn: sqlite3.Connection, mid: str, line: str) -> None:
+        fact = parse_fact(line)
+        rel, args = fact if fact is not None else (None, [])
+        if len(args) == 2:
+            a, b = args
+            if rel == "menu" and a == mid:
+                conn.execute(_UPSERT_MENU, (mid, b))
+                return
+            if rel == "item-display":
+                conn.execute(_UPSERT_DISPLAY, (mid, a, b))
+                return
+            if rel == "item-desc":
+                conn.execute(_UPSERT_DESC, (mid, a, b))
+                return
+            if rel == "price":
+                conn.execute("INSERT OR IGNORE INTO menu (merchant, slug) VALUES (?, ?)", (mid, a))
+                conn.execute(_UPSERT_PRICE, (mid, a, b))
+                return
+            if rel == "removed-menu" and a == mid:
+                conn.execute("INSERT OR IGNORE INTO tombstones (merchant, slug) VALUES (?, ?)", (mid, b))
+                return
+            if rel in _META_RELATIONS and a == mid:
+                conn.execute(_UPSERT_META, (mid, rel, b))
+                return
+        conn.execute("INSERT OR IGNORE INTO other_facts (merchant, line) VALUES (?, ?)", (mid, line))
+
+    def snapshot(self, merchant_label: str) -> Tuple[str, MenuProjection, List[str]]:
+        """(version, projection, latest-wins fact lines) for a merchant, from one query."""
+        mid = str(merchant_label)
+        rows = self._conn().execute(_SNAPSHOT, {"m": mid}).fetchall()
+        proj = MenuProjection(mid)
+        proj.removed = {a for part, _, a, *_ in rows if part == 2}
+        version = 0
+        items: List[str] = []
+        rest: List[str] = []
+        for part, pos, a, b, c, d in rows:
+            if part == 0:
+                slug, display, price, desc = a, b, c, d
+                live = slug not in proj.removed
+                # item-display first so single-pass readers see the name before the menu fact
+                if display is not None:
+                    proj.display[slug] = display
+                    if live:
+                        items.append(f"(item-display {slug} {_quote(display)})")
+                if pos is not None:
+                    proj.slugs[slug] = None
+                    if live:
+                        items.append(f"(menu {mid} {slug})")
+                if price is not None:
+                    proj.price[slug] = price
+                    if live:
+                        items.append(f"(price {slug} {_quote(price)})")
+                if desc is not None:
+                    proj.desc[slug] = desc
+                    if live:
+                        items.append(f"(item-desc {slug} {_quote(desc)})")
+            elif part == 1:
+                proj.meta[a] = b
+                rest.append(f"({a} {mid} {_quote(b)})")
+            elif part == 2:
+                rest.append(f"(removed-menu {mid} {a})")
+            elif part == 3:
+                rest.append(a)
+            else:
+                version = pos
+        lines = items + rest
+        proj.version = len(lines)
+        return f"{self._epoch}-{version}" if version else "0", proj, lines
+
+    def lines(self, merchant_label: str) -> List[str]:
+        return self.snapshot(merchant_label)[2]
+
+    def profile(self, merchant_label: str) -> MenuProjection:
+        return self.snapshot(merchant_label)[1]
+
+    def merchants(self) -> List[str]:
+        rows = self._conn().execute("SELECT merchant FROM merchants").fetchall()
+        return sorted((r[0] for r in rows), key=_merchant_order)
+
+    def version(self, merchant_label: str) -> str:
+        row = self._conn().execute(
+            "SELECT version FROM merchants WHERE merchant = ?", (str(merchant_label),)
+        ).fetchone()
+        return f"{self._epoch}-{row[0]}" if row else "0"
+
+    def versions(self) -> Dict[str, str]:
+        rows = self._conn().execute("SELECT merchant, version FROM merchants").fetchall()
+        return {mid: f"{self._epoch}-{v}" for mid, v in rows}
+
+    def hydrator(self, metta) -> "SqliteHydrator":
+        return SqliteHydrator(self, metta)
+
+
+class SqliteHydrator:
+    """Keeps one MeTTa instance in sync with SqliteBackend, like MerchantHydrator does with files.
+
+    A merchant whose version changed is re-read with snapshot() (one query); only the
+    fact lines that differ from what is loaded are removed from or added to the space,
+    so a price edit costs one removal and one insert rather than a full reload.
+    """
+
+    def __init__(self, backend: SqliteBackend, metta):
+        self.backend = backend
+        self.metta = metta
+        # merchant -> (version, loaded fact lines, projection)
+        self._state: Dict[str, Tuple[str, Dict[str, None], MenuProjection]] = {}
+        self.full_loads = 0
+        self.tail_loads = 0
+
+    def hydrate(self, merchant_label: str) -> int:
+        """Bring the MeTTa instance up to date with the database; returns new facts loaded."""
+        key = str(merchant_label)
+        state = self._state.get(key)
+        if state is not None and state[0] == self.backend.version(key):
+            return 0
+        version, proj, lines = self.backend.snapshot(key)
+        loaded = state[1] if state is not None else {}
+        wanted = dict.fromkeys(lines)
+        stale = [line for line in loaded if line not in wanted]
+        self._remove(stale)
+        added = run_facts(self.metta, [line for line in wanted if line not in loaded])
+        kept = {line: None for line in loaded if line in wanted}
+        kept.update(dict.fromkeys(added))
+        if state is None:
+            self.full_loads += 1
+        else:
+            self.tail_loads += 1
+        self._state[key] = (version, kept, proj)
+        return len(added)
+
+    def menu(self, merchant_label: str) -> MenuProjection:
+        state = self._state.get(str(merchant_label))
+        return state[2] if state is not None else MenuProjection(merchant_label)
+
+    def invalidate(self, merchant_label: str) -> None:
+        """Unload the merchant; the next hydrate reloads it from the database."""
+        state = self._state.pop(str(merchant_label), None)
+        if state is not None:
+            self._remove(list(state[1]))
+
+    def _remove(self, lines: List[str]) -> None:
+        space = self.metta.space()
+        for line in lines:
+            try:
+                space.remove_atom(self.metta.parse_single(line))
+            except Exception:
+                continue
+        bump(self.metta)
+
+    def stats(self) -> dict:
+        return {
+            "merchants": len(self._state),
+            "full_loads": self.full_loads,
+            "tail_loads": self.tail_loads,
+        }
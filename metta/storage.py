@@ -1,5 +1,14 @@
+import atexit
 import os
-from typing import Iterable
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List
+
+from .menu import MenuProjection, parse_fact
+from .query_cache import bump
 
 # Simple line-based storage and loader for MeTTa facts.
 # Each fact is written as a single S-expression per line, e.g.:
@@ -7,8 +16,30 @@ from typing import Iterable
 # (item-display cheese_pizza "cheese pizza")
 # (price cheese_pizza "5")
 # (merchant-wallet 1 "0x...")
+# A mutation that spans several facts is written as one framed record:
+# #begin
+# (menu 1 cheese_pizza)
+# ...
+# #end
+# Readers go through committed_lines(), which drops a record whose #end never made it
+# to disk; loaders that predate framing simply see the markers as comments.
 
 DEFAULT_DIR = os.getenv("METTA_STORAGE_DIR", "metta_store")
+# Compact a merchant file once this share of its fact lines is superseded history
+COMPACT_GARBAGE_RATIO = float(os.getenv("METTA_COMPACT_GARBAGE_RATIO", "0.5"))
+# ...and only once it has at least this many lines, so small files are left alone
+COMPACT_MIN_LINES = int(os.getenv("METTA_COMPACT_MIN_LINES", "64"))
+# fsync policy for appends: "always" (every mutation), "interval" (at most
+# METTA_FSYNC_INTERVAL_MS after a write, by a timer if no later write gets there first)
+# or "never" (leave it to the OS)
+FSYNC_POLICY = os.getenv("METTA_FSYNC", "interval")
+FSYNC_INTERVAL_MS = int(os.getenv("METTA_FSYNC_INTERVAL_MS", "200"))
+
+# Called with the file path after every append or compaction (e.g. search index invalidation)
+_WRITE_LISTENERS: List[Callable[[str], None]] = []
+
+RECORD_BEGIN = "#begin"
+RECORD_END = "#end"
 
 
 def ensure_dir(path: str = DEFAULT_DIR) -> str:
@@ -22,73 +53,942 @@ def merchant_file(merchant_label: str, base_dir: str = DEFAULT_DIR) -> str:
     return os.path.join(base_dir, f"merchant_{safe}.metta")
 
 
+def merchant_version(merchant_label: str, base_dir: str = DEFAULT_DIR) -> str:
+    """Cheap version stamp for a merchant's persisted facts (size + mtime).
+
+    Changes whenever the merchant file is appended to or rewritten; "0" if absent.
+    """
+    try:
+        st = os.stat(merchant_file(merchant_label, base_dir))
+    except OSError:
+        return "0"
+    return f"{st.st_size}-{st.st_mtime_ns}"
+
+
+def _iter_merchant_files(base_dir: str = DEFAULT_DIR):
+    if not os.path.isdir(base_dir):
+        return
+    for name in os.listdir(base_dir):
+        if not name.startswith("merchant_") or not name.endswith(".metta"):
+            continue
+        path = os.path.join(base_dir, name)
+        # merchant_<id>.metta → <id>
+        mid = name[len("merchant_") : -len(".metta")]
+        yield mid, path
+
+
+def _merchant_order(mid: str) -> tuple:
+    # numeric ids first, in numeric order
+    return (not mid.isdigit(), int(mid) if mid.isdigit() else 0, mid)
+
+
+def list_merchants(base_dir: str = DEFAULT_DIR) -> List[str]:
+    """Return all merchant_ids that have a storage file, sorted (numeric ids first)."""
+    return sorted((mid for mid, _ in _iter_merchant_files(base_dir)), key=_merchant_order)
+
+
+# Characters a string literal may not hold raw: quotes, backslashes, and anything that ends a
+# line or is a control character (str.splitlines breaks on \x0b-\x0c, \x1c-\x1e, \x85, \u2028-9)
+_UNSAFE_CHARS = re.compile(r'[\\"\x00-\x1f\x7f\x85\u2028\u2029]')
+# NUL is dropped: hyperon aborts the process on a string atom holding one
+_ESCAPES = {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t", "\x00": ""}
+
+
+def _escape_char(m: "re.Match") -> str:
+    c = m.group(0)
+    if c in _ESCAPES:
+        return _ESCAPES[c]
+    return f"\\x{ord(c):02x}" if ord(c) < 0x80 else f"\\u{{{ord(c):x}}}"
+
+
 def _quote(s: str) -> str:
-    # Escape double quotes; MeTTa uses ASCII form with quotes for strings
-    return '"' + str(s).replace('"', '\\"') + '"'
+    # MeTTa string literal on one line: a value can never split a fact or a #begin/#end record
+    return '"' + _UNSAFE_CHARS.sub(_escape_char, str(s)) + '"'
+
+
+def add_write_listener(listener: Callable[[str], None]) -> None:
+    if listener not in _WRITE_LISTENERS:
+        _WRITE_LISTENERS.append(listener)
+
+
+def _notify_write(path: str) -> None:
+    for listener in list(_WRITE_LISTENERS):
+        try:
+            listener(path)
+        except Exception:
+            # Listeners are best-effort cache invalidation; never fail the write
+            continue
+
+
+def committed_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Yield the stripped fact lines of committed records only.
+
+    Lines between #begin and #end are held back until #end is seen, so a record torn
+    by a crash mid-write is skipped. Blank lines and comments are dropped.
+    """
+    pending = None
+    for raw in lines:
+        line = raw.strip()
+        if line == RECORD_BEGIN:
+            pending = []
+        elif line == RECORD_END:
+            if pending is not None:
+                yield from pending
+            pending = None
+        elif not line or line.startswith("#"):
+            continue
+        elif pending is not None:
+            pending.append(line)
+        else:
+            yield line
+
+
+def _committed_prefix(data: bytes) -> int:
+    """Length of the longest prefix of data ending on a complete line outside an open record."""
+    safe = pos = 0
+    open_record = False
+    while True:
+        nl = data.find(b"\n", pos)
+        if nl < 0:
+            return safe
+        line = data[pos:nl].strip()
+        pos = nl + 1
+        if line == RECORD_BEGIN.encode():
+            open_record = True
+        elif line == RECORD_END.encode():
+            open_record = False
+        if not open_record:
+            safe = pos
+
+
+# A torn-tail check on open reads the file backwards in blocks of this size
+_TAIL_BLOCK = 64 * 1024
+_MARKER_LINE = re.compile(rb"^[ \t\r\f\v]*(?:%s|%s)[ \t\r\f\v]*\n" % (
+    re.escape(RECORD_BEGIN.encode()), re.escape(RECORD_END.encode())), re.M)
+
+
+def _committed_length(fd: int, size: int) -> int:
+    """_committed_prefix of the whole file, reading back only as far as the last record marker.
+
+    A marker line resets the record state, so scanning from the last complete one
+    gives the same answer as scanning from the start.
+    """
+    pos, tail = size, b""
+    while pos > 0:
+        start = max(0, pos - _TAIL_BLOCK)
+        tail = os.pread(fd, pos - start, start) + tail
+        pos = start
+        marker = None
+        for m in _MARKER_LINE.finditer(tail):
+            if m.start() or not pos:  # a match at a block edge may not start a line
+                marker = m.start()
+        if marker is not None:
+            return pos + marker + _committed_prefix(tail[marker:])
+    return _committed_prefix(tail)
+
+
+class FactWriter:
+    """Appender for one merchant file: one write() per record, fsync per policy.
+
+    The file descriptor stays open between mutations; compact_merchant_file closes it
+    (under exclusive()) before swapping the file so the next append reopens the new inode.
+    On first open, a record left unterminated by a crash is truncated away so later
+    appends are not swallowed into it; only the file's tail is read for that check.
+    With the "interval" policy a write that does not fsync arms a timer, so a dirty
+    file is synced within the interval even if no further write comes.
+    garbage() keeps the file's compaction accounting current as records are appended,
+    so checking the compaction threshold does not re-read the file.
+    """
+
+    def __init__(self, path: str, fsync: str = FSYNC_POLICY, interval_ms: int = FSYNC_INTERVAL_MS):
+        self.path = path
+        self.fsync = fsync
+        self.interval = interval_ms / 1000.0
+        self._fd = None
+        self._ino = None
+        self._dirty = False
+        self._last_sync = time.monotonic()
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+        self.records = 0
+        self.syncs = 0
+        self.scans = 0
+        # Compaction accounting for the file as of (inode, size); None until first asked
+        self._counts: "_GarbageCount | None" = None
+        self._counted = None
+
+    def append(self, lines: List[str]) -> None:
+        """Append facts as one record; several lines are framed so they commit together."""
+        body = "".join(ln.rstrip("\n") + "\n" for ln in lines)
+        if len(lines) > 1:
+            body = f"{RECORD_BEGIN}\n{body}{RECORD_END}\n"
+        data = body.encode("utf-8")
+        with self._lock:
+            if self._fd is not None and not self._same_file_locked():
+                # Replaced or deleted behind our back (another process, a cleanup): reopen
+                self._close_locked()
+            if self._fd is None:
+                self._open_locked()
+            view = memoryview(data)
+            while view:
+                n = os.write(self._fd, view)
+                view = view[n:]
+            self.records += 1
+            self._dirty = True
+            if self._counts is not None:
+                self._count_appended_locked(lines, len(data))
+            if self.fsync == "always":
+                self._sync_locked()
+            elif self.fsync == "interval":
+                remaining = self._last_sync + self.interval - time.monotonic()
+                if remaining <= 0:
+                    self._sync_locked()
+                elif self._timer is None:
+                    self._timer = threading.Timer(remaining, self._sync_due)
+                    self._timer.daemon = True
+                    self._timer.start()
+        _notify_write(self.path)
+
+    def _count_appended_locked(self, lines: List[str], size: int) -> None:
+        st = os.fstat(self._fd)
+        if self._counted != (st.st_ino, st.st_size - size):
+            # Someone else wrote or replaced the file: recount on the next garbage()
+            self._counts = None
+            return
+        for ln in lines:
+            ln = ln.strip()
+            if ln and not ln.startswith("#"):
+                self._counts.add(ln)
+        self._counted = (st.st_ino, st.st_size)
+
+    def garbage(self) -> tuple:
+        """(share of fact lines compaction would drop, fact line count) for the file.
+
+        The file is read once; afterwards appends through this writer update the counts,
+        and it is read again only if it changed some other way (another process, compaction).
+        """
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                self._counts = None
+                return 0.0, 0
+            if self._counts is None or self._counted != (st.st_ino, st.st_size):
+                counts = _GarbageCount()
+                with open(self.path, "rb") as f:
+                    data = f.read()
+                    ino = os.fstat(f.fileno()).st_ino
+                for line in committed_lines(data.decode("utf-8").splitlines()):
+                    counts.add(line)
+                self._counts, self._counted = counts, (ino, len(data))
+                self.scans += 1
+            return self._counts.ratio(), self._counts.total
+
+    def _sync_due(self) -> None:
+        with self._lock:
+            self._timer = None
+            try:
+                self._sync_locked()
+            except OSError:
+                # Retried by the next write's timer, or at close
+                pass
+
+    def _same_file_locked(self) -> bool:
+        try:
+            return os.stat(self.path).st_ino == self._ino
+        except OSError:
+            return False
+
+    def _open_locked(self) -> None:
+        fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        size = os.fstat(fd).st_size
+        if size:
+            committed = _committed_length(fd, size)
+            if committed < size:
+                os.ftruncate(fd, committed)
+        self._fd = fd
+        self._ino = os.fstat(fd).st_ino
+
+    def sync(self) -> None:
+        with self._lock:
+            self._sync_locked()
+
+    @contextmanager
+    def exclusive(self):
+        """Block appends and release the descriptor, e.g. while the file is replaced."""
+        with self._lock:
+            self._close_locked()
+            yield
+
+    def _sync_locked(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._fd is not None and self._dirty and self.fsync != "never":
+            os.fsync(self._fd)
+            self.syncs += 1
+        self._dirty = False
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_locked()
+
+    def _close_locked(self) -> None:
+        if self._fd is None:
+            return
+        try:
+            self._sync_locked()
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+
+_WRITERS: Dict[str, FactWriter] = {}
+_WRITERS_LOCK = threading.Lock()
+
+
+def writer_for(path: str) -> FactWriter:
+    key = os.path.abspath(path)
+    with _WRITERS_LOCK:
+        w = _WRITERS.get(key)
+        if w is None:
+            w = _WRITERS[key] = FactWriter(path)
+        return w
+
+
+def close_writer(path: str) -> None:
+    with _WRITERS_LOCK:
+        w = _WRITERS.pop(os.path.abspath(path), None)
+    if w is not None:
+        w.close()
+
+
+@atexit.register
+def close_writers() -> None:
+    """Flush and close every open writer (pending interval fsyncs happen here)."""
+    with _WRITERS_LOCK:
+        writers = list(_WRITERS.values())
+        _WRITERS.clear()
+    for w in writers:
+        try:
+            w.close()
+        except OSError:
+            continue
+
+
+def append_record(path: str, lines: List[str]) -> None:
+    """Append the facts of one logical mutation atomically."""
+    writer_for(path).append(lines)
 
 
 def append_fact_line(path: str, line: str) -> None:
-    with open(path, "a", encoding="utf-8") as f:
-        if not line.endswith("\n"):
-            line += "\n"
-        f.write(line)
+    append_record(path, [line])
+
+
+def _menu_item_lines(merchant_label: str, slug: str, display_name: str, price: str, desc: str | None = None) -> List[str]:
+    lines = [
+        # (menu <merchant> <slug>)
+        f"(menu {merchant_label} {slug})",
+        # (item-display <slug> "<display>")
+        f"(item-display {slug} {_quote(display_name)})",
+        # (price <slug> "<price>")
+        f"(price {slug} {_quote(price)})",
+    ]
+    if desc:
+        lines.append(f"(item-desc {slug} {_quote(desc)})")
+    return lines
+
+
+def _menu_items_lines(merchant_label: str, items: Iterable[Dict[str, str]]) -> tuple:
+    """(fact lines, item count) for {"slug", "name", "price", optional "desc"} items."""
+    lines: List[str] = []
+    count = 0
+    for item in items:
+        lines.extend(_menu_item_lines(merchant_label, item["slug"], item["name"], item["price"], item.get("desc")))
+        count += 1
+    return lines, count
+
+
+def _price_line(slug: str, price: str) -> str:
+    return f"(price {slug} {_quote(price)})"
+
+
+def _remove_item_line(merchant_label: str, slug: str) -> str:
+    return f"(removed-menu {merchant_label} {slug})"
+
+
+def _merchant_line(relation: str, merchant_label: str, value: str) -> str:
+    # merchant-wallet / merchant-desc / merchant-hours / merchant-location
+    return f"({relation} {merchant_label} {_quote(value)})"
+
+
+def _item_desc_line(slug: str, text: str) -> str:
+    return f"(item-desc {slug} {_quote(text)})"
 
 
 def append_menu_item(path: str, merchant_label: str, slug: str, display_name: str, price: str) -> None:
-    # (menu <merchant> <slug>)
-    append_fact_line(path, f"(menu {merchant_label} {slug})")
-    # (item-display <slug> "<display>")
-    append_fact_line(path, f"(item-display {slug} {_quote(display_name)})")
-    # (price <slug> "<price>")
-    append_fact_line(path, f"(price {slug} {_quote(price)})")
+    append_record(path, _menu_item_lines(merchant_label, slug, display_name, price))
+
+
+def append_menu_items(path: str, merchant_label: str, items: Iterable[Dict[str, str]]) -> int:
+    """Append many items ({"slug", "name", "price", optional "desc"}) as one record.
+
+    The whole batch commits or, after a crash mid-write, disappears together.
+    """
+    lines, count = _menu_items_lines(merchant_label, items)
+    if lines:
+        append_record(path, lines)
+    return count
 
 
 def append_price(path: str, slug: str, price: str) -> None:
-    append_fact_line(path, f"(price {slug} {_quote(price)})")
+    append_fact_line(path, _price_line(slug, price))
 
 
 def append_remove_item(path: str, merchant_label: str, slug: str) -> None:
-    append_fact_line(path, f"(removed-menu {merchant_label} {slug})")
+    append_fact_line(path, _remove_item_line(merchant_label, slug))
 
 
 def append_wallet(path: str, merchant_label: str, wallet: str) -> None:
-    append_fact_line(path, f"(merchant-wallet {merchant_label} {_quote(wallet)})")
+    append_fact_line(path, _merchant_line("merchant-wallet", merchant_label, wallet))
 
 
 def append_desc(path: str, merchant_label: str, desc: str) -> None:
-    append_fact_line(path, f"(merchant-desc {merchant_label} {_quote(desc)})")
+    append_fact_line(path, _merchant_line("merchant-desc", merchant_label, desc))
 
 
 def append_hours(path: str, merchant_label: str, hours: str) -> None:
-    append_fact_line(path, f"(merchant-hours {merchant_label} {_quote(hours)})")
+    append_fact_line(path, _merchant_line("merchant-hours", merchant_label, hours))
 
 
 def append_location(path: str, merchant_label: str, location: str) -> None:
-    append_fact_line(path, f"(merchant-location {merchant_label} {_quote(location)})")
+    append_fact_line(path, _merchant_line("merchant-location", merchant_label, location))
 
 
 def append_item_desc(path: str, slug: str, text: str) -> None:
-    append_fact_line(path, f"(item-desc {slug} {_quote(text)})")
+    append_fact_line(path, _item_desc_line(slug, text))
+
+
+# Fact lines handed to the interpreter per metta.run call when bulk loading
+BULK_LOAD_LINES = int(os.getenv("METTA_BULK_LOAD_LINES", "2048"))
+
+# One flat expression per line: bare tokens and double-quoted strings, no nesting or comments.
+# Every fact this module writes has this shape, so a chunk of them can't fail to parse halfway.
+_FLAT_FACT = re.compile(r'\([^()";]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^()";]*)*\)')
+
+
+def run_facts(metta, lines: Iterable[str]) -> List[str]:
+    """Add fact lines to metta's space with one metta.run per chunk; returns the lines loaded.
+
+    metta.run adds and indexes a whole program in a single call, far cheaper than
+    parse_single + add_atom per line. The interpreter stops at the first syntax error
+    with the atoms before it already added, so only lines matching _FLAT_FACT are batched.
+    Anything else is parsed and added on its own, in file order, and skipped if it fails.
+    Stored lines are data: `!` expressions are dropped, never evaluated.
+    """
+    loaded: List[str] = []
+    batch: List[str] = []
+
+    def flush() -> None:
+        if not batch:
+            return
+        try:
+            metta.run("\n".join(batch))
+            loaded.extend(batch)
+        except Exception:
+            # Validated facts do not fail to parse; leave the chunk out rather than re-add part of it
+            pass
+        batch.clear()
+
+    for line in lines:
+        if not line:
+            continue
+        if _FLAT_FACT.fullmatch(line):
+            batch.append(line)
+            if len(batch) >= BULK_LOAD_LINES:
+                flush()
+            continue
+        flush()
+        if line.lstrip().startswith("!"):
+            continue
+        try:
+            metta.space().add_atom(metta.parse_single(line))
+        except Exception:
+            # Skip malformed lines
+            continue
+        loaded.append(line)
+    flush()
+    # Also after a failed chunk: the interpreter may have added part of it
+    bump(metta)
+    return loaded
 
 
 def load_merchant_into(metta, merchant_label: str, base_dir: str = DEFAULT_DIR) -> None:
-    """Load all facts for a merchant into the provided MeTTa instance by running each line.
-    Safe to call multiple times; MeTTa append semantics handle duplicates.
+    """Load all facts for a merchant into the provided MeTTa instance in bulk (run_facts).
+    One-shot loader for fresh instances: calling it again re-adds every fact. Use
+    MerchantHydrator to keep a long-lived instance in sync with the file.
     """
     path = merchant_file(merchant_label, base_dir)
     if not os.path.exists(path):
         return
     try:
         with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                try:
-                    metta.run(line)
-                except Exception:
-                    # Skip malformed lines
-                    continue
+            run_facts(metta, committed_lines(f))
     except Exception:
         # Ignore load errors to avoid breaking read paths
         pass
+
+
+def load_menu_projection(merchant_label: str, base_dir: str = DEFAULT_DIR) -> MenuProjection:
+    """Materialize a merchant's menu straight from its storage file, without MeTTa."""
+    proj = MenuProjection(merchant_label)
+    path = merchant_file(merchant_label, base_dir)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in committed_lines(f):
+                proj.apply(line)
+    except OSError:
+        pass
+    return proj
+
+
+# Relations where only the latest fact per key matters: key = (relation, first argument)
+_LATEST_WINS_ITEM = ("item-display", "price", "item-desc")
+_LATEST_WINS_MERCHANT = ("merchant-wallet", "merchant-desc", "merchant-hours", "merchant-location")
+
+
+def _compacted_lines(lines: Iterable[str]) -> tuple:
+    """Reduce a fact log to its latest-wins state; returns (kept_lines, fact_line_count).
+
+    - menu facts are deduplicated, keeping first-seen (menu) order
+    - item-display/price/item-desc and merchant-* facts keep only the latest value
+    - tombstoned items lose their menu/display/price/desc lines; the removed-menu
+      tombstone itself is kept so a later re-add behaves exactly as before compaction
+    - any other fact is kept once; comments, record markers and torn records are dropped
+    """
+    menus: Dict[tuple, str] = {}
+    tombstones: Dict[tuple, str] = {}
+    latest: Dict[tuple, str] = {}
+    others: Dict[str, None] = {}
+    total = 0
+    for line in committed_lines(lines):
+        total += 1
+        fact = parse_fact(line)
+        rel, args = fact if fact is not None else (None, [])
+        if rel == "menu" and len(args) == 2:
+            menus.setdefault((args[0], args[1]), line)
+        elif rel == "removed-menu" and len(args) == 2:
+            tombstones.setdefault((args[0], args[1]), line)
+        elif rel in _LATEST_WINS_ITEM + _LATEST_WINS_MERCHANT and len(args) == 2:
+            key = (rel, args[0])
+            latest.pop(key, None)  # re-insert so output follows the latest write
+            latest[key] = line
+        else:
+            others.setdefault(line)
+    dead = {slug for (_m, slug) in tombstones}
+    kept: List[str] = []
+    for (m, slug), line in menus.items():
+        if (m, slug) in tombstones:
+            continue
+        # item-display first so single-pass readers see the display name before the menu fact
+        display = latest.pop(("item-display", slug), None)
+        if display is not None:
+            kept.append(display)
+        kept.append(line)
+        for rel in ("price", "item-desc"):
+            if (rel, slug) in latest:
+                kept.append(latest.pop((rel, slug)))
+    for (rel, key), line in latest.items():
+        if rel in _LATEST_WINS_ITEM and key in dead:
+            continue
+        kept.append(line)
+    kept.extend(tombstones.values())
+    kept.extend(others)
+    return kept, total
+
+
+class _GarbageCount:
+    """Running (kept, total) of _compacted_lines over a fact log, one line at a time."""
+
+    __slots__ = ("total", "menus", "tombstones", "dead", "latest", "others", "live_menus", "dead_latest")
+
+    def __init__(self):
+        self.total = 0
+        self.menus: set = set()
+        self.tombstones: set = set()
+        self.dead: set = set()
+        self.latest: set = set()
+        self.others: set = set()
+        self.live_menus = 0  # menu facts without a tombstone
+        self.dead_latest = 0  # latest item facts of tombstoned slugs
+
+    def add(self, line: str) -> None:
+        self.total += 1
+        fact = parse_fact(line)
+        rel, args = fact if fact is not None else (None, [])
+        if rel == "menu" and len(args) == 2:
+            key = (args[0], args[1])
+            if key not in self.menus:
+                self.menus.add(key)
+                self.live_menus += key not in self.tombstones
+        elif rel == "removed-menu" and len(args) == 2:
+            key = (args[0], args[1])
+            if key not in self.tombstones:
+                self.tombstones.add(key)
+                self.live_menus -= key in self.menus
+                if args[1] not in self.dead:
+                    self.dead.add(args[1])
+                    self.dead_latest += sum((r, args[1]) in self.latest for r in _LATEST_WINS_ITEM)
+        elif rel in _LATEST_WINS_ITEM + _LATEST_WINS_MERCHANT and len(args) == 2:
+            key = (rel, args[0])
+            if key not in self.latest:
+                self.latest.add(key)
+                self.dead_latest += rel in _LATEST_WINS_ITEM and args[0] in self.dead
+        else:
+            self.others.add(line)
+
+    @property
+    def kept(self) -> int:
+        return (self.live_menus + len(self.latest) - self.dead_latest
+                + len(self.tombstones) + len(self.others))
+
+    def ratio(self) -> float:
+        return (self.total - self.kept) / self.total if self.total else 0.0
+
+
+def compact_merchant_file(merchant_label: str, base_dir: str = DEFAULT_DIR) -> Dict[str, int]:
+    """Rewrite a merchant file to its latest-wins state atomically (temp file + rename).
+
+    Readers either see the old file or the compacted one; MerchantHydrator notices the
+    new inode and reloads the merchant once.
+    """
+    path = merchant_file(merchant_label, base_dir)
+    # Appends through this process wait until the new file is in place
+    with writer_for(path).exclusive():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                kept, total = _compacted_lines(f)
+        except OSError:
+            return {"before": 0, "after": 0}
+        tmp = f"{path}.compact.{os.getpid()}"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write("".join(line + "\n" for line in kept))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    _notify_write(path)
+    return {"before": total, "after": len(kept)}
+
+
+def garbage_ratio(merchant_label: str, base_dir: str = DEFAULT_DIR) -> tuple:
+    """(share of fact lines that compaction would drop, fact line count) for a merchant file.
+
+    Kept current by the file's FactWriter as records are appended (see FactWriter.garbage).
+    """
+    try:
+        return writer_for(merchant_file(merchant_label, base_dir)).garbage()
+    except OSError:
+        return 0.0, 0
+
+
+def maybe_compact(
+    merchant_label: str,
+    base_dir: str = DEFAULT_DIR,
+    threshold: float = COMPACT_GARBAGE_RATIO,
+    min_lines: int = COMPACT_MIN_LINES,
+) -> bool:
+    """Compact the merchant file if it is large enough and mostly garbage; returns True if rewritten."""
+    ratio, total = garbage_ratio(merchant_label, base_dir)
+    if total < min_lines or ratio < threshold:
+        return False
+    compact_merchant_file(merchant_label, base_dir)
+    return True
+
+
+class _HydrationState:
+    __slots__ = ("ino", "offset", "mtime_ns", "tail", "lines", "menu")
+
+    def __init__(self):
+        self.ino = None
+        self.offset = 0
+        self.mtime_ns = 0
+        self.tail = b""
+        self.lines: List[str] = []
+        self.menu: MenuProjection | None = None
+
+
+class MerchantHydrator:
+    """Incrementally ingest merchant_<id>.metta files into one MeTTa instance.
+
+    Remembers, per merchant, the byte offset already ingested and the facts it added,
+    so repeated reads only tail newly appended lines instead of re-running the whole
+    file. When a file is compacted or rewritten (new inode, shrink, or changed bytes
+    before the offset) the merchant's previously loaded atoms are removed and the
+    file is reloaded once. A MenuProjection per merchant is updated from the same
+    lines, so menus can be read without querying the interpreter.
+    """
+
+    # Bytes before the offset re-checked on each hydrate to detect in-place rewrites
+    TAIL_CHECK = 64
+
+    def __init__(self, metta, base_dir: str = DEFAULT_DIR):
+        self.metta = metta
+        self.base_dir = base_dir
+        self._state: Dict[str, _HydrationState] = {}
+        self.full_loads = 0
+        self.tail_loads = 0
+
+    def hydrate(self, merchant_label: str) -> int:
+        """Bring the MeTTa instance up to date with the merchant file; returns new facts loaded."""
+        path = merchant_file(merchant_label, self.base_dir)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return 0
+        state = self._state.setdefault(str(merchant_label), _HydrationState())
+        if state.ino == st.st_ino and state.offset == st.st_size and state.mtime_ns == st.st_mtime_ns:
+            return 0
+        with open(path, "rb") as f:
+            if state.ino is not None and not self._still_prefix(f, state, st):
+                self._unload(state)
+            if state.offset == 0:
+                self.full_loads += 1
+            else:
+                self.tail_loads += 1
+            f.seek(state.offset)
+            data = f.read()
+        # Only consume complete lines outside an open #begin record; the rest waits for the next call
+        end = _committed_prefix(data)
+        chunk = data[:end]
+        if state.menu is None:
+            state.menu = MenuProjection(merchant_label)
+        loaded = self._ingest(chunk.decode("utf-8", errors="replace"), state)
+        state.ino = st.st_ino
+        state.offset += end
+        state.mtime_ns = st.st_mtime_ns if end == len(data) else 0
+        state.tail = (state.tail + chunk)[-self.TAIL_CHECK:]
+        return loaded
+
+    def menu(self, merchant_label: str) -> MenuProjection:
+        """Materialized menu for what has been hydrated so far (call hydrate first)."""
+        state = self._state.get(str(merchant_label))
+        if state is None or state.menu is None:
+            return MenuProjection(merchant_label)
+        return state.menu
+
+    def invalidate(self, merchant_label: str) -> None:
+        """Force a full reload of this merchant on the next hydrate (e.g. after a rewrite)."""
+        state = self._state.get(str(merchant_label))
+        if state is not None:
+            self._unload(state)
+
+    def _still_prefix(self, f, state: _HydrationState, st) -> bool:
+        if st.st_ino != state.ino or st.st_size < state.offset:
+            return False
+        n = len(state.tail)
+        if n:
+            f.seek(state.offset - n)
+            if f.read(n) != state.tail:
+                return False
+        return True
+
+    def _unload(self, state: _HydrationState) -> None:
+        # Facts are loaded in bulk without keeping atom handles; re-parse them here, which only
+        # happens when a file is rewritten
+        space = self.metta.space()
+        for line in state.lines:
+            try:
+                space.remove_atom(self.metta.parse_single(line))
+            except Exception:
+                continue
+        bump(self.metta)
+        state.__init__()
+
+    def _ingest(self, text: str, state: _HydrationState) -> int:
+        loaded = run_facts(self.metta, committed_lines(text.splitlines()))
+        for line in loaded:
+            state.menu.apply(line)
+        state.lines.extend(loaded)
+        return len(loaded)
+
+    def stats(self) -> dict:
+        return {
+            "merchants": len(self._state),
+            "full_loads": self.full_loads,
+            "tail_loads": self.tail_loads,
+        }
+
+
+# Pluggable storage: where a merchant's facts live. "file" is the append-only
+# merchant_<id>.metta log above; "sqlite" (metta.sqlite_store) keeps the same
+# latest-wins state in indexed tables. Either way facts go in and out as MeTTa fact
+# lines, and the .metta format stays the export/import format between backends.
+STORAGE_BACKEND = os.getenv("METTA_STORAGE_BACKEND", "file")
+
+
+class StorageBackend(ABC):
+    """Merchant fact store: record appends, reads, versions, hydration and .metta export/import."""
+
+    kind = ""
+
+    def __init__(self, base_dir: str = DEFAULT_DIR):
+        self.base_dir = base_dir
+
+    # -- primitives each backend implements --
+
+    @abstractmethod
+    def append(self, merchant_label: str, lines: List[str]) -> None:
+        """Persist the facts of one logical mutation atomically."""
+
+    @abstractmethod
+    def lines(self, merchant_label: str) -> List[str]:
+        """The merchant's committed fact lines (later facts win)."""
+
+    @abstractmethod
+    def merchants(self) -> List[str]:
+        """Merchant ids with stored facts, numeric ids first."""
+
+    @abstractmethod
+    def version(self, merchant_label: str) -> str:
+        """Opaque stamp that changes on every write to the merchant; "0" if absent."""
+
+    @abstractmethod
+    def hydrator(self, metta):
+        """Keeps `metta` in sync with this store (hydrate/menu/invalidate/stats, as MerchantHydrator)."""
+
+    # -- derived, overridden where a backend has something cheaper --
+
+    def versions(self) -> Dict[str, str]:
+        return {mid: self.version(mid) for mid in self.merchants()}
+
+    def profile(self, merchant_label: str) -> MenuProjection:
+        """Menu, latest prices, descriptions and merchant metadata, without MeTTa."""
+        proj = MenuProjection(merchant_label)
+        for line in self.lines(merchant_label):
+            proj.apply(line)
+        return proj
+
+    def load_into(self, metta, merchant_label: str) -> int:
+        """Add the merchant's facts to a fresh MeTTa instance; returns facts loaded."""
+        return len(run_facts(metta, self.lines(merchant_label)))
+
+    def compact(self, merchant_label: str) -> Dict[str, int]:
+        n = len(self.lines(merchant_label))
+        return {"before": n, "after": n}
+
+    def maybe_compact(self, merchant_label: str) -> bool:
+        return False
+
+    def export_metta(self, merchant_label: str, path: str) -> int:
+        """Write the merchant's latest-wins facts to a .metta file; returns lines written."""
+        kept, _ = _compacted_lines(self.lines(merchant_label))
+        tmp = f"{path}.export.{os.getpid()}"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write("".join(line + "\n" for line in kept))
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return len(kept)
+
+    def import_metta(self, merchant_label: str, path: str) -> int:
+        """Append the committed facts of a .metta file as one record; returns lines imported."""
+        with open(path, "r", encoding="utf-8") as f:
+            lines = list(committed_lines(f))
+        if lines:
+            self.append(merchant_label, lines)
+        return len(lines)
+
+    # -- mutations, same facts as the append_* helpers --
+
+    def add_menu_item(self, merchant_label: str, slug: str, display_name: str, price: str) -> None:
+        self.append(merchant_label, _menu_item_lines(merchant_label, slug, display_name, price))
+
+    def add_menu_items(self, merchant_label: str, items: Iterable[Dict[str, str]]) -> int:
+        lines, count = _menu_items_lines(merchant_label, items)
+        if lines:
+            self.append(merchant_label, lines)
+        return count
+
+    def set_price(self, merchant_label: str, slug: str, price: str) -> None:
+        self.append(merchant_label, [_price_line(slug, price)])
+
+    def remove_item(self, merchant_label: str, slug: str) -> None:
+        self.append(merchant_label, [_remove_item_line(merchant_label, slug)])
+
+    def set_wallet(self, merchant_label: str, wallet: str) -> None:
+        self.append(merchant_label, [_merchant_line("merchant-wallet", merchant_label, wallet)])
+
+    def set_desc(self, merchant_label: str, desc: str) -> None:
+        self.append(merchant_label, [_merchant_line("merchant-desc", merchant_label, desc)])
+
+    def set_hours(self, merchant_label: str, hours: str) -> None:
+        self.append(merchant_label, [_merchant_line("merchant-hours", merchant_label, hours)])
+
+    def set_location(self, merchant_label: str, location: str) -> None:
+        self.append(merchant_label, [_merchant_line("merchant-location", merchant_label, location)])
+
+    def set_item_desc(self, merchant_label: str, slug: str, text: str) -> None:
+        self.append(merchant_label, [_item_desc_line(slug, text)])
+
+
+class FileBackend(StorageBackend):
+    """The merchant_<id>.metta files under base_dir."""
+
+    kind = "file"
+
+    def append(self, merchant_label: str, lines: List[str]) -> None:
+        append_record(merchant_file(merchant_label, self.base_dir), lines)
+
+    def lines(self, merchant_label: str) -> List[str]:
+        try:
+            with open(merchant_file(merchant_label, self.base_dir), "r", encoding="utf-8") as f:
+                return list(committed_lines(f))
+        except OSError:
+            return []
+
+    def merchants(self) -> List[str]:
+        return list_merchants(self.base_dir)
+
+    def version(self, merchant_label: str) -> str:
+        return merchant_version(merchant_label, self.base_dir)
+
+    def hydrator(self, metta) -> MerchantHydrator:
+        return MerchantHydrator(metta, self.base_dir)
+
+    def profile(self, merchant_label: str) -> MenuProjection:
+        return load_menu_projection(merchant_label, self.base_dir)
+
+    def compact(self, merchant_label: str) -> Dict[str, int]:
+        return compact_merchant_file(merchant_label, self.base_dir)
+
+    def maybe_compact(self, merchant_label: str) -> bool:
+        return maybe_compact(merchant_label, self.base_dir)
+
+
+_BACKENDS: Dict[tuple, StorageBackend] = {}
+_BACKENDS_LOCK = threading.Lock()
+
+
+def storage_backend(base_dir: str = DEFAULT_DIR, kind: str | None = None) -> StorageBackend:
+    """The shared backend for base_dir (METTA_STORAGE_BACKEND unless `kind` is given)."""
+    kind = (kind or STORAGE_BACKEND).lower()
+    key = (kind, os.path.abspath(base_dir))
+    with _BACKENDS_LOCK:
+        backend = _BACKENDS.get(key)
+        if backend is None:
+            if kind == "file":
+                backend = FileBackend(base_dir)
+            elif kind == "sqlite":
+                from .sqlite_store import SqliteBackend
+                backend = SqliteBackend(base_dir)
+            else:
+                raise ValueError(f"unknown METTA_STORAGE_BACKEND {kind!r} (expected file or sqlite)")
+            _BACKENDS[key] = backend
+        return backend
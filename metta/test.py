@@ -1,4 +1,4 @@
-from .knowledge import initialize_knowledge_graph
+from .knowledge import load_knowledge_graph
 from .generalrag import GeneralRAG
 from hyperon import MeTTa
 from .utils import add_menu_item, get_menu_for_merchant, remove_menu_item
@@ -10,7 +10,7 @@ def assert_equal(actual, expected, msg=""):
 def run_tests():
 	print("[MeTTa] Initializing knowledge graph...")
 	metta = MeTTa()
-	initialize_knowledge_graph(metta)
+	load_knowledge_graph(metta)
 	rag = GeneralRAG(metta)
 
 	# RAG sanity checks
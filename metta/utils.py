@@ -1,7 +1,9 @@
 import json
 from openai import OpenAI
 from .generalrag import GeneralRAG
-from hyperon import MeTTa, E, S, ValueAtom
+from .menu import MenuProjection
+from .query_cache import bump, cached_query, cached_run
+from hyperon import MeTTa, E, S, V, ValueAtom
 import re
 
 def _normalize_item_name(name: str) -> str:
@@ -20,21 +22,6 @@ def create_metta() -> MeTTa:
     """Factory to create and return a MeTTa instance."""
     return MeTTa()
 
-def _has_any_match(res) -> bool:
-    """Return True if the MeTTa result set contains any non-empty match.
-    Hyperon can return structures like [[], []] when there are no matches.
-    """
-    if not res:
-        return False
-    for row in res:
-        # A non-list row is a match
-        if not isinstance(row, list):
-            return True
-        # A list row with any elements is a match
-        if isinstance(row, list) and len(row) > 0:
-            return True
-    return False
-
 def add_menu_item(metta: MeTTa, merchant_name: str, item_name: str, price: str):
     """Upsert a merchant menu item using a normalized slug, plus a display name mapping.
     Graph entries:
@@ -49,108 +36,78 @@ def add_menu_item(metta: MeTTa, merchant_name: str, item_name: str, price: str):
         metta.space().add_atom(E(S("price"), S(slug), ValueAtom(price)))
         # Refresh display mapping as well, in case capitalization/spaces changed
         metta.space().add_atom(E(S("item-display"), S(slug), ValueAtom(item_name)))
+        bump(metta)
         return
     metta.space().add_atom(E(S("menu"), S(merchant_name), S(slug)))
     metta.space().add_atom(E(S("item-display"), S(slug), ValueAtom(item_name)))
     metta.space().add_atom(E(S("price"), S(slug), ValueAtom(price)))
+    bump(metta)
+
+# Relations folded by MenuProjection.apply for a menu (merchant metadata is read separately)
+_MENU_RELATIONS = ("menu", "removed-menu", "price", "item-display", "item-desc")
+
+def _menu_facts(metta: MeTTa):
+    space = metta.space()
+    facts = []
+    for rel in _MENU_RELATIONS:
+        pattern = E(S(rel), V("a"), V("b"))
+        facts.extend(str(atom) for atom in space.subst(pattern, pattern))
+    return facts
+
+def materialize_menu(metta: MeTTa, merchant_name: str) -> MenuProjection:
+    """Project a merchant's items, latest prices, display names, descriptions and
+    tombstones from one space query per menu relation, folded in Python.
+
+    The queries go straight to the space: a `!(match ...)` through metta.run also
+    evaluates every matched atom, which costs seconds once the stdlib is loaded.
+    """
+    proj = MenuProjection(merchant_name)
+    for fact in cached_query(metta, "menu-facts", lambda: _menu_facts(metta)):
+        proj.apply(fact)
+    return proj
 
 def get_menu_for_merchant(metta: MeTTa, merchant_name: str):
     """Retrieve items for a merchant: returns list of (item, price).
 
-    Implementation note: We first collect all (merchant, item) pairs from the graph and
-    filter in Python. This avoids edge cases with symbol quoting in MeTTa query strings.
+    Tombstoned items are skipped; the latest price and display name win.
     """
-    pairs = metta.run("!(match &self (menu $m $i) ($m $i))")
-    results = []
-    seen_items = set()
-
-    def _get_display_for_slug(slug: str) -> str | None:
-        try:
-            res = metta.run(f"!(match &self (item-display {slug} $d) $d)")
-            # Latest display value if present
-            if res and res[-1]:
-                v = res[-1][-1] if isinstance(res[-1], list) else res[-1]
-                try:
-                    return v.get_object().value  # type: ignore
-                except Exception:
-                    return str(v)
-        except Exception:
-            return None
-        return None
-
-    def handle_pair(m_sym: str, i_sym: str):
-        if m_sym != merchant_name:
-            return
-        # Deduplicate by item symbol
-        if i_sym in seen_items:
-            return
-        removed_res = metta.run(f"!(match &self (removed-menu {m_sym} {i_sym}) $x)")
-        if _has_any_match(removed_res):
-            return
-        price_res = metta.run(f"!(match &self (price {i_sym} $p) $p)")
-        # Use the latest price if multiple price entries exist
-        price = _latest_value_from_match(price_res)
-        display = _get_display_for_slug(i_sym)
-        results.append((display or i_sym, price))
-        seen_items.add(i_sym)
-
-    for r in pairs or []:
-        # Case 1: r looks like [m, i]
-        if isinstance(r, list) and len(r) == 2 and not str(r[0]).startswith("("):
-            handle_pair(str(r[0]), str(r[1]))
-            continue
-        # Case 2: r is a list of expression atoms like "(m i)"
-        if isinstance(r, list):
-            for e in r:
-                s = str(e)
-                if s.startswith("(") and s.endswith(")"):
-                    try:
-                        m_sym, i_sym = s[1:-1].split(" ", 1)
-                        handle_pair(m_sym, i_sym)
-                    except ValueError:
-                        continue
-        else:
-            # Fallback: try to parse a single expression atom
-            s = str(r)
-            if s.startswith("(") and s.endswith(")"):
-                try:
-                    m_sym, i_sym = s[1:-1].split(" ", 1)
-                    handle_pair(m_sym, i_sym)
-                except ValueError:
-                    pass
-    return results
+    return materialize_menu(metta, merchant_name).menu()
 
 # Merchant metadata helpers
 
 def set_merchant_description(metta: MeTTa, merchant_name: str, description: str):
     """Set or update a merchant's public description."""
     metta.space().add_atom(E(S("merchant-desc"), S(merchant_name), ValueAtom(description)))
+    bump(metta)
 
 def get_merchant_description(metta: MeTTa, merchant_name: str):
     """Get the latest merchant description, if any."""
-    res = metta.run(f"!(match &self (merchant-desc {merchant_name} $d) $d)")
+    res = cached_run(metta, f"!(match &self (merchant-desc {merchant_name} $d) $d)")
     return res[-1][0].get_object().value if res and res[-1] else None
 
 def set_open_hours(metta: MeTTa, merchant_name: str, hours: str):
     """Set store open hours, e.g., 'Mon-Sun 10:00-22:00'."""
     metta.space().add_atom(E(S("merchant-hours"), S(merchant_name), ValueAtom(hours)))
+    bump(metta)
 
 def get_open_hours(metta: MeTTa, merchant_name: str):
-    res = metta.run(f"!(match &self (merchant-hours {merchant_name} $h) $h)")
+    res = cached_run(metta, f"!(match &self (merchant-hours {merchant_name} $h) $h)")
     return res[-1][0].get_object().value if res and res[-1] else None
 
 def set_location(metta: MeTTa, merchant_name: str, location: str):
     metta.space().add_atom(E(S("merchant-location"), S(merchant_name), ValueAtom(location)))
+    bump(metta)
 
 def get_location(metta: MeTTa, merchant_name: str):
-    res = metta.run(f"!(match &self (merchant-location {merchant_name} $l) $l)")
+    res = cached_run(metta, f"!(match &self (merchant-location {merchant_name} $l) $l)")
     return res[-1][0].get_object().value if res and res[-1] else None
 
 def add_category(metta: MeTTa, merchant_name: str, category: str):
     metta.space().add_atom(E(S("merchant-category"), S(merchant_name), S(category)))
+    bump(metta)
 
 def list_categories(metta: MeTTa, merchant_name: str):
-    res = metta.run(f"!(match &self (merchant-category {merchant_name} $c) $c)")
+    res = cached_run(metta, f"!(match &self (merchant-category {merchant_name} $c) $c)")
     return [str(r[0]) for r in (res or []) if r]
 
 # Merchant wallet
@@ -158,9 +115,10 @@ def list_categories(metta: MeTTa, merchant_name: str):
 def set_merchant_wallet(metta: MeTTa, merchant_name: str, wallet_address: str):
     """Store or update merchant payout wallet address."""
     metta.space().add_atom(E(S("merchant-wallet"), S(merchant_name), ValueAtom(wallet_address)))
+    bump(metta)
 
 def get_merchant_wallet(metta: MeTTa, merchant_name: str):
-    res = metta.run(f"!(match &self (merchant-wallet {merchant_name} $w) $w)")
+    res = cached_run(metta, f"!(match &self (merchant-wallet {merchant_name} $w) $w)")
     return res[-1][0].get_object().value if res and res[-1] else None
 
 # Item details
@@ -168,20 +126,22 @@ def get_merchant_wallet(metta: MeTTa, merchant_name: str):
 def set_item_description(metta: MeTTa, item_name: str, description: str):
     slug = _normalize_item_name(item_name)
     metta.space().add_atom(E(S("item-desc"), S(slug), ValueAtom(description)))
+    bump(metta)
 
 def get_item_description(metta: MeTTa, item_name: str):
     slug = _normalize_item_name(item_name)
-    res = metta.run(f"!(match &self (item-desc {slug} $d) $d)")
+    res = cached_run(metta, f"!(match &self (item-desc {slug} $d) $d)")
     return res[-1][0].get_object().value if res and res[-1] else None
 
 def update_item_price(metta: MeTTa, item_name: str, new_price: str):
     """Append a new price value for the normalized slug; retrieval uses the latest entry."""
     slug = _normalize_item_name(item_name)
     metta.space().add_atom(E(S("price"), S(slug), ValueAtom(new_price)))
+    bump(metta)
 
 def get_item_price(metta: MeTTa, item_name: str):
     slug = _normalize_item_name(item_name)
-    res = metta.run(f"!(match &self (price {slug} $p) $p)")
+    res = cached_run(metta, f"!(match &self (price {slug} $p) $p)")
     # Prefer the latest entry regardless of row/value shape
     return _latest_value_from_match(res)
 
@@ -211,6 +171,7 @@ def remove_menu_item(metta: MeTTa, merchant_name: str, item_name: str):
     """Soft-remove a menu item by writing a tombstone relation (removed-menu merchant slug)."""
     slug = _normalize_item_name(item_name)
     metta.space().add_atom(E(S("removed-menu"), S(merchant_name), S(slug)))
+    bump(metta)
     return True
 
 class LLM:
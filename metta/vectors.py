@@ -0,0 +1,144 @@
+import math
+import os
+import re
+import zlib
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional: vector search is disabled without NumPy
+    np = None
+
+# Offline similarity search over hashed character n-gram vectors.
+# Each document (a merchant's menu, description and location) becomes a DIM-wide float32
+# vector: word-boundary-padded character n-grams and whole words are hashed (crc32, with a
+# hashed sign to cancel collisions) into buckets, weighted by 1 + log(tf) and L2-normalized.
+# "cheesy" and "cheese" share most of their n-grams, so they score as similar without any
+# model or network access. Rows live in one contiguous matrix that grows by doubling;
+# changing a document overwrites its row in place, and deleted rows are reused.
+
+VECTOR_DIM = int(os.getenv("SEARCH_VECTOR_DIM", "512"))
+NGRAM_SIZES = (3, 4)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def vectors_available() -> bool:
+    return np is not None
+
+
+def _features(text: str) -> Dict[int, float]:
+    counts: Dict[int, float] = {}
+    for word in _WORD.findall((text or "").lower()):
+        grams = [f"w:{word}"]
+        padded = f" {word} "
+        for n in NGRAM_SIZES:
+            grams.extend(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+        for g in grams:
+            h = zlib.crc32(g.encode("utf-8"))
+            counts[h] = counts.get(h, 0.0) + 1.0
+    return counts
+
+
+class VectorIndex:
+    """Cosine top-k over a contiguous float32 matrix of hashed n-gram vectors."""
+
+    def __init__(self, dim: int = VECTOR_DIM, capacity: int = 1024):
+        if np is None:
+            raise RuntimeError("vector search needs numpy (pip install numpy)")
+        self.dim = dim
+        self._matrix = np.zeros((max(1, capacity), dim), dtype=np.float32)
+        self._live = np.zeros(max(1, capacity), dtype=bool)
+        self._rows = 0
+        self._keys: List[str | None] = []
+        self._row_of: Dict[str, int] = {}
+        self._free: List[int] = []
+
+    def vectorize(self, text: str):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for h, tf in _features(text).items():
+            sign = 1.0 if (h >> 31) & 1 else -1.0
+            vec[h % self.dim] += sign * (1.0 + math.log(tf))
+        norm = float(np.linalg.norm(vec))
+        if norm > 0:
+            vec /= norm
+        return vec
+
+    def _grow(self) -> None:
+        cap = self._matrix.shape[0] * 2
+        matrix = np.zeros((cap, self.dim), dtype=np.float32)
+        matrix[:self._rows] = self._matrix[:self._rows]
+        live = np.zeros(cap, dtype=bool)
+        live[:self._rows] = self._live[:self._rows]
+        self._matrix, self._live = matrix, live
+
+    def set(self, key: str, text: str) -> None:
+        """Add or replace `key`'s vector (an existing row is overwritten in place)."""
+        row = self._row_of.get(key)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                if self._rows == self._matrix.shape[0]:
+                    self._grow()
+                row = self._rows
+                self._rows += 1
+                self._keys.append(None)
+            self._row_of[key] = row
+            self._keys[row] = key
+        self._matrix[row] = self.vectorize(text)
+        self._live[row] = True
+
+    def set_many(self, docs: Iterable[Tuple[str, str]]) -> None:
+        for key, text in docs:
+            self.set(key, text)
+
+    def remove(self, key: str) -> None:
+        row = self._row_of.pop(key, None)
+        if row is None:
+            return
+        self._matrix[row] = 0.0
+        self._live[row] = False
+        self._keys[row] = None
+        self._free.append(row)
+
+    def search_many(self, queries: Sequence[str], top_k: int = 5,
+                    allow: Callable[[str], bool] | None = None) -> List[List[Tuple[str, float]]]:
+        """Top-k (key, cosine) per query, scoring all queries in one matrix product."""
+        n = self._rows
+        if n == 0 or not queries:
+            return [[] for _ in queries]
+        q = np.stack([self.vectorize(text) for text in queries], axis=1)  # dim x m
+        scores = self._matrix[:n] @ q  # n x m
+        scores[~self._live[:n]] = -np.inf
+        k = min(n, top_k if allow is None else max(top_k * 4, top_k + 16))
+        out = []
+        for col in range(scores.shape[1]):
+            s = scores[:, col]
+            cand = np.argpartition(-s, k - 1)[:k] if k < n else np.arange(n)
+            cand = cand[np.argsort(-s[cand], kind="stable")]
+            hits = []
+            for row in cand:
+                score = float(s[row])
+                if score <= 0.0:
+                    break
+                key = self._keys[row]
+                if allow is not None and not allow(key):
+                    continue
+                hits.append((key, score))
+                if len(hits) == top_k:
+                    break
+            out.append(hits)
+        return out
+
+    def search(self, query: str, top_k: int = 5, allow: Callable[[str], bool] | None = None) -> List[Tuple[str, float]]:
+        return self.search_many([query], top_k, allow)[0]
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._row_of
+
+    def nbytes(self) -> int:
+        return int(self._matrix.nbytes)
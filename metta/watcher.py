@@ -0,0 +1,136 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+from typing import Callable, Dict, Tuple
+
+# Directory change notification for the merchant store.
+# Uses Linux inotify through ctypes when available and falls back to polling the
+# directory's (inode, size, mtime) snapshot. The callback receives the changed file name.
+
+WATCH_MODE = os.getenv("SEARCH_WATCH", "auto")  # auto | inotify | poll | off
+WATCH_POLL_S = float(os.getenv("SEARCH_WATCH_POLL_S", "2"))
+
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    def __init__(self, path: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(fd, os.fsencode(path), _IN_MASK) < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(err, "inotify_add_watch failed")
+        self.fd = fd
+
+    def read(self, timeout: float) -> list:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names = []
+        pos = 0
+        while pos + _EVENT_HEADER.size <= len(data):
+            _wd, _mask, _cookie, length = _EVENT_HEADER.unpack_from(data, pos)
+            pos += _EVENT_HEADER.size
+            names.append(data[pos:pos + length].rstrip(b"\0").decode("utf-8", errors="replace"))
+            pos += length
+        return names
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class DirectoryWatcher:
+    """Call on_change(file_name) from a daemon thread whenever a file in `path` changes."""
+
+    def __init__(self, path: str, on_change: Callable[[str], None], mode: str = WATCH_MODE,
+                 poll_interval: float = WATCH_POLL_S):
+        self.path = path
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.mode = mode
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._inotify: _Inotify | None = None
+        self._prev: Dict[str, Tuple[int, int, int]] = {}
+
+    def start(self) -> str:
+        """Start watching; returns the mode actually used ("inotify", "poll" or "off")."""
+        if self.mode == "off":
+            return "off"
+        if self.mode in ("auto", "inotify"):
+            try:
+                self._inotify = _Inotify(self.path)
+                self.mode = "inotify"
+            except (OSError, AttributeError):
+                # No inotify (non-Linux, limits reached): poll instead
+                self._inotify = None
+                self.mode = "poll"
+        else:
+            self.mode = "poll"
+        if self._inotify is None:
+            # Baseline before returning, so changes made right after start() are reported
+            self._prev = self._snapshot()
+        target = self._run_inotify if self._inotify is not None else self._run_poll
+        self._thread = threading.Thread(target=target, name=f"watch:{self.path}", daemon=True)
+        self._thread.start()
+        return self.mode
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _run_inotify(self) -> None:
+        while not self._stop.is_set():
+            for name in self._inotify.read(timeout=1.0):
+                self._notify(name)
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int, int]]:
+        snap = {}
+        try:
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    snap[entry.name] = (st.st_ino, st.st_size, st.st_mtime_ns)
+        except OSError:
+            pass
+        return snap
+
+    def _run_poll(self) -> None:
+        prev = self._prev
+        while not self._stop.wait(self.poll_interval):
+            cur = self._snapshot()
+            for name in set(prev) | set(cur):
+                if prev.get(name) != cur.get(name):
+                    self._notify(name)
+            prev = cur
+
+    def _notify(self, name: str) -> None:
+        try:
+            self.on_change(name)
+        except Exception:
+            # A failing callback must not kill the watcher thread
+            pass
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+bench_index_build.py
+Time a cold build_index over a synthetic store with 1..N parser processes, then a hot
+index (MerchantIndexStore) restart loading every shard vs mapping its index.bin checkpoint.
+Usage:
+  python3 scripts/bench_index_build.py [--merchants 2000] [--items 50] [--workers 1,2,4,8]
+
+Speed-up depends on the cores available; on a single core every setting times the same.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from metta.indexer import MerchantIndexStore, _binary_index_path, build_index
+from metta.storage import append_desc, append_menu_items, close_writers, merchant_file
+
+
+def _write_store(base_dir: str, merchants: int, items: int) -> None:
+    for m in range(merchants):
+        path = merchant_file(str(m), base_dir)
+        append_menu_items(path, str(m), [
+            {"slug": f"dish_{i}", "name": f"dish {i} special {m % 97}", "price": str(5 + i % 20)}
+            for i in range(items)
+        ])
+        append_desc(path, str(m), f"kitchen {m} serving dishes near station {m % 13}")
+    close_writers()
+
+
+def _restart(base_dir: str) -> float:
+    t0 = time.perf_counter()
+    store = MerchantIndexStore(base_dir)
+    store.refresh()
+    return (time.perf_counter() - t0) * 1000
+
+
+def _bench_restart(base_dir: str) -> None:
+    store = MerchantIndexStore(base_dir)
+    store.refresh()  # writes the shards
+    if os.path.exists(_binary_index_path(base_dir)):
+        os.remove(_binary_index_path(base_dir))
+    shards = _restart(base_dir)
+    store.checkpoint()
+    seeded = _restart(base_dir)
+    print(f"restart from shards     {shards:>10.1f} ms")
+    print(f"restart from checkpoint {seeded:>10.1f} ms  x{shards / seeded:.2f}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    ap.add_argument("--merchants", type=int, default=2000)
+    ap.add_argument("--items", type=int, default=50)
+    ap.add_argument("--workers", default=",".join(str(w) for w in (1, 2, 4, 8) if w <= (os.cpu_count() or 1)) or "1")
+    args = ap.parse_args()
+    base = tempfile.mkdtemp(prefix="bench_index_build_")
+    try:
+        _write_store(base, args.merchants, args.items)
+        print(f"merchants={args.merchants} items/merchant={args.items} cpus={os.cpu_count()}")
+        baseline = None
+        for w in [int(x) for x in args.workers.split(",") if x]:
+            t0 = time.perf_counter()
+            index = build_index(base, workers=w)
+            ms = (time.perf_counter() - t0) * 1000
+            baseline = baseline or ms
+            print(f"workers={w:<3} {ms:>10.1f} ms  x{baseline / ms:.2f}  ({len(index)} merchants)")
+        _bench_restart(base)
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+bench_knowledge_load.py
+Time seeding a fresh MeTTa instance with the Fetch.ai/uAgents knowledge graph:
+  - before:  metta.knowledge.initialize_knowledge_graph (builds every atom per instance)
+  - after:   metta.knowledge.load_knowledge_graph (adds the atoms precompiled once per process)
+Both are checked to leave the same atoms in the space. MeTTa() construction is timed on its
+own since it is part of every instance's startup either way.
+Usage:
+  python3 scripts/bench_knowledge_load.py [--repeat 50]
+
+Needs hyperon installed.
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def _best(repeat, make, seed):
+    best = float("inf")
+    for _ in range(repeat):
+        metta = make()
+        t0 = time.perf_counter()
+        seed(metta)
+        best = min(best, time.perf_counter() - t0)
+    return best, metta
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+    try:
+        from hyperon import MeTTa
+    except ImportError:
+        print("hyperon is not installed: nothing to benchmark")
+        return 1
+    from metta import knowledge
+
+    t0 = time.perf_counter()
+    knowledge.knowledge_atoms()
+    build = time.perf_counter() - t0
+    construct, _ = _best(args.repeat, lambda: None, lambda _: MeTTa())
+    before, m1 = _best(args.repeat, MeTTa, knowledge.initialize_knowledge_graph)
+    after, m2 = _best(args.repeat, MeTTa, knowledge.load_knowledge_graph)
+    got = sorted(str(a) for a in m2.space().get_atoms())
+    assert got == sorted(str(a) for a in m1.space().get_atoms()), "precompiled graph differs from the seed"
+
+    print(f"atoms:                       {len(got)}")
+    print(f"MeTTa():                     {construct * 1000:8.2f} ms")
+    print(f"precompile (once/process):   {build * 1000:8.2f} ms")
+    print(f"before initialize_knowledge: {before * 1000:8.2f} ms/instance")
+    print(f"after  load_knowledge_graph: {after * 1000:8.2f} ms/instance ({before / after:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+bench_menu.py
+Compare menu materialization strategies for merchants with 10, 100 and 400 items:
+  - per-item:   the previous get_menu_for_merchant (one match for pairs, then
+                removed-menu / price / item-display queries per item: 3N+1 calls)
+  - one-query:  metta.utils.materialize_menu (one unevaluated space query per menu
+                relation, folded in Python; query cache disabled)
+  - projection: MenuProjection kept current by the hydrator (no interpreter calls),
+                timed both built from scratch and as a read of an already hydrated one
+Usage:
+  python3 scripts/bench_menu.py [--sizes 10,100,400] [--repeat 3]
+
+The MeTTa strategies need hyperon installed; without it only the projection is timed.
+Sizes stop at 400 because hyperon 0.2.10 panics (trie.rs) querying spaces of a few
+thousand atoms, about 500 items here; with hyperon installed larger --sizes abort the run.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from metta.menu import MenuProjection
+from metta.storage import merchant_file, append_menu_item, append_price, append_remove_item
+
+MERCHANT = "1"
+
+
+def _write_store(base_dir: str, n: int) -> str:
+    path = merchant_file(MERCHANT, base_dir)
+    for i in range(n):
+        append_menu_item(path, MERCHANT, f"item_{i}", f"Item {i}", str(5 + i % 20))
+    # Some churn: repriced and removed items
+    for i in range(0, n, 10):
+        append_price(path, f"item_{i}", str(6 + i % 20))
+    for i in range(0, n, 25):
+        append_remove_item(path, MERCHANT, f"item_{i}")
+    return path
+
+
+def _per_item_menu(metta, merchant_name: str):
+    """The pre-materialization implementation, kept here as the benchmark baseline."""
+    from metta.utils import _latest_value_from_match
+
+    def any_match(res):
+        return any((not isinstance(r, list)) or r for r in (res or []))
+
+    results, seen = [], set()
+    for row in metta.run("!(match &self (menu $m $i) ($m $i))") or []:
+        for e in row if isinstance(row, list) else [row]:
+            s = str(e)
+            if not (s.startswith("(") and s.endswith(")")):
+                continue
+            m_sym, i_sym = s[1:-1].split(" ", 1)
+            if m_sym != merchant_name or i_sym in seen:
+                continue
+            if any_match(metta.run(f"!(match &self (removed-menu {m_sym} {i_sym}) $x)")):
+                continue
+            price = _latest_value_from_match(metta.run(f"!(match &self (price {i_sym} $p) $p)"))
+            display = _latest_value_from_match(metta.run(f"!(match &self (item-display {i_sym} $d) $d)"))
+            results.append((display or i_sym, price))
+            seen.add(i_sym)
+    return results
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    ap.add_argument("--sizes", default="10,100,400")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+
+    try:
+        from hyperon import MeTTa
+        from metta.storage import load_merchant_into
+        from metta import query_cache
+        from metta.utils import _MENU_RELATIONS, materialize_menu
+        # Time the queries themselves, not metta.query_cache hits
+        query_cache.QUERY_CACHE_SIZE = 0
+    except ImportError:
+        MeTTa = None
+        print("hyperon not installed: timing the projection only\n")
+
+    print(f"{'items':>7} {'strategy':>11} {'calls':>7} {'ms':>10}")
+    for n in sizes:
+        base = tempfile.mkdtemp(prefix="bench_menu_")
+        try:
+            path = _write_store(base, n)
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+
+            def project():
+                proj = MenuProjection(MERCHANT)
+                for line in lines:
+                    proj.apply(line)
+                return proj.menu()
+
+            expected = project()
+            if MeTTa is not None:
+                metta = MeTTa()
+                load_merchant_into(metta, MERCHANT, base)
+                # Large per-item runs take minutes; time them once
+                per_item_repeat = 1 if n > 1000 else args.repeat
+                got = _per_item_menu(metta, MERCHANT)
+                assert sorted(got) == sorted(expected), "per-item and projected menus disagree"
+                ms = _best(lambda: _per_item_menu(metta, MERCHANT), per_item_repeat)
+                print(f"{n:>7} {'per-item':>11} {3 * n + 1:>7} {ms:>10.2f}")
+                got = materialize_menu(metta, MERCHANT).menu()
+                assert sorted(got) == sorted(expected), "one-query and projected menus disagree"
+                ms = _best(lambda: materialize_menu(metta, MERCHANT).menu(), args.repeat)
+                print(f"{n:>7} {'one-query':>11} {len(_MENU_RELATIONS):>7} {ms:>10.2f}")
+            ms = _best(project, args.repeat)
+            print(f"{n:>7} {'projection':>11} {0:>7} {ms:>10.2f}  (built from scratch)")
+            hydrated = MenuProjection(MERCHANT)
+            for line in lines:
+                hydrated.apply(line)
+            ms = _best(hydrated.menu, args.repeat)
+            print(f"{n:>7} {'proj. read':>11} {0:>7} {ms:>10.2f}  (already hydrated)")
+        finally:
+            shutil.rmtree(base, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+bench_metta_load.py
+Compare ways of loading a merchant's fact file into a fresh MeTTa space:
+  - run/line:    metta.run(line) per fact (the previous load_merchant_into)
+  - parse/line:  metta.parse_single(line) + space.add_atom per fact (the previous hydrator)
+  - bulk:        metta.storage.run_facts (one metta.run per chunk of validated facts)
+Every strategy is checked to leave the same atoms in the space (sizes up to --check-max).
+Usage:
+  python3 scripts/bench_metta_load.py [--sizes 100,1000,10000] [--repeat 3]
+
+Needs hyperon installed.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from metta.storage import run_facts, append_menu_items, close_writers, committed_lines, merchant_file
+
+MERCHANT = "1"
+
+
+def _lines(base_dir: str, n: int):
+    path = merchant_file(MERCHANT, base_dir)
+    append_menu_items(path, MERCHANT, [
+        {"slug": f"item_{i}", "name": f"Item {i}", "price": str(5 + i % 20), "desc": f"dish number {i}"}
+        for i in range(n)
+    ])
+    close_writers()
+    with open(path, "r", encoding="utf-8") as f:
+        return list(committed_lines(f))
+
+
+def _run_per_line(metta, lines):
+    for line in lines:
+        metta.run(line)
+
+
+def _parse_per_line(metta, lines):
+    space = metta.space()
+    for line in lines:
+        space.add_atom(metta.parse_single(line))
+
+
+def _bulk(metta, lines):
+    run_facts(metta, lines)
+
+
+STRATEGIES = [("run/line", _run_per_line), ("parse/line", _parse_per_line), ("bulk", _bulk)]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    ap.add_argument("--sizes", default="100,1000,10000")
+    ap.add_argument("--repeat", type=int, default=3)
+    # hyperon 0.2.10 panics reading back spaces of a few thousand atoms, whichever way they were loaded
+    ap.add_argument("--check-max", type=int, default=200, help="compare loaded atoms up to this many items")
+    args = ap.parse_args()
+    try:
+        from hyperon import MeTTa
+    except ImportError:
+        print("hyperon is not installed: nothing to benchmark")
+        return 1
+
+    print(f"{'items':>7} {'facts':>7} {'strategy':>11} {'ms':>10} {'us/fact':>9}")
+    for n in [int(s) for s in args.sizes.split(",") if s]:
+        base = tempfile.mkdtemp(prefix="bench_metta_load_")
+        try:
+            lines = _lines(base, n)
+            expected = None
+            for name, load in STRATEGIES:
+                best = float("inf")
+                for _ in range(args.repeat):
+                    metta = MeTTa()
+                    t0 = time.perf_counter()
+                    load(metta, lines)
+                    best = min(best, time.perf_counter() - t0)
+                if n <= args.check_max:
+                    got = sorted(str(a) for a in metta.space().get_atoms())
+                    if expected is None:
+                        expected = got
+                    assert got == expected, f"{name} loaded different atoms"
+                print(f"{n:>7} {len(lines):>7} {name:>11} {best * 1000:>10.1f} {best * 1e6 / len(lines):>9.1f}")
+        finally:
+            shutil.rmtree(base, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
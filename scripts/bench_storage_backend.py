@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+bench_storage_backend.py
+Compare the file and SQLite storage backends on one merchant with a long edit history.
+The merchant has --items menu items and --edits later price changes; for each backend:
+  - profile:   backend.profile() (menu, latest prices and metadata, no MeTTa)
+  - hydrate:   a fresh MeTTa space loaded through backend.hydrator()
+  - re-hydrate: one more price edit, then hydrating the already loaded space again
+Usage:
+  python3 scripts/bench_storage_backend.py [--items 1000] [--edits 2000] [--repeat 5]
+
+Needs hyperon installed for the hydrate timings.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from metta.storage import FileBackend, close_writers
+from metta.sqlite_store import SqliteBackend
+
+MID = "1"
+
+
+def _fill(backend, items: int, edits: int) -> None:
+    backend.add_menu_items(MID, [
+        {"slug": f"dish_{i}", "name": f"dish {i}", "price": str(5 + i % 20)} for i in range(items)
+    ])
+    backend.set_desc(MID, "kitchen with a long price history")
+    for e in range(edits):
+        backend.set_price(MID, f"dish_{e % items}", str(6 + e % 30))
+
+
+def _best_ms(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def _bench(backend, repeat: int, MeTTa) -> dict:
+    out = {"profile": _best_ms(repeat, lambda: backend.profile(MID))}
+    if MeTTa is None:
+        return out
+    out["hydrate"] = _best_ms(repeat, lambda: backend.hydrator(MeTTa()).hydrate(MID))
+    hydrator = backend.hydrator(MeTTa())
+    hydrator.hydrate(MID)
+    edits = iter(range(10 ** 9))
+
+    def edit_and_rehydrate():
+        backend.set_price(MID, "dish_0", str(100 + next(edits)))
+        hydrator.hydrate(MID)
+
+    out["re-hydrate"] = _best_ms(repeat, edit_and_rehydrate)
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    ap.add_argument("--items", type=int, default=1000)
+    ap.add_argument("--edits", type=int, default=2000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+    try:
+        from hyperon import MeTTa
+    except ImportError:
+        MeTTa = None
+        print("hyperon is not installed: timing profiles only")
+    base = tempfile.mkdtemp(prefix="bench_storage_backend_")
+    try:
+        backends = [FileBackend(os.path.join(base, "file")), SqliteBackend(os.path.join(base, "sqlite"))]
+        for backend in backends:
+            _fill(backend, args.items, args.edits)
+        close_writers()
+        results = {b.kind: _bench(b, args.repeat, MeTTa) for b in backends}
+        print(f"items={args.items} price edits={args.edits} (best of {args.repeat})")
+        for name in results["file"]:
+            print(f"{name:<11} file {results['file'][name]:>9.1f} ms   sqlite {results['sqlite'][name]:>9.1f} ms")
+        backends[1].close()
+    finally:
+        close_writers()
+        shutil.rmtree(base, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+bench_vector_search.py
+Time the NumPy similarity index (metta.vectors.VectorIndex) on synthetic menu items:
+  - build:   vectorize and append N rows
+  - update:  replace existing rows in place (a merchant editing its menu)
+  - query:   single queries (matrix-vector + argpartition) and batches of queries
+  - keyword: the BM25 InvertedIndex over the same items, for reference
+Usage:
+  python3 scripts/bench_vector_search.py [--items 100000] [--dim 512] [--queries 200] [--batch 32]
+
+Needs numpy.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from metta.indexer import InvertedIndex, _tokenize
+from metta.vectors import VectorIndex, vectors_available
+
+STYLES = ["cheese", "cheesy", "spicy", "grilled", "crispy", "vegan", "smoked", "garlic", "honey", "bbq",
+          "classic", "double", "mini", "loaded", "roasted", "fresh", "sweet", "sour", "tandoori", "teriyaki"]
+DISHES = ["pizza", "flatbread", "burrito", "taco", "ramen", "udon", "sushi", "burger", "salad", "bowl",
+          "wrap", "noodles", "dumplings", "curry", "sandwich", "quesadilla", "pasta", "soup", "wings", "fries"]
+EXTRAS = ["with fries", "and salad", "combo", "special", "platter", "slice", "roll", "box", "", ""]
+
+
+def _items(n: int, rng: random.Random):
+    return [
+        (f"{i % 5000}/item_{i}", f"{rng.choice(STYLES)} {rng.choice(DISHES)} {rng.choice(EXTRAS)}".strip())
+        for i in range(n)
+    ]
+
+
+def _ms(t0: float, count: int = 1) -> float:
+    return (time.perf_counter() - t0) * 1000 / max(1, count)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    ap.add_argument("--items", type=int, default=100_000)
+    ap.add_argument("--dim", type=int, default=512)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--batch", type=int, default=32)
+    ap.add_argument("--top-k", type=int, default=10)
+    args = ap.parse_args()
+    if not vectors_available():
+        print("numpy is not installed: nothing to benchmark")
+        return 1
+
+    rng = random.Random(42)
+    items = _items(args.items, rng)
+    queries = [f"{rng.choice(STYLES)} {rng.choice(DISHES)}" for _ in range(args.queries)]
+
+    vi = VectorIndex(dim=args.dim)
+    t0 = time.perf_counter()
+    vi.set_many(items)
+    build_ms = _ms(t0)
+    print(f"items={args.items} dim={args.dim} matrix={vi.nbytes() / 2**20:.1f} MiB")
+    print(f"{'build':<22} {build_ms:>10.1f} ms total  ({build_ms * 1000 / args.items:.1f} us/row)")
+
+    updates = rng.sample(items, min(1000, len(items)))
+    t0 = time.perf_counter()
+    for key, text in updates:
+        vi.set(key, text + " deluxe")
+    print(f"{'update (in place)':<22} {_ms(t0, len(updates)) * 1000:>10.1f} us/row")
+
+    t0 = time.perf_counter()
+    for q in queries:
+        vi.search(q, args.top_k)
+    print(f"{'query (single)':<22} {_ms(t0, len(queries)):>10.2f} ms/query")
+
+    t0 = time.perf_counter()
+    for i in range(0, len(queries), args.batch):
+        vi.search_many(queries[i:i + args.batch], args.top_k)
+    print(f"{'query (batch ' + str(args.batch) + ')':<22} {_ms(t0, len(queries)):>10.2f} ms/query")
+
+    inv = InvertedIndex()
+    t0 = time.perf_counter()
+    for key, text in items:
+        inv.add(key, {"keywords": Counter(_tokenize(text))})
+    print(f"{'keyword build':<22} {_ms(t0):>10.1f} ms total")
+    t0 = time.perf_counter()
+    for q in queries:
+        inv.search(_tokenize(q), args.top_k)
+    print(f"{'keyword query':<22} {_ms(t0, len(queries)):>10.2f} ms/query")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
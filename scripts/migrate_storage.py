@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+migrate_storage.py
+Copy every merchant's facts from one storage backend to the other (file <-> sqlite).
+Each merchant is copied as its latest-wins .metta facts in one record; merchants that
+already exist in the destination are skipped.
+Usage:
+  python3 scripts/migrate_storage.py --to sqlite [--base-dir metta_store]
+  python3 scripts/migrate_storage.py --to file [--base-dir metta_store]
+
+Then run the services with METTA_STORAGE_BACKEND set to the destination.
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from metta.storage import DEFAULT_DIR, close_writers, storage_backend, _compacted_lines
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    ap.add_argument("--to", choices=("sqlite", "file"), required=True)
+    ap.add_argument("--base-dir", default=DEFAULT_DIR)
+    args = ap.parse_args()
+    src = storage_backend(args.base_dir, "file" if args.to == "sqlite" else "sqlite")
+    dst = storage_backend(args.base_dir, args.to)
+    existing = set(dst.merchants())
+    t0 = time.perf_counter()
+    copied = skipped = facts = 0
+    for mid in src.merchants():
+        if mid in existing:
+            skipped += 1
+            continue
+        kept, _ = _compacted_lines(src.lines(mid))
+        if kept:
+            dst.append(mid, kept)
+        copied += 1
+        facts += len(kept)
+    close_writers()
+    print(f"{src.kind} -> {dst.kind}: {copied} merchants ({facts} facts) copied, "
+          f"{skipped} already present, {time.perf_counter() - t0:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
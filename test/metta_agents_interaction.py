@@ -21,10 +21,12 @@ if str(ROOT) not in sys.path:
 from metta.utils import add_menu_item, get_menu_for_merchant
 
 # Import agent modules to access their MeTTa instances and helpers
-from agent.merchant import METTA_INSTANCE as MERCHANT_METTA, system_prompt as MERCHANT_SYSTEM
+from agent.merchant import SPACES as MERCHANT_SPACES, system_prompt as MERCHANT_SYSTEM
 from agent.customer import METTA_INSTANCE as CUSTOMER_METTA, _lookup_price_from_metta
 
 MERCHANT = "TestPizzaAgent"
+# The merchant agent keeps one MeTTa space per merchant
+MERCHANT_METTA = MERCHANT_SPACES.get(MERCHANT)
 
 
 def assert_true(cond: bool, msg: str):
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+test_bulk_load.py
+
+Tests for bulk fact loading (metta.storage.run_facts / load_merchant_into):
+- Facts are loaded with one metta.run call per chunk, not one call per line
+- A malformed fact is parsed on its own and dropped without losing or duplicating its neighbours
+- Stored `!` expressions are never evaluated
+- load_merchant_into loads only committed facts
+"""
+import shutil
+import sys, pathlib
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import metta.storage as storage
+from metta.storage import run_facts, load_merchant_into, merchant_file, append_menu_item, close_writer
+from utils.fake_metta import FakeMeTTa
+
+BASE = str(ROOT / 'metta_store_bulk_load_test')
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def test_chunks_and_fallback():
+    storage.BULK_LOAD_LINES = 4
+    metta = FakeMeTTa()
+    lines = [f'(price item_{i} "{i}")' for i in range(10)]
+    loaded = run_facts(metta, lines)
+    assert_true(loaded == lines and metta.run_calls == 3, 'one run per chunk')
+    metta = FakeMeTTa()
+    lines[5] = '(price broken "5'
+    loaded = run_facts(metta, lines)
+    assert_true(loaded == lines[:5] + lines[6:], 'only the malformed fact is dropped')
+    assert_true(metta.space().atoms == loaded, 'no fact is added twice or out of order')
+    assert_true(metta.run_calls == 3, 'the malformed fact is parsed alone between two chunks')
+    metta = FakeMeTTa()
+    loaded = run_facts(metta, ['(menu 1 pizza)', '!(println! "x")', '(price pizza "5")'])
+    assert_true(metta.evaluated == [] and loaded == ['(menu 1 pizza)', '(price pizza "5")'],
+                'stored ! expressions are dropped, not run')
+    storage.BULK_LOAD_LINES = 2048
+
+
+def test_load_merchant_into():
+    shutil.rmtree(BASE, ignore_errors=True)
+    path = merchant_file('1', BASE)
+    for i in range(50):
+        append_menu_item(path, '1', f'dish_{i}', f'dish "{i}" (large)', str(i))
+    close_writer(path)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('#begin\n(price dish_1 "99")\n')  # torn record: must not be loaded
+    metta = FakeMeTTa()
+    load_merchant_into(metta, '1', BASE)
+    assert_true(len(metta.space().atoms) == 150 and metta.run_calls == 1, 'whole file in one run')
+    assert_true('(price dish_1 "99")' not in metta.space().atoms, 'uncommitted facts are skipped')
+    shutil.rmtree(BASE, ignore_errors=True)
+
+
+def main():
+    test_chunks_and_fallback()
+    test_load_merchant_into()
+    print("All bulk load tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
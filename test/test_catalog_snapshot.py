@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+test_catalog_snapshot.py
+
+Tests for the precomputed list_menu catalog (metta.catalog.CatalogSnapshot):
+- The first read builds every merchant's menu block from storage
+- Pages are rendered once per snapshot version
+- A refresh re-renders only the mutated merchant and bumps the version
+"""
+import shutil
+import sys, pathlib
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from metta.catalog import CatalogSnapshot
+from metta.storage import merchant_file, append_menu_item, append_price
+
+BASE = str(ROOT / 'metta_store_catalog_test')
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+class CountingFormatter:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, mid, menu):
+        self.calls.append(mid)
+        return f"{mid}: " + ", ".join(f"{i}=${p}" for i, p in menu)
+
+
+def _render(ranked, page, page_size):
+    return " | ".join(ranked[page * page_size:(page + 1) * page_size])
+
+
+def test_snapshot_build_pages_and_refresh():
+    shutil.rmtree(BASE, ignore_errors=True)
+    append_menu_item(merchant_file('1', BASE), '1', 'cheese_pizza', 'cheese pizza', '5')
+    append_menu_item(merchant_file('2', BASE), '2', 'chicken_burrito', 'chicken burrito', '9')
+    fmt = CountingFormatter()
+    catalog = CatalogSnapshot(fmt, BASE)
+
+    assert_true(catalog.block('1') == '1: cheese pizza=$5', f"unexpected block: {catalog.block('1')}")
+    assert_true(sorted(fmt.calls) == ['1', '2'] and catalog.version == 1, 'first read should build all merchants')
+    assert_true(catalog.page(0, 5, _render) == '1 | 2', 'id-ordered page expected')
+    calls = len(fmt.calls)
+    catalog.page(0, 5, _render)
+    catalog.block('2')
+    assert_true(len(fmt.calls) == calls and catalog.stats()['cached_pages'] == 1, 'reads must not re-render')
+
+    mf = merchant_file('1', BASE)
+    append_price(mf, 'cheese_pizza', '6')
+    catalog.refresh('1')
+    assert_true(fmt.calls[calls:] == ['1'], 'only the mutated merchant should be re-rendered')
+    assert_true(catalog.block('1') == '1: cheese pizza=$6' and catalog.version == 2, 'refresh should apply')
+    assert_true(catalog.stats()['cached_pages'] == 0, 'rendered pages should be dropped on refresh')
+
+    append_menu_item(merchant_file('3', BASE), '3', 'ramen', 'ramen', '12')
+    catalog.refresh('3', [('ramen', '12')])
+    assert_true(catalog.merchants() == ['1', '2', '3'], 'new merchant should join the catalog order')
+    shutil.rmtree(BASE, ignore_errors=True)
+
+
+def main():
+    test_snapshot_build_pages_and_refresh()
+    print("All catalog snapshot tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+test_context_compaction.py
+
+Tests for customer-side conversation compaction:
+- Short conversations pass through unchanged
+- Long conversations keep the last K turns and one summary note
+- Summaries are cached per conversation and only extended in batches
+- Prompt size stays bounded as the conversation grows
+- After a cache miss the summarizer input stays bounded (one batch per call) and only the
+  newest batch gets a summarizer call; the older backlog is folded locally
+"""
+import asyncio
+import sys, pathlib
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from agent.compaction import ConversationCompactor
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def _conversation(n: int) -> list[dict]:
+    return [{'role': 'user' if i % 2 == 0 else 'assistant', 'content': f'turn {i} ' + 'x' * 50}
+            for i in range(n)]
+
+
+class FakeSummarizer:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, previous, turns):
+        self.calls.append(len(turns))
+        return (previous or '') + f'[{len(turns)} turns]'
+
+
+def test_short_conversation_unchanged():
+    compactor = ConversationCompactor(keep_last_turns=4, summarize_every=2)
+    summarize = FakeSummarizer()
+    turns = _conversation(3)
+    summary, recent = asyncio.run(compactor.compact('c1', turns, summarize))
+    assert_true(summary is None, 'no summary expected for short conversations')
+    assert_true(recent == turns, 'short conversation should pass through verbatim')
+    assert_true(not summarize.calls, 'summarizer should not run')
+
+
+def test_summary_is_cached_and_extended_in_batches():
+    compactor = ConversationCompactor(keep_last_turns=4, summarize_every=2)
+    summarize = FakeSummarizer()
+    turns = _conversation(6)
+    summary, recent = asyncio.run(compactor.compact('c1', turns, summarize))
+    assert_true(summarize.calls == [2], f'expected one summary of 2 turns, got {summarize.calls}')
+    assert_true(recent == turns[2:], 'last K turns should be kept verbatim')
+
+    # Same history again: cached summary is reused without another call
+    again, _ = asyncio.run(compactor.compact('c1', turns, summarize))
+    assert_true(again == summary and summarize.calls == [2], 'summary should be served from cache')
+
+    # One more turn: below the batch size, so the extra older turn stays verbatim
+    turns7 = _conversation(7)
+    _, recent7 = asyncio.run(compactor.compact('c1', turns7, summarize))
+    assert_true(summarize.calls == [2] and len(recent7) == 5, 'pending turns should wait for a full batch')
+
+    # Two more turns: only the new older turns are summarized
+    turns8 = _conversation(8)
+    summary8, recent8 = asyncio.run(compactor.compact('c1', turns8, summarize))
+    assert_true(summarize.calls == [2, 2], f'expected incremental summary, got {summarize.calls}')
+    assert_true(summary8.startswith(summary), 'previous summary should be extended, not rebuilt')
+    assert_true(recent8 == turns8[4:], 'last K turns should be kept verbatim')
+
+
+def test_prompt_size_is_bounded():
+    compactor = ConversationCompactor(keep_last_turns=4, summarize_every=2,
+                                      max_turn_chars=40, max_summary_chars=100)
+    summarize = FakeSummarizer()
+    sizes = []
+    for n in range(1, 200, 7):
+        summary, recent = asyncio.run(compactor.compact('c2', _conversation(n), summarize))
+        sizes.append(len(summary or '') + sum(len(t['content']) for t in recent))
+    # K + summarize_every - 1 turns of at most 40 chars, plus a 100-char summary
+    assert_true(max(sizes) <= 5 * 40 + 100, f'prompt grew without bound: {max(sizes)}')
+
+
+def test_cache_miss_folds_in_batches():
+    compactor = ConversationCompactor(keep_last_turns=4, summarize_every=3, max_summary_chars=4000)
+    summarize = FakeSummarizer()
+    # 40 turns seen for the first time (e.g. after a restart): 36 older turns to fold
+    summary, recent = asyncio.run(compactor.compact('c3', _conversation(40), summarize))
+    assert_true(summarize.calls == [3], f'expected one summarizer call for the newest batch, got {summarize.calls}')
+    assert_true(compactor.stats()['turns_folded_locally'] == 33, 'the 11 older batches are folded locally')
+    assert_true(len(recent) == 4 and summary.endswith('[3 turns]') and 'turn 32 ' in summary,
+                'every older turn is folded')
+    again, _ = asyncio.run(compactor.compact('c3', _conversation(40), summarize))
+    assert_true(again == summary and summarize.calls == [3], 'the folded summary is cached')
+
+    wider = ConversationCompactor(keep_last_turns=4, summarize_every=3, max_summarize_calls=3)
+    asyncio.run(wider.compact('c3', _conversation(40), summarize))
+    assert_true(summarize.calls == [3] * 4, f'max_summarize_calls bounds the calls, got {summarize.calls}')
+    failing = ConversationCompactor(keep_last_turns=4, summarize_every=3)
+
+    async def broken(previous, turns):
+        raise RuntimeError('LLM down')
+
+    summary, recent = asyncio.run(failing.compact('c4', _conversation(11), broken))
+    assert_true(summary.count('- ') == 6 and len(recent) == 5, 'fallback summary also folds per batch')
+
+
+def main():
+    test_short_conversation_unchanged()
+    test_summary_is_cached_and_extended_in_batches()
+    test_prompt_size_is_bounded()
+    test_cache_miss_folds_in_batches()
+    print("All context compaction tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
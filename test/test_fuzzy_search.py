@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+test_fuzzy_search.py
+
+Tests for typo-tolerant and prefix search (metta.fuzzy, InvertedIndex.expand/suggest):
+- Bounded edit distance (with transpositions) and the term dictionary's lookups
+- "piza" / "burrit" find merchants; exact matches still outrank fuzzy ones
+- The term dictionary follows re-indexing and removals; suggestions rank by frequency
+"""
+import random
+import sys, pathlib
+import time
+from collections import Counter
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from metta.fuzzy import TermDictionary, edit_distance
+from metta.indexer import InvertedIndex
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def _doc(**kw):
+    return {'keywords': Counter(kw), 'items': [], 'desc': None, 'location': None}
+
+
+def _index():
+    return InvertedIndex.from_index({
+        '1': _doc(pizza=2, brooklyn=1),
+        '2': _doc(pizzeria=1, queens=1),
+        '3': _doc(burrito=1, burritos=1, tacos=1),
+        '4': _doc(pizza=1, piazza=1),
+    })
+
+
+def test_edit_distance_and_dictionary():
+    assert_true(edit_distance('piza', 'pizza', 2) == 1, 'one insertion')
+    assert_true(edit_distance('pziza', 'pizza', 2) == 1, 'a transposition counts as one edit')
+    assert_true(edit_distance('sushi', 'pizza', 2) == 3, 'distances past the limit report limit + 1')
+    terms = TermDictionary(['pizza', 'pizzeria', 'piazza', 'burrito'])
+    assert_true(terms.prefix('pizz') == ['pizza', 'pizzeria'], 'prefix lookup should be sorted')
+    assert_true(terms.fuzzy('piza') == [('pizza', 1)], 'only terms within one edit for short tokens')
+    assert_true(('burrito', 2) in terms.fuzzy('buritto'), 'longer tokens allow two edits')
+    terms.remove('pizza')
+    assert_true('pizza' not in terms and terms.fuzzy('piza') == [], 'removed terms should not be returned')
+
+
+def test_fuzzy_search():
+    inv = _index()
+    assert_true(inv.search(['piza'], top_k=5) == [], 'exact search is unchanged')
+    hits = [mid for mid, _ in inv.search(['piza'], top_k=5, fuzzy=True)]
+    assert_true(hits[:2] == ['1', '4'] and '2' not in hits, f'typo should match pizza: {hits}')
+    hits = [mid for mid, _ in inv.search(['burrit'], top_k=5, fuzzy=True)]
+    assert_true(hits == ['3'], f'prefix should match burrito: {hits}')
+    exact = dict(inv.search(['pizza'], top_k=5))
+    fuzzy = dict(inv.search(['piza'], top_k=5, fuzzy=True))
+    assert_true(fuzzy['1'] < exact['1'], 'fuzzy matches score below exact ones')
+    expanded = inv.search(['burrit'], top_k=5, fuzzy=True)[0][1]
+    single = inv.search(['burrito'], top_k=5)[0][1]
+    assert_true(expanded < single * 1.01, 'one token counts once even if several expansions hit')
+
+
+def test_dictionary_tracks_index_and_suggest():
+    inv = _index()
+    assert_true(inv.suggest('piz') == ['pizza', 'pizzeria'], 'most frequent completion first')
+    inv.add('2', _doc(ramen=1))
+    assert_true(inv.suggest('piz') == ['pizza'], 'terms leave with their last posting')
+    assert_true(inv.suggest('ramn') == ['ramen'], 'suggest falls back to typo matches')
+    inv.remove('3')
+    assert_true(inv.search(['burrit'], top_k=5, fuzzy=True) == [], 'removed merchants are not expanded to')
+
+
+def test_lookup_latency():
+    rng = random.Random(3)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    vocab = {''.join(rng.choice(letters) for _ in range(rng.randint(4, 10))) for _ in range(20000)}
+    terms = TermDictionary(vocab)
+    queries = [''.join(rng.choice(letters) for _ in range(6)) for _ in range(200)]
+    t0 = time.perf_counter()
+    for q in queries:
+        terms.fuzzy(q)
+        terms.prefix(q[:3])
+    per_query_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+    # Generous bound for slow CI machines; typically well under a millisecond
+    assert_true(per_query_ms < 20, f'fuzzy lookup too slow: {per_query_ms:.2f} ms')
+
+
+def main():
+    test_edit_distance_and_dictionary()
+    test_fuzzy_search()
+    test_dictionary_tracks_index_and_suggest()
+    test_lookup_latency()
+    print("All fuzzy search tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
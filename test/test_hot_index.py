@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+test_hot_index.py
+
+Tests for the in-process hot search index (metta.indexer.MerchantIndexStore.start):
+- Searches are served from memory; a write in this process invalidates its merchant
+- Invalidations are applied in the background and bump the generation
+- The directory watcher picks up writes made behind the store's back (other processes)
+- A restart seeds from the index.bin checkpoint and re-reads only merchants changed since
+- Seeded queries are served from the mapped checkpoint with the changes since overlaid,
+  ranking exactly like an in-memory index of the same documents
+"""
+import os
+import shutil
+import sys, pathlib
+import time
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from metta.indexer import InvertedIndex, MerchantIndexStore, build_index, index_store
+from metta.storage import merchant_file, append_menu_item, append_desc, close_writer, close_writers
+from metta.watcher import DirectoryWatcher
+
+BASE = str(ROOT / 'metta_store_hot_index_test')
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def _wait(cond, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond():
+            return True
+        time.sleep(0.02)
+    return cond()
+
+
+def _ids(store, q):
+    return [mid for mid, _, _ in store.search(q.split())]
+
+
+def test_writer_invalidation():
+    shutil.rmtree(BASE, ignore_errors=True)
+    append_menu_item(merchant_file('1', BASE), '1', 'cheese_pizza', 'cheese pizza', '5')
+    store = index_store(BASE)
+    store.start(watch='off')
+    try:
+        gen = store.generation
+        assert_true(_ids(store, 'pizza') == ['1'] and gen >= 1, 'start should index existing merchants')
+
+        # Searches must not look at the files: an unseen merchant stays invisible
+        # until it is invalidated
+        writes_before = store.full_parses + store.tail_parses
+        assert_true(_ids(store, 'pizza') == ['1'], 'repeat search should be served from memory')
+        assert_true(store.full_parses + store.tail_parses == writes_before, 'search must not re-parse files')
+
+        append_desc(merchant_file('2', BASE), '2', 'burritos and tacos')
+        assert_true(_wait(lambda: _ids(store, 'tacos') == ['2']), 'a local write should invalidate its merchant')
+        assert_true(store.generation > gen, 'applying a change should bump the generation')
+    finally:
+        store.stop()
+        for mid in ('1', '2'):
+            close_writer(merchant_file(mid, BASE))
+        shutil.rmtree(BASE, ignore_errors=True)
+
+
+def test_explicit_invalidate_and_sync():
+    shutil.rmtree(BASE, ignore_errors=True)
+    append_menu_item(merchant_file('1', BASE), '1', 'ramen', 'ramen', '12')
+    store = MerchantIndexStore(BASE)
+    store.refresh()
+    gen = store.generation
+    # Written directly, as another process would
+    close_writer(merchant_file('1', BASE))
+    with open(merchant_file('1', BASE), 'a', encoding='utf-8') as f:
+        f.write('(merchant-desc 1 "udon too")\n')
+    assert_true(_ids(store, 'udon') == [], 'nothing changes before invalidation')
+    store.invalidate('1')
+    assert_true(store.sync() == ['1'] and _ids(store, 'udon') == ['1'], 'sync should apply the invalidation')
+    assert_true(store.generation == gen + 1 and store.sync() == [], 'one generation per applied change')
+    shutil.rmtree(BASE, ignore_errors=True)
+
+
+def test_poll_watcher_reports_changes():
+    shutil.rmtree(BASE, ignore_errors=True)
+    os.makedirs(BASE)
+    seen = []
+    watcher = DirectoryWatcher(BASE, seen.append, mode='poll', poll_interval=0.05)
+    assert_true(watcher.start() == 'poll', 'poll mode should be honoured')
+    try:
+        with open(os.path.join(BASE, 'merchant_7.metta'), 'w', encoding='utf-8') as f:
+            f.write('(merchant-desc 7 "dumplings")\n')
+        assert_true(_wait(lambda: 'merchant_7.metta' in seen), 'poller should report the new file')
+    finally:
+        watcher.stop()
+        shutil.rmtree(BASE, ignore_errors=True)
+
+
+def test_restart_seeds_from_checkpoint():
+    shutil.rmtree(BASE, ignore_errors=True)
+    append_menu_item(merchant_file('1', BASE), '1', 'ramen', 'ramen', '12')
+    append_menu_item(merchant_file('2', BASE), '2', 'tacos', 'tacos', '4')
+    for mid in ('1', '2'):
+        close_writer(merchant_file(mid, BASE))
+    try:
+        first = MerchantIndexStore(BASE)
+        first.refresh()
+        assert_true(first.checkpoint() is not None, 'first checkpoint should be written')
+        assert_true(first.checkpoint() is None, 'an unchanged index is not rewritten')
+
+        store = MerchantIndexStore(BASE)
+        assert_true(store.refresh() == [], 'seeded merchants are unchanged')
+        assert_true(store.seeded == 2 and store.full_parses + store.tail_parses == 0,
+                    'restart should seed from the checkpoint without parsing')
+        assert_true(len(store.inverted.delta) == 0 and store.items is None,
+                    'seeded documents stay in the mapped file until an item search')
+        assert_true(_ids(store, 'ramen') == ['1'] and _ids(store, 'tacos') == ['2'], 'seeded docs are searchable')
+        assert_true([h['slug'] for h in store.search_items(['ramen'])] == ['ramen'], 'seeded items are searchable')
+
+        with open(merchant_file('2', BASE), 'a', encoding='utf-8') as f:
+            f.write('(merchant-desc 2 "burritos too")\n')
+        store = MerchantIndexStore(BASE)
+        assert_true(store.refresh() == ['2'], 'only the changed merchant is re-read')
+        assert_true(store.tail_parses == 1 and store.full_parses == 0, 'it resumes from its shard')
+        assert_true(_ids(store, 'burritos') == ['2'] and _ids(store, 'tacos') == ['2'], 'change is indexed')
+    finally:
+        shutil.rmtree(BASE, ignore_errors=True)
+
+
+def test_overlay_matches_full_index():
+    shutil.rmtree(BASE, ignore_errors=True)
+    dishes = ['pizza', 'ramen', 'tacos', 'burrito', 'curry', 'noodles']
+    for m in range(12):
+        path = merchant_file(str(m), BASE)
+        for i in range(1 + m % 4):
+            dish = dishes[(m + i) % len(dishes)]
+            append_menu_item(path, str(m), f'{dish}_{i}', f'{dish} special {i}', str(5 + i))
+        append_desc(path, str(m), f'kitchen {m} near station {m % 3}')
+    close_writers()
+    try:
+        first = MerchantIndexStore(BASE)
+        first.refresh()
+        first.checkpoint()
+
+        append_desc(merchant_file('3', BASE), '3', 'late night ramen and dumplings')
+        append_menu_item(merchant_file('20', BASE), '20', 'pizza_slice', 'pizza slice', '3')
+        close_writers()
+        os.remove(merchant_file('5', BASE))
+        store = MerchantIndexStore(BASE)
+        assert_true(sorted(store.refresh()) == ['20', '3', '5'], 'changed, new and removed merchants are applied')
+        assert_true(sorted(store.inverted.delta.docs) == ['20', '3'], 'only changes are held in memory')
+
+        full = InvertedIndex.from_index(build_index(BASE))
+        assert_true(len(store.inverted) == len(full) == 12 and store.inverted.docs == full.docs,
+                    'the overlay serves the current documents')
+        for q in (['ramen'], ['pizza', 'kitchen'], ['dumplings'], ['station', '2'], ['noodls'], ['burr']):
+            got, want = store.inverted.search(q, 20, fuzzy=True), full.search(q, 20, fuzzy=True)
+            assert_true([m for m, _ in got] == [m for m, _ in want] and
+                        all(abs(a - b) < 1e-9 for (_, a), (_, b) in zip(got, want)),
+                        f'{q}: overlay ranks {got}, full index {want}')
+        for prefix in ('pi', 'dump', 'sta', 'ramn'):
+            assert_true(store.suggest(prefix) == full.suggest(prefix), f'suggestions for {prefix!r} should match')
+        assert_true(store.stats()['terms'] == len(full.postings), 'term count covers both layers')
+
+        assert_true(store.checkpoint() is not None and len(store.inverted.delta) == 0,
+                    'a checkpoint folds the changes into the mapped file')
+        assert_true(store.inverted.search(['dumplings']) == full.search(['dumplings']), 'folded changes are served')
+    finally:
+        close_writers()
+        shutil.rmtree(BASE, ignore_errors=True)
+
+
+def main():
+    test_writer_invalidation()
+    test_explicit_invalidate_and_sync()
+    test_poll_watcher_reports_changes()
+    test_restart_seeds_from_checkpoint()
+    test_overlay_matches_full_index()
+    print("All hot index tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+test_incremental_index.py
+
+Tests for per-merchant incremental index maintenance (metta.indexer.MerchantIndexStore):
+- Unchanged merchants are not re-parsed; appends are parsed from the stored offset
+- A compacted (rewritten) file is re-parsed from the start
+- Shards persist across processes and deleted merchants leave the index
+"""
+import os
+import shutil
+import sys, pathlib
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from metta.indexer import MerchantIndexStore, build_index
+from metta.storage import merchant_file, append_menu_item, append_desc, compact_merchant_file, close_writer
+
+BASE = str(ROOT / 'metta_store_incremental_test')
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def _ids(store, q):
+    return [mid for mid, _ in store.inverted.search(q.split(), top_k=5)]
+
+
+def test_incremental_refresh():
+    shutil.rmtree(BASE, ignore_errors=True)
+    append_menu_item(merchant_file('1', BASE), '1', 'cheese_pizza', 'cheese pizza', '5')
+    append_menu_item(merchant_file('2', BASE), '2', 'chicken_burrito', 'chicken burrito', '9')
+    store = MerchantIndexStore(BASE)
+    assert_true(store.refresh() == ['1', '2'] and store.full_parses == 2, 'first refresh indexes everyone')
+    assert_true(store.refresh() == [], 'unchanged files must not be re-parsed')
+
+    append_desc(merchant_file('2', BASE), '2', 'tacos and burritos')
+    assert_true(store.refresh() == ['2'] and store.tail_parses == 1, 'only the appended merchant is re-indexed')
+    assert_true(_ids(store, 'tacos') == ['2'], 'appended facts should be searchable')
+    assert_true(store.inverted.docs['2'] == build_index(BASE)['2'], 'tail parse must match a full parse')
+
+    compact_merchant_file('2', BASE)
+    assert_true(store.refresh() == ['2'] and store.full_parses == 3, 'rewritten file is parsed from the start')
+    assert_true(store.inverted.docs['2'] == build_index(BASE)['2'], 'compacted doc must match a full parse')
+
+
+def test_shards_persist_and_deletes():
+    # A new process picks the shards up without re-parsing unchanged merchants
+    store = MerchantIndexStore(BASE)
+    assert_true(store.refresh() == [] and store.full_parses == 0, 'shards should be reused')
+    assert_true(_ids(store, 'pizza') == ['1'], 'shard-loaded index should be searchable')
+    close_writer(merchant_file('1', BASE))
+    os.remove(merchant_file('1', BASE))
+    assert_true(store.refresh() == ['1'] and _ids(store, 'pizza') == [], 'deleted merchant should leave the index')
+    assert_true(not os.path.exists(os.path.join(BASE, 'index', 'merchant_1.json')), 'its shard should be removed')
+    shutil.rmtree(BASE, ignore_errors=True)
+
+
+def main():
+    test_incremental_refresh()
+    test_shards_persist_and_deletes()
+    print("All incremental index tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+test_index_format.py
+
+Tests for the memory-mapped binary search index (metta.index_format):
+- save_index/load_index round-trip through index.bin
+- MappedIndex search ranks exactly like the in-memory InvertedIndex
+- Documents, terms and prefixes are found by binary search; meta is read apart from payloads
+- A file with another format version reads as missing; the JSON format still works
+"""
+import os
+import random
+import shutil
+import struct
+import sys, pathlib
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from metta.index_format import MappedIndex, write_index
+from metta.indexer import (
+    InvertedIndex, build_index, save_index, load_index, open_mapped_index, index_is_stale,
+)
+from metta.storage import merchant_file, append_menu_item, append_desc, append_location, close_writer
+
+BASE = str(ROOT / 'metta_store_index_format_test')
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def _write_store():
+    shutil.rmtree(BASE, ignore_errors=True)
+    append_menu_item(merchant_file('1', BASE), '1', 'cheese_pizza', 'cheese pizza', '5')
+    append_location(merchant_file('1', BASE), '1', 'Brooklyn')
+    append_menu_item(merchant_file('2', BASE), '2', 'chicken_burrito', 'chicken burrito', '9')
+    append_desc(merchant_file('2', BASE), '2', 'burritos and tacos')
+    append_menu_item(merchant_file('10', BASE), '10', 'pizza_roll', 'pizza roll', '3')
+    for mid in ('1', '2', '10'):
+        close_writer(merchant_file(mid, BASE))
+
+
+def test_round_trip():
+    _write_store()
+    idx = build_index(BASE)
+    path = save_index(idx, BASE)
+    assert_true(path.endswith('index.bin'), 'binary is the default format')
+    assert_true(load_index(BASE) == idx, 'load_index should return what was saved')
+    assert_true(not index_is_stale(BASE), 'a fresh index.bin should not be stale')
+    with open_mapped_index(BASE) as mapped:
+        assert_true(mapped.postings('burritos') == {'2': 1}, 'postings should be found by term')
+        assert_true(mapped.postings('sushi') == {}, 'unknown terms have no postings')
+
+
+def test_search_matches_inverted_index():
+    rng = random.Random(7)
+    # Non-ASCII terms check that the term table is sorted like the lookup key (UTF-8 bytes)
+    vocab = [f't{i}' for i in range(300)] + ['café', 'ñandú', 'zürich', '寿司']
+    index = {
+        str(m): {
+            # Large tfs exercise multi-byte varints
+            'keywords': {t: rng.choice([1, 2, 3, 200, 70000]) for t in rng.sample(vocab, rng.randint(1, 40))},
+            'items': [f'item {m}'], 'desc': None, 'hours': None, 'location': None, 'wallet': None,
+        }
+        for m in range(500)
+    }
+    path = os.path.join(BASE, 'random.bin')
+    write_index(path, index)
+    inv = InvertedIndex.from_index(index)
+    with MappedIndex(path) as mapped:
+        assert_true(len(mapped) == 500, 'every merchant should be in the file')
+        for _ in range(50):
+            q = rng.sample(vocab, 3)
+            assert_true(mapped.search(q, top_k=10) == inv.search(q, top_k=10), f'rankings differ for {q}')
+        assert_true(mapped.doc(0)['items'] == ['item 0'], 'payloads should round-trip')
+        assert_true(all(mapped.ordinal(str(m)) == sorted(index).index(str(m)) for m in (0, 7, 499)),
+                    'documents are found by merchant id')
+        assert_true(mapped.ordinal('5000') is None and mapped.meta(0) == {}, 'unknown ids and absent meta')
+        assert_true(mapped.prefix('t29') == ['t29', 't290', 't291', 't292', 't293', 't294', 't295', 't296',
+                                             't297', 't298', 't299'] and mapped.prefix('zü') == ['zürich'],
+                    'prefixes complete from the term table')
+
+    index['0']['source'] = {'ino': 1, 'size': 2}
+    write_index(path, index, with_keywords=True)
+    with MappedIndex(path) as mapped:
+        assert_true(mapped.meta(0) == {'source': {'ino': 1, 'size': 2}} and 'source' not in mapped.doc(0),
+                    'meta is stored apart from the payload')
+        assert_true(mapped.doc(1)['keywords'] == index['1']['keywords'], 'keywords can be kept in payloads')
+
+
+def test_versions_and_json():
+    path = os.path.join(BASE, 'index.bin')
+    with open(path, 'r+b') as f:
+        f.seek(4)
+        f.write(struct.pack('<H', 99))
+    assert_true(load_index(BASE) is None and open_mapped_index(BASE) is None, 'unknown versions read as missing')
+    idx = build_index(BASE)
+    path = save_index(idx, BASE, format='json')
+    assert_true(path.endswith('index.json') and not os.path.exists(os.path.join(BASE, 'index.bin')),
+                'saving JSON should replace the binary index')
+    assert_true(load_index(BASE) == idx, 'JSON round-trip should still work')
+    shutil.rmtree(BASE, ignore_errors=True)
+
+
+def main():
+    test_round_trip()
+    test_search_matches_inverted_index()
+    test_versions_and_json()
+    print("All binary index format tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
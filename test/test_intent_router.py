@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+test_intent_router.py
+
+Tests for the customer agent's rule-based fast path:
+- Menu, order-status and price questions are routed locally
+- Open-ended requests fall through to the LLM
+- Menu item matching is case/punctuation-insensitive, on whole words, and never guesses
+"""
+import sys, pathlib
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from agent.intent_router import (
+    IntentRouter,
+    Intent,
+    match_menu_item,
+    SHOW_MENU,
+    ORDER_STATUS,
+    ITEM_PRICE,
+)
+
+MENU = [("cheese pizza", "12"), ("Meat Pizza", "15"), ("chicken burrito", "9")]
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def test_routes_deterministic_intents():
+    router = IntentRouter()
+    cases = {
+        "show menu": Intent(SHOW_MENU),
+        "Show me the menu!": Intent(SHOW_MENU),
+        "what's on the menu?": Intent(SHOW_MENU),
+        "what's my order status": Intent(ORDER_STATUS),
+        "where is my order?": Intent(ORDER_STATUS),
+        "my orders": Intent(ORDER_STATUS),
+        "price of cheese pizza": Intent(ITEM_PRICE, "cheese pizza"),
+        "How much is the meat pizza?": Intent(ITEM_PRICE, "meat pizza"),
+    }
+    for text, expected in cases.items():
+        got = router.classify(text)
+        assert_true(got == expected, f"{text!r}: expected {expected}, got {got}")
+
+
+def test_open_ended_requests_fall_through():
+    router = IntentRouter()
+    for text in [
+        "I want something spicy for a party of six, maybe with a vegetarian option",
+        "hi, who are you?",
+        "/set_wallet 0xabc",
+        "",
+    ]:
+        assert_true(router.classify(text) is None, f"{text!r} should go to the LLM")
+
+
+def test_match_menu_item_and_counters():
+    assert_true(match_menu_item("meat pizza", MENU) == ("Meat Pizza", "15"), "case-insensitive exact match")
+    assert_true(match_menu_item("a burrito", MENU) is None, "no fuzzy guessing beyond containment")
+    assert_true(match_menu_item("burrito", MENU) == ("chicken burrito", "9"), "whole-word match")
+    assert_true(match_menu_item("chicken burrito with salsa", MENU) == ("chicken burrito", "9"),
+                "an item named inside a longer request")
+    for vague in ("it", "this one", "them", "ur", "pi"):
+        assert_true(match_menu_item(vague, MENU) is None, f"{vague!r} names no item")
+    assert_true(match_menu_item("rito", MENU) is None, "no match inside a word")
+    assert_true(match_menu_item("pizza", MENU) is None, "several matches are not guessed")
+    router = IntentRouter()
+    router.record_hit(Intent(SHOW_MENU))
+    router.record_miss()
+    stats = router.stats()
+    assert_true(stats["hits"] == {SHOW_MENU: 1} and stats["misses"] == 1, f"unexpected stats: {stats}")
+    assert_true(stats["hit_rate"] == 0.5, "hit rate should be hits / lookups")
+
+
+def main():
+    test_routes_deterministic_intents()
+    test_open_ended_requests_fall_through()
+    test_match_menu_item_and_counters()
+    print("All intent router tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+test_item_search.py
+
+Tests for the item-level search index with price facets (metta.indexer.ItemIndex):
+- Price phrases are parsed out of the query ("pizza under $10", "$5-$8", "over 12")
+- Items are indexed with their latest price; removed items drop out
+- Range filters apply before the top-k cut; a bare price query lists the cheapest items
+"""
+import shutil
+import sys, pathlib
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from metta.indexer import ItemIndex, MerchantIndexStore, parse_price_filter
+from metta.storage import merchant_file, append_menu_item, append_price, append_remove_item, close_writer
+
+BASE = str(ROOT / 'metta_store_item_search_test')
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def test_parse_price_filter():
+    text, lo, hi = parse_price_filter('pizza under $10')
+    assert_true(text.split() == ['pizza'] and (lo, hi) == (None, 10.0), 'under sets the maximum')
+    assert_true(parse_price_filter('tacos $5-$8')[1:] == (5.0, 8.0), 'dash ranges')
+    assert_true(parse_price_filter('between $9 and 4.50 ramen')[1:] == (4.5, 9.0), 'between is order-insensitive')
+    assert_true(parse_price_filter('sushi over 12 dollars')[1:] == (12.0, None), 'over sets the minimum')
+    assert_true(parse_price_filter('best pizza in brooklyn')[1:] == (None, None), 'no price phrase')
+    for query in ('pizza from 5th avenue', '2 to 4 people pizza', 'sushi over 12', 'pizza $5th'):
+        assert_true(parse_price_filter(query) == (query, None, None), f'{query!r} has no currency marker')
+
+
+def test_item_index_ranges():
+    idx = ItemIndex()
+    idx.set_merchant('1', [
+        {'slug': 'cheese_pizza', 'display': 'cheese pizza', 'price': '8'},
+        {'slug': 'large_pizza', 'display': 'large pizza', 'price': '15.50'},
+        {'slug': 'soda', 'display': 'soda', 'price': 'n/a'},
+    ])
+    idx.set_merchant('2', [{'slug': 'pizza_slice', 'display': 'pizza slice', 'price': '$3'}])
+    hits = idx.search(['pizza'], hi=10.0, top_k=1)
+    assert_true(len(hits) == 1 and hits[0]['slug'] in ('cheese_pizza', 'pizza_slice'), 'filter before the top-k cut')
+    assert_true({h['slug'] for h in idx.search(['pizza'], hi=10.0)} == {'cheese_pizza', 'pizza_slice'},
+                'only items within the range')
+    assert_true([h['slug'] for h in idx.search([], lo=1, hi=9)] == ['pizza_slice', 'cheese_pizza'],
+                'a bare range lists the cheapest items first')
+    assert_true(all(h['slug'] != 'soda' for h in idx.search(['soda'], lo=0)), 'unpriced items never match ranges')
+    idx.set_merchant('1', [{'slug': 'cheese_pizza', 'display': 'cheese pizza', 'price': '12'}])
+    assert_true([h['slug'] for h in idx.search(['pizza'], hi=10.0)] == ['pizza_slice'], 're-indexing replaces prices')
+    idx.remove_merchant('2')
+    assert_true(idx.in_price_range(None, None) == ['1/cheese_pizza'] and len(idx) == 1, 'removal clears the price list')
+
+
+def test_store_indexes_items():
+    shutil.rmtree(BASE, ignore_errors=True)
+    path = merchant_file('1', BASE)
+    append_menu_item(path, '1', 'cheese_pizza', 'Cheese Pizza', '12')
+    append_menu_item(path, '1', 'garlic_bread', 'Garlic Bread', '4')
+    append_price(path, 'cheese_pizza', '9.50')
+    append_menu_item(merchant_file('2', BASE), '2', 'pepperoni_pizza', 'Pepperoni Pizza', '14')
+    store = MerchantIndexStore(BASE)
+    store.refresh()
+    hits = store.search_items(['pizza'], hi=10.0)
+    assert_true([(h['merchant_id'], h['item'], h['price']) for h in hits] == [('1', 'Cheese Pizza', '9.50')],
+                f'latest price should be indexed: {hits}')
+    append_remove_item(path, '1', 'cheese_pizza')
+    store.refresh()
+    assert_true(store.search_items(['pizza'], hi=10.0) == [], 'removed items leave the item index')
+    # Shards restore the item view without re-parsing
+    fresh = MerchantIndexStore(BASE)
+    fresh.refresh()
+    assert_true(fresh.full_parses == 0 and [h['item'] for h in fresh.search_items(['bread'])] == ['Garlic Bread'],
+                'items should come back from the shards')
+    for mid in ('1', '2'):
+        close_writer(merchant_file(mid, BASE))
+    shutil.rmtree(BASE, ignore_errors=True)
+
+
+def main():
+    test_parse_price_filter()
+    test_item_index_ranges()
+    test_store_indexes_items()
+    print("All item search tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+test_knowledge_load.py
+
+Tests for the precompiled knowledge graph (metta.knowledge.load_knowledge_graph):
+- It adds the same atoms, in the same order, as initialize_knowledge_graph
+- The atoms are built once per process and shared by every instance
+- Loading invalidates the instance's cached query results
+"""
+import sys, pathlib
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from metta.knowledge import initialize_knowledge_graph, knowledge_atoms, load_knowledge_graph
+from metta.query_cache import cached_run, generation
+from utils.fake_metta import FakeMeTTa
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def test_same_graph():
+    seeded, loaded = FakeMeTTa(), FakeMeTTa()
+    initialize_knowledge_graph(seeded)
+    load_knowledge_graph(loaded)
+    expected = [str(a) for a in seeded.space().atoms]
+    assert_true(len(expected) > 100, 'the seed graph has its atoms')
+    assert_true([str(a) for a in loaded.space().atoms] == expected, 'precompiled graph matches the seed')
+    assert_true(knowledge_atoms() is knowledge_atoms(), 'atoms are built once')
+
+
+def test_load_invalidates_queries():
+    metta = FakeMeTTa()
+    q = '!(match &self (faq $q $a) $a)'
+    assert_true(cached_run(metta, q) == [[0]], 'empty space')
+    gen = generation(metta)
+    load_knowledge_graph(metta)
+    assert_true(generation(metta) == gen + 1, 'loading bumps the generation')
+    assert_true(cached_run(metta, q) == [[len(knowledge_atoms())]], 'queries see the loaded graph')
+
+
+def main():
+    test_same_graph()
+    test_load_invalidates_queries()
+    print("All knowledge graph load tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
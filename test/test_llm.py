@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+test_llm.py
+
+Tests for the shared async LLM client (agent.llm.AsyncLLMClient), against a fake AsyncOpenAI:
+- Completions in flight never exceed max_concurrency; extra callers queue
+- in_flight / queued / completed / failed counters track the calls
+- A call past its deadline raises asyncio.TimeoutError and frees its slot
+"""
+import asyncio
+import sys, pathlib
+from types import SimpleNamespace
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import agent.llm as llm
+from agent.llm import AsyncLLMClient
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+class FakeCompletions:
+    """chat.completions stand-in: each call takes `delay` seconds; tracks peak concurrency."""
+
+    def __init__(self):
+        self.delay = 0.05
+        self.error = None
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+            return SimpleNamespace(model=kwargs['model'], messages=kwargs.get('messages'))
+        finally:
+            self.active -= 1
+
+
+class FakeAsyncOpenAI:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.chat = SimpleNamespace(completions=FakeCompletions())
+
+
+def _client(**kwargs) -> AsyncLLMClient:
+    real = llm.AsyncOpenAI
+    llm.AsyncOpenAI = FakeAsyncOpenAI
+    try:
+        return AsyncLLMClient(api_key='test-key', **kwargs)
+    finally:
+        llm.AsyncOpenAI = real
+
+
+def _messages(i: int) -> list:
+    return [{'role': 'user', 'content': f'question {i}'}]
+
+
+def test_concurrency_limit_and_counters():
+    async def run():
+        client = _client(max_concurrency=2, timeout=5)
+        fake = client.client.chat.completions
+        try:
+            tasks = [asyncio.create_task(client.chat(messages=_messages(i))) for i in range(6)]
+            await asyncio.sleep(0.01)
+            busy = client.stats()
+            results = await asyncio.gather(*tasks)
+        finally:
+            await client.aclose()
+        return client, fake, busy, results
+
+    client, fake, busy, results = asyncio.run(run())
+    assert_true(fake.peak == 2, f'at most max_concurrency calls in flight, saw {fake.peak}')
+    assert_true(busy['in_flight'] == 2 and busy['queued'] == 4, f'extra callers should queue: {busy}')
+    assert_true(len(results) == 6 and results[0].model == llm.DEFAULT_MODEL, 'model defaults to DEFAULT_MODEL')
+    stats = client.stats()
+    assert_true(stats['completed'] == 6 and stats['in_flight'] == 0 and stats['queued'] == 0,
+                f'counters should settle after the calls: {stats}')
+
+
+def test_timeout_and_failures():
+    async def run():
+        client = _client(max_concurrency=1, timeout=5)
+        fake = client.client.chat.completions
+        timed_out = False
+        try:
+            fake.delay = 1.0
+            try:
+                await client.chat(timeout=0.05, messages=_messages(0))
+            except asyncio.TimeoutError:
+                timed_out = True
+            # The slot of the cancelled call is released: the next call is not stuck behind it
+            fake.delay = 0
+            ok = await client.chat(timeout=0.5, messages=_messages(1))
+            fake.error = RuntimeError('upstream error')
+            try:
+                await client.chat(messages=_messages(2))
+                failed = False
+            except RuntimeError:
+                failed = True
+        finally:
+            await client.aclose()
+        return client, timed_out, ok, failed
+
+    client, timed_out, ok, failed = asyncio.run(run())
+    assert_true(timed_out, 'a slow call should raise asyncio.TimeoutError')
+    assert_true(ok is not None and failed, 'later calls run, and errors propagate')
+    stats = client.stats()
+    assert_true(stats['timed_out'] == 1 and stats['failed'] == 1 and stats['completed'] == 1,
+                f'unexpected counters: {stats}')
+    assert_true(stats['in_flight'] == 0 and stats['queued'] == 0, 'no call left holding a slot')
+
+
+def main():
+    test_concurrency_limit_and_counters()
+    test_timeout_and_failures()
+    print("All LLM client tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+test_llm_cache.py
+
+Tests for the exact-match LLM response cache:
+- Identical (model, messages, tools, menu version) hit; a menu version bump misses
+- LRU capacity and TTL eviction
+- Side-effecting tool calls are never cached
+"""
+import sys, pathlib
+from types import SimpleNamespace
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from agent.llm_cache import LLMResponseCache
+
+MESSAGES = [
+    {"role": "system", "content": "You are the merchant's sales assistant."},
+    {"role": "user", "content": "what's on the menu?"},
+]
+
+
+def _response(content=None, tool_name=None):
+    tool_calls = None
+    if tool_name:
+        tool_calls = [{"id": "call_1", "type": "function",
+                       "function": {"name": tool_name, "arguments": "{}"}}]
+    message = {"role": "assistant", "content": content, "tool_calls": tool_calls}
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def test_hit_and_menu_version_scoping():
+    cache = LLMResponseCache(max_entries=8, ttl=60)
+    key = cache.make_key("asi1-mini", MESSAGES, menu_version="v1", max_tokens=2048)
+    assert_true(cache.get(key) is None, "empty cache should miss")
+    resp = _response("cheese pizza: $5")
+    assert_true(cache.put(key, resp), "plain chat response should be cached")
+    assert_true(cache.get(key) is resp, "identical request should hit")
+    bumped = cache.make_key("asi1-mini", MESSAGES, menu_version="v2", max_tokens=2048)
+    assert_true(bumped != key, "menu version must be part of the key")
+    assert_true(cache.get(bumped) is None, "new menu version should miss")
+    stats = cache.stats()
+    assert_true(stats["hits"] == 1 and stats["misses"] == 2, f"unexpected stats: {stats}")
+
+
+def test_lru_and_ttl_eviction():
+    cache = LLMResponseCache(max_entries=2, ttl=60)
+    keys = [cache.make_key("asi1-mini", [{"role": "user", "content": str(i)}]) for i in range(3)]
+    for k in keys:
+        cache.put(k, _response("x"))
+    assert_true(cache.get(keys[0]) is None, "oldest entry should be evicted by LRU")
+    assert_true(cache.get(keys[2]) is not None, "newest entry should remain")
+
+    expired = LLMResponseCache(max_entries=2, ttl=-1)
+    k = expired.make_key("asi1-mini", MESSAGES)
+    expired.put(k, _response("x"))
+    assert_true(expired.get(k) is None, "expired entry should not be served")
+
+
+def test_side_effect_tools_bypass_cache():
+    cache = LLMResponseCache(side_effect_tools={"create_propose"})
+    key = cache.make_key("asi1-mini", MESSAGES)
+    assert_true(not cache.put(key, _response(tool_name="create_propose")),
+                "create_propose responses must not be cached")
+    assert_true(cache.put(key, _response(tool_name="consult_merchant")),
+                "read-only tool calls may be cached")
+    turn = MESSAGES + [_response(tool_name="create_propose").choices[0].message]
+    assert_true(not cache.is_cacheable_request(turn),
+                "turns carrying a side-effecting tool call must skip the cache")
+
+
+def main():
+    test_hit_and_menu_version_scoping()
+    test_lru_and_ttl_eviction()
+    test_side_effect_tools_bypass_cache()
+    print("All LLM cache tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
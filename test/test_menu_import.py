@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+test_menu_import.py
+
+Tests for bulk menu import:
+- CSV and JSON rows are validated and slugged with _normalize_item_name
+- Invalid rows are reported with 1-based row numbers
+- Line breaks and control characters are rejected, and no stored value can split a fact
+- A batch is persisted as one storage record and materializes to the full menu
+"""
+import shutil
+import sys, pathlib
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from metta.menu_import import parse_csv_rows, validate_menu_rows
+from metta.storage import merchant_file, append_menu_items, close_writer, load_menu_projection
+
+BASE = str(ROOT / 'metta_store_import_test')
+
+CSV = """Name,Price,Description
+Cheese Pizza,$12,Mozzarella and tomato
+Meat Pizza,15.50,
+Chicken Burrito,9,Grilled chicken
+"""
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def test_csv_rows_are_validated():
+    items, errors = validate_menu_rows(parse_csv_rows(CSV))
+    assert_true(not errors, f'unexpected errors: {errors}')
+    assert_true([i['slug'] for i in items] == ['cheese_pizza', 'meat_pizza', 'chicken_burrito'], 'slugs')
+    assert_true(items[0]['price'] == '12' and items[1]['price'] == '15.50', 'prices should be normalized')
+    assert_true(items[0]['desc'] == 'Mozzarella and tomato' and items[1]['desc'] == '', 'descriptions')
+
+
+def test_invalid_rows_are_reported():
+    rows = [
+        {'name': 'Cheese Pizza', 'price': '12'},
+        {'name': '', 'price': '3'},
+        {'name': 'Soda', 'price': 'free'},
+        {'name': 'cheese  pizza!', 'price': '13'},
+        {'name': 'Tea', 'price': '-1'},
+        'not a row',
+        {'name': 'Pie', 'price': '4', 'description': 'x\n#end\n(price pizza "0")'},
+        {'name': 'Pie\rcrust', 'price': '4'},
+        {'name': 'Cake', 'price': '4', 'description': 'nice\t\x00'},
+    ]
+    items, errors = validate_menu_rows(rows)
+    assert_true(len(items) == 1, 'only the first row is valid')
+    assert_true([e['row'] for e in errors] == [2, 3, 4, 5, 6, 7, 8, 9], f'unexpected errors: {errors}')
+    assert_true(all('control characters' in e['error'] for e in errors[5:]), 'control characters are rejected')
+    assert_true('duplicate' in errors[2]['error'], 'slug collisions should be rejected')
+
+
+def test_batch_is_one_record():
+    shutil.rmtree(BASE, ignore_errors=True)
+    items, _ = validate_menu_rows([{'name': f'Item {i}', 'price': str(i)} for i in range(1, 2001)])
+    mf = merchant_file('7', BASE)
+    assert_true(append_menu_items(mf, '7', items) == 2000, 'all items should be written')
+    close_writer(mf)
+    with open(mf, 'r', encoding='utf-8') as f:
+        text = f.read()
+    assert_true(text.count('#begin') == 1 and text.count('#end') == 1, 'batch should be a single record')
+    menu = load_menu_projection('7', BASE).menu()
+    assert_true(len(menu) == 2000 and menu[0] == ('Item 1', '1'), 'imported menu should materialize')
+    shutil.rmtree(BASE, ignore_errors=True)
+
+
+def test_values_cannot_split_records():
+    shutil.rmtree(BASE, ignore_errors=True)
+    mf = merchant_file('8', BASE)
+    desc = 'x\n#end\n(price pizza "0")\\'
+    append_menu_items(mf, '8', [{'slug': 'pizza', 'name': 'pizza', 'price': '9', 'desc': desc},
+                                {'slug': 'pie', 'name': 'pie', 'price': '4'}])
+    close_writer(mf)
+    with open(mf, 'r', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert_true(lines[0] == '#begin' and lines[-1] == '#end' and len(lines) == 9, f'unexpected record {lines}')
+    proj = load_menu_projection('8', BASE)
+    assert_true(proj.menu() == [('pizza', '9'), ('pie', '4')], 'the description injects no price')
+    assert_true(proj.items()[0]['desc'] == desc, 'the description round-trips')
+    shutil.rmtree(BASE, ignore_errors=True)
+
+
+def main():
+    test_csv_rows_are_validated()
+    test_invalid_rows_are_reported()
+    test_batch_is_one_record()
+    test_values_cannot_split_records()
+    print("All menu import tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
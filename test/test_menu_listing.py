@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+test_menu_listing.py
+
+Tests for the merchant agent's list_menu reply (agent.menu_listing, used by consult_merchant):
+- Only the merchants ranked for the query are listed, in rank order
+- Page and page size are clamped; pages past the end say so
+- Menus are capped per merchant (LIST_MENU_MAX_ITEMS) and per reply (LIST_MENU_MAX_CHARS)
+- An empty or legacy payload, or a query without hits, falls back to merchant id order
+"""
+import shutil
+import sys, pathlib
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from agent import menu_listing
+from agent.menu_listing import format_menu_block, list_menus, parse_list_menu_request
+from metta.catalog import CatalogSnapshot
+from metta.indexer import search_merchants
+from metta.storage import append_desc, append_menu_item, close_writers, merchant_file
+
+BASE = str(ROOT / 'metta_store_menu_listing_test')
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def _search(query, top_k):
+    return search_merchants(query, base_dir=BASE, top_k=top_k)
+
+
+def _listed(text):
+    return [line.split(': ', 1)[1] for line in text.split('\n') if line.startswith('The following are from')]
+
+
+def _setup():
+    shutil.rmtree(BASE, ignore_errors=True)
+    append_menu_item(merchant_file('1', BASE), '1', 'cheese_pizza', 'cheese pizza', '5')
+    append_menu_item(merchant_file('2', BASE), '2', 'chicken_burrito', 'chicken burrito', '9')
+    append_desc(merchant_file('2', BASE), '2', 'burrito bar, burritos all day')
+    append_menu_item(merchant_file('3', BASE), '3', 'bean_burrito', 'bean burrito', '7')
+    close_writers()
+    return CatalogSnapshot(format_menu_block, BASE)
+
+
+def test_ranked_pages():
+    catalog = _setup()
+    try:
+        text = list_menus(catalog, 'burrito', 0, 3, search=_search)
+        ranked = [str(r['merchant_id']) for r in _search('burrito', 3)]
+        assert_true(_listed(text) == ranked and set(ranked) == {'2', '3'}, f'only burrito merchants, in rank order: {text}')
+        assert_true('cheese pizza' not in text and '- bean burrito: $7' in text, 'menus come from the catalog')
+
+        first = list_menus(catalog, 'burrito', 0, 1, search=_search)
+        second = list_menus(catalog, 'burrito', 1, 1, search=_search)
+        assert_true(_listed(first) == ranked[:1] and 'page=1' in first, 'first page points to the next')
+        assert_true(_listed(second) == ranked[1:2] and 'more merchants' not in second, 'last page has no hint')
+        assert_true(list_menus(catalog, 'burrito', 5, 1, search=_search).startswith('No more merchants'),
+                    'a page past the end is reported')
+    finally:
+        shutil.rmtree(BASE, ignore_errors=True)
+
+
+def test_request_caps():
+    cap = menu_listing.LIST_MENU_MAX_PAGE_SIZE
+    assert_true(parse_list_menu_request('{"query": "tacos", "page": 2, "page_size": 2}') == ('tacos', 2, 2),
+                'payload fields are decoded')
+    assert_true(parse_list_menu_request('{"query": "tacos", "page": -3, "page_size": 500}') == ('tacos', 0, cap),
+                'page is clamped at 0 and page size at LIST_MENU_MAX_PAGE_SIZE')
+    assert_true(parse_list_menu_request('{"page_size": 0}')[2] == 3, 'a zero page size uses the default')
+
+
+def test_size_bounds():
+    menu = [(f'dish {i}', str(i)) for i in range(menu_listing.LIST_MENU_MAX_ITEMS + 5)]
+    block = format_menu_block('9', menu)
+    assert_true(block.count('\n- ') == menu_listing.LIST_MENU_MAX_ITEMS and block.endswith('(+5 more items)'),
+                'items per merchant are capped')
+    assert_true(format_menu_block('9', []).endswith('(no items yet)'), 'empty menus say so')
+
+    catalog = _setup()
+    old = menu_listing.LIST_MENU_MAX_CHARS
+    menu_listing.LIST_MENU_MAX_CHARS = 40
+    try:
+        text = list_menus(catalog, '', 0, 3)
+        head, _, hint = text.partition('\n\n')
+        assert_true(len(head) == 40 and head.startswith('The following are from merchant_id: 1'),
+                    f'an oversized block is truncated to LIST_MENU_MAX_CHARS: {text!r}')
+        assert_true('page=1' in hint, 'blocks that do not fit move to the next page')
+    finally:
+        menu_listing.LIST_MENU_MAX_CHARS = old
+        shutil.rmtree(BASE, ignore_errors=True)
+
+
+def test_fallback_to_id_order():
+    for legacy in ('', None, '   ', 'list my menus', '[]'):
+        assert_true(parse_list_menu_request(legacy) == ('', 0, 3), f'legacy payload {legacy!r} uses defaults')
+
+    catalog = _setup()
+    try:
+        def broken(query, top_k):
+            raise RuntimeError('index unavailable')
+
+        by_id = list_menus(catalog, '', 0, 3)
+        assert_true(_listed(by_id) == ['1', '2', '3'], f'an empty query lists merchants by id: {by_id}')
+        assert_true(list_menus(catalog, 'sushi', 0, 3, search=_search) == by_id, 'no hits falls back to id order')
+        assert_true(list_menus(catalog, 'burrito', 0, 3, search=broken) == by_id, 'a failing search falls back')
+        assert_true(list_menus(CatalogSnapshot(format_menu_block, BASE + '_empty'), '', 0, 3) == 'The menu is empty now!',
+                    'an empty catalog says so')
+    finally:
+        shutil.rmtree(BASE, ignore_errors=True)
+        shutil.rmtree(BASE + '_empty', ignore_errors=True)
+
+
+def main():
+    test_ranked_pages()
+    test_request_caps()
+    test_size_bounds()
+    test_fallback_to_id_order()
+    print("All menu listing tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
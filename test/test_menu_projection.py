@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+test_menu_projection.py
+
+Tests for the single-pass materialized menu (metta.menu.MenuProjection):
+- Latest price / display name win, tombstoned items are hidden
+- Facts of other merchants are ignored; quoted values with escapes round-trip
+- The hydrator keeps the projection in step with appended lines
+"""
+import shutil
+import sys, pathlib
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from metta.menu import MenuProjection, parse_fact
+from metta.registry import MerchantSpaceRegistry
+from metta.storage import merchant_file, append_menu_item, append_price, append_remove_item, append_item_desc
+from utils.fake_metta import FakeMeTTa
+
+BASE = str(ROOT / 'metta_store_menu_test')
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def test_projection_semantics():
+    proj = MenuProjection('1')
+    for line in [
+        '(menu 1 cheese_pizza)',
+        '(item-display cheese_pizza "cheese pizza")',
+        '(price cheese_pizza "5")',
+        '(menu 1 meat_pizza)',
+        '(price meat_pizza "9")',
+        '(menu 2 burrito)',
+        '(price cheese_pizza "6")',
+        '(item-desc cheese_pizza "the \\"classic\\" one")',
+        '(removed-menu 1 meat_pizza)',
+        '(removed-menu 2 cheese_pizza)',
+        '(merchant-desc 1 "New York slices")',
+    ]:
+        proj.apply(line)
+    assert_true(proj.menu() == [('cheese pizza', '6')], f'unexpected menu: {proj.menu()}')
+    assert_true(proj.items()[0]['desc'] == 'the "classic" one', 'escaped quotes should be unescaped')
+    assert_true(proj.meta == {'merchant-desc': 'New York slices'}, 'merchant metadata should be kept')
+    assert_true(parse_fact('not a fact') is None, 'non-facts should be rejected')
+
+
+def test_hydrator_updates_projection():
+    shutil.rmtree(BASE, ignore_errors=True)
+    mf = merchant_file('1', BASE)
+    append_menu_item(mf, '1', 'cheese_pizza', 'cheese pizza', '5')
+    reg = MerchantSpaceRegistry(FakeMeTTa, BASE, idle_ttl=0)
+    assert_true(reg.menu('1').menu() == [('cheese pizza', '5')], 'initial menu should be projected')
+    append_price(mf, 'cheese_pizza', '7')
+    append_menu_item(mf, '1', 'veggie_pizza', 'Veggie Pizza', '8')
+    append_item_desc(mf, 'veggie_pizza', 'peppers and olives')
+    assert_true(reg.menu('1').menu() == [('cheese pizza', '7'), ('Veggie Pizza', '8')],
+                f"appends should update the projection: {reg.menu('1').menu()}")
+    append_remove_item(mf, '1', 'cheese_pizza')
+    assert_true([i['slug'] for i in reg.menu('1').items()] == ['veggie_pizza'], 'tombstone should hide the item')
+    shutil.rmtree(BASE, ignore_errors=True)
+
+
+def main():
+    test_projection_semantics()
+    test_hydrator_updates_projection()
+    print("All menu projection tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+test_merchant_spaces.py
+
+Tests for the per-merchant MeTTa space registry (metta.registry.MerchantSpaceRegistry):
+- Each merchant gets its own lazily created, hydrated space
+- The least recently used merchant is evicted when over capacity
+- Idle merchants are evicted and rebuilt from storage on next use
+"""
+import shutil
+import sys, pathlib
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from metta.registry import MerchantSpaceRegistry
+from metta.storage import merchant_file, append_menu_item
+from utils.fake_metta import FakeMeTTa
+
+BASE = str(ROOT / 'metta_store_spaces_test')
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def _seed():
+    shutil.rmtree(BASE, ignore_errors=True)
+    append_menu_item(merchant_file('1', BASE), '1', 'cheese_pizza', 'cheese pizza', '5')
+    append_menu_item(merchant_file('2', BASE), '2', 'chicken_burrito', 'chicken burrito', '9')
+    append_menu_item(merchant_file('3', BASE), '3', 'cheese_pizza', 'cheese pizza', '7')
+
+
+def test_spaces_are_per_merchant():
+    _seed()
+    reg = MerchantSpaceRegistry(FakeMeTTa, BASE, max_spaces=8, idle_ttl=0)
+    m1, m3 = reg.get('1'), reg.get('3')
+    assert_true(m1 is not m3, 'merchants must not share a space')
+    assert_true('(price cheese_pizza "7")' not in m1.space().atoms, "merchant 3's price leaked into merchant 1")
+    assert_true(reg.get('1') is m1 and reg.stats()['created'] == 2, 'spaces should be reused while resident')
+
+
+def test_lru_eviction_and_rebuild():
+    _seed()
+    reg = MerchantSpaceRegistry(FakeMeTTa, BASE, max_spaces=2, idle_ttl=0)
+    reg.get('1')
+    reg.get('2')
+    reg.get('1')  # touch 1 so 2 becomes least recently used
+    reg.get('3')
+    assert_true('2' not in reg and '1' in reg and len(reg) == 2, 'least recently used merchant should go')
+    rebuilt = reg.get('2')
+    assert_true(len(rebuilt.space().atoms) == 3, 'evicted merchant should be rebuilt from storage')
+    assert_true(reg.stats()['evicted'] == 2, f"unexpected stats: {reg.stats()}")
+
+
+def test_idle_eviction():
+    _seed()
+    reg = MerchantSpaceRegistry(FakeMeTTa, BASE, max_spaces=8, idle_ttl=60)
+    reg.get('1')
+    reg.get('2')
+    reg._spaces['1'].last_used -= 120
+    assert_true(reg.evict_idle() == 1 and '1' not in reg and '2' in reg, 'idle merchant should be evicted')
+    shutil.rmtree(BASE, ignore_errors=True)
+
+
+def main():
+    test_spaces_are_per_merchant()
+    test_lru_eviction_and_rebuild()
+    test_idle_eviction()
+    print("All merchant space registry tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+test_metta_compaction.py
+
+Tests for merchant fact-log compaction (metta.storage.compact_merchant_file / maybe_compact):
+- The compacted file materializes to the same menu and metadata
+- Superseded prices, duplicate menu facts and tombstoned items are dropped
+- Only one wallet line survives; compaction only triggers past the garbage threshold
+- The garbage ratio is kept up to date as facts are appended, without re-reading the file
+"""
+import os
+import random
+import shutil
+import sys, pathlib
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from metta.storage import (
+    merchant_file,
+    append_menu_item,
+    append_price,
+    append_remove_item,
+    append_wallet,
+    append_desc,
+    compact_merchant_file,
+    close_writer,
+    maybe_compact,
+    writer_for,
+    _compacted_lines,
+    garbage_ratio,
+    load_menu_projection,
+)
+
+BASE = str(ROOT / 'metta_store_compaction_test')
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def _lines(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [ln.rstrip('\n') for ln in f if ln.strip()]
+
+
+def test_compaction_preserves_state():
+    shutil.rmtree(BASE, ignore_errors=True)
+    mf = merchant_file('1', BASE)
+    append_menu_item(mf, '1', 'cheese_pizza', 'cheese pizza', '5')
+    append_menu_item(mf, '1', 'meat_pizza', 'meat pizza', '9')
+    for p in range(6, 12):
+        append_price(mf, 'cheese_pizza', str(p))
+    append_menu_item(mf, '1', 'cheese_pizza', 'Cheese Pizza', '12')
+    append_remove_item(mf, '1', 'meat_pizza')
+    append_wallet(mf, '1', '0xaaa')
+    append_desc(mf, '1', 'New York slices')
+    append_wallet(mf, '1', '0xbbb')
+    with open(mf, 'a', encoding='utf-8') as f:
+        f.write('(merchant-category 1 pizza)\n# comment\n')
+
+    before = load_menu_projection('1', BASE)
+    ino = os.stat(mf).st_ino
+    result = compact_merchant_file('1', BASE)
+    after = load_menu_projection('1', BASE)
+    assert_true(after.items() == before.items() and after.meta == before.meta,
+                'compaction must not change the materialized state')
+    lines = _lines(mf)
+    assert_true(result['after'] == len(lines) < result['before'], f'unexpected result: {result}')
+    assert_true(lines[:3] == ['(item-display cheese_pizza "Cheese Pizza")', '(menu 1 cheese_pizza)',
+                              '(price cheese_pizza "12")'], f'unexpected compacted item: {lines[:3]}')
+    assert_true(not any('meat_pizza' in ln for ln in lines if not ln.startswith('(removed-menu')),
+                'tombstoned item facts should be dropped')
+    assert_true(sum(ln.startswith('(merchant-wallet') for ln in lines) == 1, 'exactly one wallet line')
+    assert_true('(merchant-category 1 pizza)' in lines, 'unknown facts should be kept')
+    assert_true(os.stat(mf).st_ino != ino, 'file should be replaced atomically (new inode)')
+    assert_true(not [n for n in os.listdir(BASE) if '.compact.' in n], 'no temp file left behind')
+
+
+def test_threshold():
+    shutil.rmtree(BASE, ignore_errors=True)
+    mf = merchant_file('2', BASE)
+    append_menu_item(mf, '2', 'ramen', 'ramen', '10')
+    assert_true(not maybe_compact('2', BASE, threshold=0.5, min_lines=4), 'clean file should not compact')
+    for p in range(11, 20):
+        append_price(mf, 'ramen', str(p))
+    ratio, total = garbage_ratio('2', BASE)
+    assert_true(total == 12 and ratio == 0.75, f'unexpected garbage ratio: {ratio} of {total}')
+    assert_true(maybe_compact('2', BASE, threshold=0.5, min_lines=4), 'garbage-heavy file should compact')
+    assert_true(garbage_ratio('2', BASE) == (0.0, 3), 'compacted file should have no garbage')
+    shutil.rmtree(BASE, ignore_errors=True)
+
+
+def test_incremental_garbage_ratio():
+    shutil.rmtree(BASE, ignore_errors=True)
+    mf = merchant_file('3', BASE)
+    rng = random.Random(7)
+    append_menu_item(mf, '3', 'dish_0', 'dish 0', '1')
+    garbage_ratio('3', BASE)
+    writer = writer_for(mf)
+    for step in range(400):
+        slug = f'dish_{rng.randrange(12)}'
+        op = rng.randrange(5)
+        if op == 0:
+            append_menu_item(mf, '3', slug, slug.replace('_', ' '), str(step))
+        elif op == 1:
+            append_remove_item(mf, '3', slug)
+        elif op == 2:
+            append_desc(mf, '3', f'desc {step % 3}')
+        else:
+            append_price(mf, slug, str(step))
+        if step % 50 == 0:
+            with open(mf, 'r', encoding='utf-8') as f:
+                kept, total = _compacted_lines(f)
+            expected = ((total - len(kept)) / total, total)
+            assert_true(garbage_ratio('3', BASE) == expected, f'step {step}: incremental count drifted')
+    assert_true(writer.scans == 1, f'appends should not re-read the file ({writer.scans} scans)')
+
+    # Written behind the writer's back: recounted once
+    with open(mf, 'a', encoding='utf-8') as f:
+        f.write('(price dish_0 "99")\n')
+    total = garbage_ratio('3', BASE)[1]
+    assert_true(writer.scans == 2 and garbage_ratio('3', BASE)[1] == total, 'an outside write is recounted once')
+    close_writer(mf)
+    shutil.rmtree(BASE, ignore_errors=True)
+
+
+def main():
+    test_compaction_preserves_state()
+    test_threshold()
+    test_incremental_garbage_ratio()
+    print("All compaction tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
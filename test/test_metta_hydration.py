@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+test_metta_hydration.py
+
+Tests for incremental merchant hydration (metta.storage.MerchantHydrator):
+- Repeated reads do not re-ingest facts
+- Appended lines are tailed; partial trailing lines wait for completion
+- A rewritten file is reloaded once and previous atoms are removed
+"""
+import shutil
+import sys, pathlib
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from metta.storage import MerchantHydrator, merchant_file, append_menu_item, append_wallet
+from utils.fake_metta import FakeMeTTa
+
+BASE = str(ROOT / 'metta_store_hydration_test')
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def test_incremental_and_idempotent():
+    shutil.rmtree(BASE, ignore_errors=True)
+    metta = FakeMeTTa()
+    hydrator = MerchantHydrator(metta, BASE)
+    mf = merchant_file('1', BASE)
+    append_menu_item(mf, '1', 'cheese_pizza', 'cheese pizza', '5')
+    assert_true(hydrator.hydrate('1') == 3, 'first hydrate should load all facts')
+    assert_true(hydrator.hydrate('1') == 0, 'second hydrate should be a no-op')
+    assert_true(len(metta.space().atoms) == 3, 'atoms must not be duplicated')
+
+    append_wallet(mf, '1', '0xabc')
+    with open(mf, 'a', encoding='utf-8') as f:
+        f.write('(price cheese_pizza "6")')  # no newline yet: writer still mid-line
+    assert_true(hydrator.hydrate('1') == 1, 'only the new complete line should be tailed')
+    with open(mf, 'a', encoding='utf-8') as f:
+        f.write('\n')
+    assert_true(hydrator.hydrate('1') == 1, 'completed line should be picked up')
+    assert_true(len(metta.space().atoms) == 5, 'space should hold each fact exactly once')
+
+
+def test_rewrite_triggers_single_full_reload():
+    mf = merchant_file('1', BASE)
+    metta = FakeMeTTa()
+    hydrator = MerchantHydrator(metta, BASE)
+    hydrator.hydrate('1')
+    # Rewrite in place with different content (like a compaction)
+    with open(mf, 'w', encoding='utf-8') as f:
+        f.write('(menu 1 cheese_pizza)\n(price cheese_pizza "6")\n(merchant-wallet 1 "0xdef")\n')
+    assert_true(hydrator.hydrate('1') == 3, 'rewritten file should be reloaded')
+    assert_true(sorted(metta.space().atoms) == sorted([
+        '(menu 1 cheese_pizza)', '(price cheese_pizza "6")', '(merchant-wallet 1 "0xdef")',
+    ]), 'stale atoms from the previous file contents should be removed')
+    assert_true(hydrator.stats()['full_loads'] == 2, 'exactly one extra full load expected')
+    shutil.rmtree(BASE, ignore_errors=True)
+
+
+def main():
+    test_incremental_and_idempotent()
+    test_rewrite_triggers_single_full_reload()
+    print("All hydration tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
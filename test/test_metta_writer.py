@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+test_metta_writer.py
+
+Tests for the group-commit write path (metta.storage.FactWriter / append_record):
+- Multi-line mutations are framed as one #begin/#end record
+- A record torn by a crash is invisible to readers and truncated on the next open,
+  which reads only the file's tail
+- fsync follows the configured policy; interval syncs happen without a further write
+"""
+import os
+import shutil
+import sys, pathlib
+import time
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import metta.storage as storage
+from metta.storage import (
+    FactWriter,
+    merchant_file,
+    append_menu_item,
+    append_price,
+    close_writer,
+    committed_lines,
+    load_menu_projection,
+)
+
+BASE = str(ROOT / 'metta_store_writer_test')
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def _read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_records_are_framed():
+    shutil.rmtree(BASE, ignore_errors=True)
+    mf = merchant_file('1', BASE)
+    append_menu_item(mf, '1', 'cheese_pizza', 'cheese pizza', '5')
+    append_price(mf, 'cheese_pizza', '6')
+    close_writer(mf)
+    assert_true(_read(mf) == '#begin\n(menu 1 cheese_pizza)\n(item-display cheese_pizza "cheese pizza")\n'
+                '(price cheese_pizza "5")\n#end\n(price cheese_pizza "6")\n', f'unexpected file: {_read(mf)!r}')
+    assert_true(load_menu_projection('1', BASE).menu() == [('cheese pizza', '6')], 'framed facts should load')
+
+
+def test_torn_record_is_dropped_and_repaired():
+    mf = merchant_file('1', BASE)
+    with open(mf, 'a', encoding='utf-8') as f:
+        f.write('#begin\n(menu 1 meat_pizza)\n(item-display meat_pi')  # crash mid-write
+    lines = list(committed_lines(_read(mf).splitlines()))
+    assert_true(not any('meat_pizza' in ln for ln in lines), 'torn record must not be visible')
+    # The next writer truncates the torn tail, so new facts are not swallowed by it
+    append_price(mf, 'cheese_pizza', '7')
+    close_writer(mf)
+    assert_true(_read(mf).endswith('#end\n(price cheese_pizza "6")\n(price cheese_pizza "7")\n'),
+                f'torn tail should have been truncated: {_read(mf)!r}')
+    assert_true(load_menu_projection('1', BASE).menu() == [('cheese pizza', '7')], 'later append should load')
+
+
+def test_reopen_reads_only_the_tail():
+    path = os.path.join(BASE, 'tail.metta')
+    os.makedirs(BASE, exist_ok=True)
+    records = ''.join(f'#begin\n(menu 1 dish_{i})\n(price dish_{i} "{i}")\n#end\n' for i in range(20_000))
+    cases = [
+        ('(price x "1")\n', '(price x "1")\n'),          # committed
+        ('(price x "1")\n(price x', '(price x "1")\n'),  # torn line
+        ('#begin\n(menu 1 a)\n', ''),                     # open record
+        ('#begin\n' + '(menu 1 a)\n' * 20_000, ''),       # open record longer than a tail block
+        ('#begin\n(menu 1 a)\n#end', ''),                 # torn #end line
+    ]
+    reads = []
+    pread = os.pread
+    storage.os.pread = lambda fd, n, off: reads.append(n) or pread(fd, n, off)
+    try:
+        for tail, kept in cases:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(records + tail)
+            reads.clear()
+            w = FactWriter(path)
+            w.append(['(price y "2")'])
+            w.close()
+            assert_true(_read(path) == records + kept + '(price y "2")\n', f'wrong repair of {tail[:40]!r}')
+            if len(tail) < storage._TAIL_BLOCK:
+                assert_true(sum(reads) <= storage._TAIL_BLOCK, f'reopen read {sum(reads)} bytes of the tail')
+    finally:
+        storage.os.pread = pread
+        os.remove(path)
+
+
+def test_fsync_policy():
+    path = os.path.join(BASE, 'policy.metta')
+    always = FactWriter(path, fsync='always')
+    for i in range(3):
+        always.append([f'(price x "{i}")'])
+    never = FactWriter(path, fsync='never')
+    never.append(['(price x "9")'])
+    never.close()
+    interval = FactWriter(path, fsync='interval', interval_ms=60_000)
+    interval.append(['(price x "10")'])
+    interval.append(['(price x "11")'])
+    pending = interval.syncs
+    interval.close()
+    always.close()
+    assert_true(always.syncs == 3 and never.syncs == 0, f'unexpected syncs: {always.syncs}, {never.syncs}')
+    assert_true(pending == 0 and interval.syncs == 1, 'interval policy should batch fsyncs until flush')
+
+    timed = FactWriter(path, fsync='interval', interval_ms=50)
+    timed.append(['(price x "12")'])
+    timed.append(['(price x "13")'])
+    deadline = time.monotonic() + 5
+    while timed.syncs == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert_true(timed.syncs == 1, 'a dirty file is synced within the interval without another write')
+    timed.close()
+    assert_true(timed.syncs == 1, 'nothing left to sync at close')
+    shutil.rmtree(BASE, ignore_errors=True)
+
+
+def main():
+    test_records_are_framed()
+    test_torn_record_is_dropped_and_repaired()
+    test_reopen_reads_only_the_tail()
+    test_fsync_policy()
+    print("All storage writer tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
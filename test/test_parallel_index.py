@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+test_parallel_index.py
+
+Tests for the parallel index build (metta.indexer._parse_files / build_index):
+- A process-pool build produces exactly the serial build's documents
+- A cold MerchantIndexStore parses its merchants in the pool and then only tail-parses
+- Files appended while a cold parse ran are picked up by the next refresh
+"""
+import shutil
+import sys, pathlib
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import metta.indexer as indexer
+from metta.indexer import MerchantIndexStore, build_index
+from metta.storage import merchant_file, append_menu_item, append_desc, append_remove_item, close_writer
+
+BASE = str(ROOT / 'metta_store_parallel_test')
+MERCHANTS = 24
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def _write_store():
+    shutil.rmtree(BASE, ignore_errors=True)
+    for m in range(MERCHANTS):
+        path = merchant_file(str(m), BASE)
+        for i in range(20):
+            append_menu_item(path, str(m), f'dish_{m}_{i}', f'dish {i} from kitchen {m}', str(5 + i))
+        append_desc(path, str(m), f'kitchen {m} near station {m % 3}')
+        append_remove_item(path, str(m), f'dish_{m}_0')
+        close_writer(path)
+
+
+def test_parallel_build_matches_serial():
+    _write_store()
+    serial = build_index(BASE, workers=1)
+    indexer.PARALLEL_MIN_FILES = 2
+    parallel = build_index(BASE, workers=2)
+    assert_true(len(parallel) == MERCHANTS and parallel == serial, 'pool build should equal the serial build')
+
+
+def test_cold_store_uses_pool():
+    indexer.PARALLEL_MIN_FILES = 2
+    indexer.BUILD_WORKERS = 2
+    store = MerchantIndexStore(BASE)
+    changed = store.refresh()
+    assert_true(len(changed) == MERCHANTS and store.full_parses == MERCHANTS, 'every merchant parsed once')
+    assert_true(store.inverted.docs == build_index(BASE, workers=1), 'store docs should match the build')
+    append_desc(merchant_file('3', BASE), '3', 'late night ramen')
+    close_writer(merchant_file('3', BASE))
+    assert_true(store.refresh() == ['3'] and store.tail_parses == 1, 'later changes are tail-parsed')
+    assert_true([m for m, _, _ in store.search(['ramen'])] == ['3'], 'appended facts are searchable')
+    shutil.rmtree(BASE, ignore_errors=True)
+
+
+def main():
+    test_parallel_build_matches_serial()
+    test_cold_store_uses_pool()
+    print("All parallel index build tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
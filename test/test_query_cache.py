@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+test_query_cache.py
+
+Tests for metta.query_cache (memoized metta.run results per MeTTa instance):
+- Repeated queries against an unchanged space hit the cache
+- bump() (any write) invalidates only that instance's results
+- GeneralRAG lookups are cached and add_knowledge invalidates them
+- run_facts bumps the generation of the space it loads into
+"""
+import gc
+import sys, pathlib
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from metta import query_cache
+from metta.generalrag import GeneralRAG
+from metta.query_cache import bump, cached_run, generation, query_cache_stats
+from metta.storage import run_facts
+from utils.fake_metta import FakeMeTTa
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def test_hits_and_invalidation():
+    a, b = FakeMeTTa(), FakeMeTTa()
+    q = '!(match &self (merchant-desc 1 $d) $d)'
+    before = query_cache_stats()
+    assert_true(cached_run(a, q) == [[0]] and cached_run(a, q) == [[0]], 'same result from the cache')
+    assert_true(a.run_calls == 1, f'second query should not reach the interpreter ({a.run_calls} runs)')
+    cached_run(b, q)
+    a.space().add_atom('(merchant-desc 1 "x")')
+    bump(a)
+    assert_true(generation(a) == 1 and generation(b) == 0, 'bump is per instance')
+    assert_true(cached_run(a, q) == [[1]] and a.run_calls == 2, 'a write invalidates cached results')
+    cached_run(b, q)
+    assert_true(b.run_calls == 1, 'other instances keep their cache')
+    stats = query_cache_stats()
+    assert_true(stats['hits'] - before['hits'] == 2 and stats['misses'] - before['misses'] == 3,
+                f'unexpected stats {stats}')
+    assert_true(0 < stats['hit_rate'] <= 1, 'hit rate is a ratio')
+
+    n = stats['spaces']
+    del a, b
+    gc.collect()
+    assert_true(query_cache_stats()['spaces'] == n - 2, 'collected instances are forgotten')
+
+
+def test_size_limit():
+    metta = FakeMeTTa()
+    old = query_cache.QUERY_CACHE_SIZE
+    query_cache.QUERY_CACHE_SIZE = 2
+    try:
+        for q in ('!q1', '!q2', '!q1', '!q3', '!q1', '!q2'):
+            cached_run(metta, q)
+        assert_true(metta.run_calls == 4, f'least recently used query is evicted ({metta.run_calls} runs)')
+        query_cache.QUERY_CACHE_SIZE = 0
+        cached_run(metta, '!q1')
+        assert_true(metta.run_calls == 5, 'size 0 disables the cache')
+    finally:
+        query_cache.QUERY_CACHE_SIZE = old
+
+
+def test_general_rag_and_loaders():
+    metta = FakeMeTTa()
+    rag = GeneralRAG(metta)
+    rag.query_capability('uAgent')
+    rag.query_capability('uAgent')
+    assert_true(metta.run_calls == 1, 'repeated capability lookup is cached')
+    rag.add_knowledge('capability', 'uAgent', 'storage')
+    rag.query_capability('uAgent')
+    assert_true(metta.run_calls == 2, 'add_knowledge invalidates')
+
+    gen = generation(metta)
+    run_facts(metta, ['(menu 1 pizza)', '(price pizza "5")'])
+    assert_true(generation(metta) == gen + 1, 'run_facts bumps the generation')
+    assert_true(rag.query_capability('uAgent') is not None and metta.run_calls == 4, 'loaded facts invalidate')
+
+
+def main():
+    test_hits_and_invalidation()
+    test_size_limit()
+    test_general_rag_and_loaders()
+    print("All query cache tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+test_search_bm25.py
+
+Tests for the merchant inverted index (metta.indexer.InvertedIndex):
+- Rare terms outweigh common ones (idf) and long documents are length-normalized
+- Only merchants in the query terms' postings are scored; top-k is ordered
+- Re-indexing or removing a merchant keeps postings consistent
+"""
+import sys, pathlib
+from collections import Counter
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from metta.indexer import InvertedIndex
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def _doc(**kw):
+    return {'keywords': Counter(kw), 'items': [], 'desc': None, 'location': None}
+
+
+def _index():
+    return InvertedIndex.from_index({
+        '1': _doc(pizza=1, brooklyn=1),
+        '2': _doc(pizza=1, queens=1),
+        '3': _doc(pizza=1, burrito=1),
+        '4': _doc(pizza=1, sushi=1, ramen=1, udon=1, tempura=1, brooklyn=1, noodles=3),
+    })
+
+
+def test_bm25_ranking():
+    inv = _index()
+    top = inv.search(['pizza', 'brooklyn'], top_k=2)
+    assert_true([mid for mid, _ in top] == ['1', '4'], f'unexpected ranking: {top}')
+    assert_true(top[0][1] > top[1][1], 'short document should beat a long one for the same matches')
+    assert_true(inv.idf('burrito') > inv.idf('pizza'), 'rare terms should carry more weight')
+    hits = inv.search(['burrito'], top_k=5)
+    assert_true([mid for mid, _ in hits] == ['3'], 'only merchants in the postings are scored')
+    assert_true(inv.search(['unknown'], top_k=5) == [], 'unknown terms yield no hits')
+
+
+def test_add_and_remove():
+    inv = _index()
+    inv.add('3', _doc(tacos=2))
+    assert_true('burrito' not in inv.postings and inv.postings['tacos'] == {'3': 2}, 're-index replaces postings')
+    inv.remove('4')
+    assert_true('sushi' not in inv.postings and '4' not in inv.doc_len and len(inv) == 3, 'remove drops postings')
+    top = inv.search(['brooklyn'], top_k=5)
+    assert_true([mid for mid, _ in top] == ['1'], f'unexpected hits after remove: {top}')
+
+
+def main():
+    test_bm25_ranking()
+    test_add_and_remove()
+    print("All BM25 search tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+test_sqlite_backend.py
+
+Tests for the pluggable storage backends (metta.storage.FileBackend / metta.sqlite_store.SqliteBackend):
+- The same mutations give the same profile (menu, prices, tombstones, metadata) on both backends
+- .metta export/import round-trips a merchant between backends, unknown facts included
+- SqliteHydrator loads a merchant with one snapshot and applies only changed facts afterwards
+- The search index and the space registry work on top of the SQLite backend
+"""
+import shutil
+import sys, pathlib
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from metta.indexer import MerchantIndexStore
+from metta.registry import MerchantSpaceRegistry
+from metta.sqlite_store import SqliteBackend
+from metta.storage import FileBackend, close_writers
+from utils.fake_metta import FakeMeTTa
+
+BASE = str(ROOT / 'metta_store_sqlite_backend_test')
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def _mutate(store):
+    store.add_menu_item('1', 'cheese_pizza', 'cheese pizza', '5')
+    store.add_menu_item('1', 'chicken_burrito', 'Chef\'s "special" burrito', '9')
+    store.add_menu_items('1', [
+        {'slug': 'garlic_bread', 'name': 'garlic bread', 'price': '3', 'desc': 'with butter'},
+        {'slug': 'green_salad', 'name': 'green salad', 'price': '4'},
+    ])
+    store.set_price('1', 'cheese_pizza', '6')
+    store.remove_item('1', 'green_salad')
+    store.add_menu_item('1', 'green_salad', 'green salad', '5')  # a tombstone keeps it hidden
+    store.set_item_desc('1', 'cheese_pizza', 'thin crust')
+    store.set_desc('1', 'Pizza place')
+    store.set_desc('1', 'Best NY slices')
+    store.set_wallet('1', '0xabc')
+    store.append('1', ['(merchant-category 1 pizza)'])
+    store.add_menu_item('2', 'ramen', 'ramen', '12')
+
+
+def _profile(store, mid):
+    proj = store.profile(mid)
+    return proj.items(), proj.meta
+
+
+def test_parity_and_round_trip():
+    shutil.rmtree(BASE, ignore_errors=True)
+    files = FileBackend(BASE + '/files')
+    sql = SqliteBackend(BASE + '/sql')
+    v0 = sql.version('1')
+    _mutate(files)
+    _mutate(sql)
+    close_writers()
+    assert_true(_profile(sql, '1') == _profile(files, '1'), f"profiles differ: {_profile(sql, '1')} vs {_profile(files, '1')}")
+    assert_true(sql.merchants() == files.merchants() == ['1', '2'], 'both backends should list merchants 1 and 2')
+    items = [i['slug'] for i in sql.profile('1').items()]
+    assert_true(items == ['cheese_pizza', 'chicken_burrito', 'garlic_bread'], f'unexpected menu {items}')
+    v1 = sql.version('1')
+    sql.set_price('1', 'ramen', '13')
+    assert_true(v0 == '0' and v1 != sql.version('1'), 'every write should change the version')
+
+    exported = BASE + '/merchant_1.metta'
+    sql.export_metta('1', exported)
+    restored = FileBackend(BASE + '/restored')
+    restored.import_metta('1', exported)
+    close_writers()
+    assert_true(_profile(restored, '1') == _profile(sql, '1'), 'export/import should round-trip the profile')
+    assert_true('(merchant-category 1 pizza)' in restored.lines('1'), 'unknown facts survive the round trip')
+    sql.close()
+    shutil.rmtree(BASE, ignore_errors=True)
+
+
+def test_hydrator_applies_deltas():
+    shutil.rmtree(BASE, ignore_errors=True)
+    sql = SqliteBackend(BASE)
+    _mutate(sql)
+    metta = FakeMeTTa()
+    hydrator = sql.hydrator(metta)
+    loaded = hydrator.hydrate('1')
+    atoms = metta.space().atoms
+    assert_true(loaded == len(atoms) == len(sql.lines('1')), 'first hydrate loads the snapshot')
+    assert_true(hydrator.hydrate('1') == 0, 'unchanged version is a no-op')
+    sql.set_price('1', 'cheese_pizza', '7')
+    assert_true(hydrator.hydrate('1') == 1, 'a price edit adds one fact')
+    prices = [a for a in atoms if a.startswith('(price cheese_pizza ')]
+    assert_true(prices == ['(price cheese_pizza "7")'], f'old price should be removed: {prices}')
+    assert_true(hydrator.menu('1').menu()[0] == ('cheese pizza', '7'), 'projection follows the database')
+    hydrator.invalidate('1')
+    assert_true(metta.space().atoms == [], 'invalidate unloads the merchant')
+
+    registry = MerchantSpaceRegistry(FakeMeTTa, backend=sql)
+    assert_true(registry.menu('1').menu() == sql.profile('1').menu(), 'registry hydrates from the backend')
+    sql.close()
+    shutil.rmtree(BASE, ignore_errors=True)
+
+
+def test_index_over_sqlite():
+    shutil.rmtree(BASE, ignore_errors=True)
+    sql = SqliteBackend(BASE)
+    _mutate(sql)
+    store = MerchantIndexStore(BASE, sql)
+    assert_true(sorted(store.refresh()) == ['1', '2'], 'cold refresh indexes every merchant')
+    hits = store.search(['ramen'])
+    assert_true(hits and hits[0][0] == '2', f'unexpected hits {hits}')
+    assert_true(store.refresh() == [], 'unchanged merchants are not re-indexed')
+    sql.add_menu_item('1', 'ramen_bowl', 'spicy ramen bowl', '11')
+    assert_true(store.refresh() == ['1'], 'only the edited merchant is re-indexed')
+    items = store.search_items(['spicy'])
+    assert_true(items and items[0]['slug'] == 'ramen_bowl', f'unexpected items {items}')
+    sql.close()
+    shutil.rmtree(BASE, ignore_errors=True)
+
+
+def main():
+    test_parity_and_round_trip()
+    test_hydrator_applies_deltas()
+    test_index_over_sqlite()
+    print("All storage backend tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
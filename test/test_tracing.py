@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+test_tracing.py
+
+Tests for cross-hop latency tracing:
+- Nested spans inherit the trace id and parent from the active span
+- A trace context carried in a message parents the next hop's handler span
+- Spans written by several services are merged into one waterfall
+"""
+import asyncio
+import shutil
+import sys, pathlib
+from types import SimpleNamespace
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from agent.tracing import Tracer, load_trace, build_waterfall
+
+TRACE_DIR = str(ROOT / 'traces_test')
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def test_cross_service_waterfall():
+    shutil.rmtree(TRACE_DIR, ignore_errors=True)
+    api = Tracer('api', TRACE_DIR)
+    merchant = Tracer('merchant', TRACE_DIR)
+
+    @merchant.handler('merchant.query_handler')
+    async def handler(ctx, sender, msg):
+        with merchant.span('llm.chat'):
+            await asyncio.sleep(0.01)
+
+    with api.span('api.chat_messages') as root:
+        with api.span('api.send_sync_message') as hop:
+            asyncio.run(handler(None, 'agent1q', SimpleNamespace(trace=hop.context())))
+    assert_true(hop.parent_id == root.span_id, 'nested span should be parented on the active span')
+
+    spans = load_trace(root.trace_id, TRACE_DIR)
+    names = [s['name'] for s in spans]
+    assert_true(len(spans) == 4, f'expected 4 spans across services, got {names}')
+    result = build_waterfall(spans)
+    depths = {r['name']: r['depth'] for r in result['spans']}
+    assert_true(depths == {'api.chat_messages': 0, 'api.send_sync_message': 1,
+                           'merchant.query_handler': 2, 'llm.chat': 3},
+                f'unexpected waterfall nesting: {depths}')
+    assert_true(result['duration_ms'] >= 10, 'trace duration should cover the slowest hop')
+    shutil.rmtree(TRACE_DIR, ignore_errors=True)
+
+
+def test_errors_are_recorded():
+    tracer = Tracer('customer', trace_dir=None)
+    try:
+        with tracer.span('chain.propose_order') as span:
+            raise ValueError('reverted')
+    except ValueError:
+        pass
+    recorded = tracer.spans_for(span.trace_id)
+    assert_true(recorded and 'reverted' in recorded[0]['error'], 'span should carry the error')
+
+
+def main():
+    test_cross_service_waterfall()
+    test_errors_are_recorded()
+    print("All tracing tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+test_vector_search.py
+
+Tests for the optional NumPy similarity index (metta.vectors.VectorIndex):
+- Morphological neighbours score as similar ("cheesy" vs "cheese pizza")
+- Rows are replaced in place, removed rows are reused, and the matrix grows
+- Batched queries agree with single ones; search_merchants(mode="vector") uses the store
+Skipped when numpy is not installed.
+"""
+import shutil
+import sys, pathlib
+
+# Ensure project root is in sys.path when running as a script
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from metta.vectors import VectorIndex, vectors_available
+from metta.indexer import search_merchants, index_store
+from metta.storage import merchant_file, append_menu_item, append_desc, close_writer
+
+BASE = str(ROOT / 'metta_store_vector_test')
+
+
+def assert_true(cond: bool, msg: str):
+    if not cond:
+        raise AssertionError(msg)
+
+
+def test_similarity_and_rows():
+    vi = VectorIndex(dim=256, capacity=2)
+    vi.set('1', 'cheese pizza margherita')
+    vi.set('2', 'chicken burrito tacos')
+    vi.set('3', 'sushi ramen udon')
+    assert_true(vi._matrix.shape[0] == 4 and len(vi) == 3, 'the matrix should grow by doubling')
+    top = vi.search('cheesy pizzas', top_k=2)
+    assert_true(top[0][0] == '1' and 0 < top[0][1] <= 1.0001, f'n-grams should match inflections: {top}')
+    # Hash collisions may leave unrelated documents a small score, never a close one
+    assert_true(all(score < 0.2 for mid, score in top if mid == '3'), 'unrelated documents should score low')
+    vi.set('1', 'vegan salad bowl')
+    assert_true(all(score < 0.2 for _, score in vi.search('cheesy pizzas', top_k=3)),
+                'replacing a document overwrites its row')
+    vi.remove('2')
+    vi.set('4', 'burrito bowl')
+    assert_true(vi._rows == 3 and vi.search('burritos', top_k=1)[0][0] == '4', 'removed rows are reused')
+    single = [vi.search(q, top_k=2) for q in ('ramen', 'salad')]
+    assert_true(vi.search_many(['ramen', 'salad'], top_k=2) == single, 'batched and single queries agree')
+    assert_true(vi.search('burrito', top_k=2, allow=lambda k: k != '4') == [], 'allow filters hits')
+
+
+def test_vector_mode_in_store():
+    shutil.rmtree(BASE, ignore_errors=True)
+    append_menu_item(merchant_file('1', BASE), '1', 'cheese_pizza', 'Cheese Pizza', '9')
+    append_menu_item(merchant_file('2', BASE), '2', 'chicken_burrito', 'Chicken Burrito', '8')
+    store = index_store(BASE)
+    store.start(watch='off')
+    try:
+        res = search_merchants('cheesy flatbread', BASE, mode='vector')
+        assert_true(res and res[0]['merchant_id'] == '1', f'vector mode should find the cheese merchant: {res}')
+        append_desc(merchant_file('2', BASE), '2', 'cheesy quesadillas')
+        store.sync()
+        assert_true(store.vectors is not None and len(store.vectors) == 2, 'vectors follow index updates')
+        assert_true(search_merchants('quesadilla', BASE, mode='vector')[0]['merchant_id'] == '2',
+                    'changed merchants are re-vectorized')
+    finally:
+        store.stop()
+        for mid in ('1', '2'):
+            close_writer(merchant_file(mid, BASE))
+        shutil.rmtree(BASE, ignore_errors=True)
+
+
+def main():
+    if not vectors_available():
+        print("numpy not installed: skipping vector search tests")
+        return
+    test_similarity_and_rows()
+    test_vector_mode_in_store()
+    print("All vector search tests passed ✔️")
+
+
+if __name__ == "__main__":
+    main()
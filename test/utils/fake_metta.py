@@ -0,0 +1,44 @@
+"""
+Stand-in for hyperon.MeTTa shared by the storage, hydration and query tests.
+
+Atoms are the fact strings. Like the real interpreter, run adds plain facts to the
+space one line at a time, so a malformed line raises with the lines before it already
+added; `!` lines are recorded in `evaluated` and answer with the current atom count.
+"""
+
+
+class FakeSpace:
+    def __init__(self):
+        self.atoms = []
+
+    def add_atom(self, atom):
+        self.atoms.append(atom)
+
+    def remove_atom(self, atom):
+        self.atoms.remove(atom)
+
+
+class FakeMeTTa:
+    def __init__(self):
+        self._space = FakeSpace()
+        self.run_calls = 0
+        self.evaluated = []
+
+    def space(self):
+        return self._space
+
+    def parse_single(self, text):
+        if not (text.startswith('(') and text.endswith(')') and text.count('"') % 2 == 0):
+            raise RuntimeError(f'Unexpected end of expression: {text}')
+        return text
+
+    def run(self, text):
+        self.run_calls += 1
+        results = []
+        for line in text.split('\n'):
+            if line.startswith('!'):
+                self.evaluated.append(line)
+                results.append([len(self._space.atoms)])
+                continue
+            self._space.add_atom(self.parse_single(line))
+        return results